@@ -0,0 +1,125 @@
+"""Synthetic I bond portfolio generator for the benchmarks.
+
+Writes CSVs with the analyzer's six CSV_COL_* columns: a realistic mix of bond ages (under 12 months,
+under 60 months and older), fixed rates from 0% up to the 3.6% highs, and an optional share of
+malformed rows of every kind the parser rejects. Rows are generated in vectorized chunks, so 10M-row
+files stream out in bounded memory.
+
+    python benchmarks/generate_bonds.py bonds_1m.csv --rows 1000000 --malformed 0.001
+"""
+import argparse
+import csv
+import importlib
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYZER_PATH = os.path.join(REPO_ROOT, 'i_bond _analysis.py')
+
+# --- Portfolio Mix ---
+AGE_MIX = ((0.10, 0, 11), (0.30, 12, 59), (0.60, 60, 320)) # (share, min months, max months) held
+FIXED_RATES_PCT = np.array([0.0, 0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.9, 1.0, 1.2, 1.3, 1.7, 3.0, 3.4, 3.6])
+INFLATION_RATES_PCT = np.array([-2.78, 0.0, 0.77, 1.2, 1.48, 1.69, 1.97, 2.38, 3.24, 4.81, 4.45])
+PRINCIPALS = np.array([25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0])
+MALFORMED_KINDS = ('bad_date', 'bad_number', 'negative', 'blank_confirmation', 'future_date', 'empty_field')
+DEFAULT_CHUNK_ROWS = 100000
+
+
+def load_analyzer():
+    """Imports the repo's `ibond` package, whichever directory the benchmarks are run from."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return importlib.import_module('ibond')
+
+
+def _issue_months_back(rng, count):
+    """Months between issue and as-of date, drawn from AGE_MIX."""
+    shares = np.array([share for share, _, _ in AGE_MIX])
+    buckets = rng.choice(len(AGE_MIX), size=count, p=shares / shares.sum())
+    low = np.array([low for _, low, _ in AGE_MIX])[buckets]
+    high = np.array([high for _, _, high in AGE_MIX])[buckets]
+    return rng.integers(low, high + 1)
+
+
+def generate_rows(rows, seed=0, malformed=0.0, as_of=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yields lists of CSV rows (without header), chunk_rows at a time."""
+    rng = np.random.default_rng(seed)
+    as_of = as_of or date.today()
+    as_of_month = np.datetime64(as_of, 'M')
+    for start in range(0, rows, chunk_rows):
+        count = min(chunk_rows, rows - start)
+        months_back = _issue_months_back(rng, count)
+        issue_dates = (as_of_month - months_back).astype('datetime64[D]') # I bonds are dated the 1st
+        fixed = rng.choice(FIXED_RATES_PCT, size=count)
+        inflation = rng.choice(INFLATION_RATES_PCT, size=count)
+        composite = np.maximum(0.0, fixed + 2 * inflation + fixed * inflation / 100.0).round(2)
+        principal = rng.choice(PRINCIPALS, size=count)
+        growth = (1.0 + np.maximum(composite, 0.5) / 100.0) ** (months_back / 12.0)
+        current_value = (principal * growth * rng.uniform(0.97, 1.03, size=count)).round(2)
+        current_value = np.maximum(current_value, principal)
+
+        chunk = [
+            [f"SYN{start + i:09d}", str(issue_date), f"{fixed_rate}", f"{composite_rate}", f"{amount:.2f}", f"{value:.2f}"]
+            for i, (issue_date, fixed_rate, composite_rate, amount, value) in enumerate(zip(
+                issue_dates.tolist(), fixed.tolist(), composite.tolist(), principal.tolist(), current_value.tolist()
+            ))
+        ]
+        if malformed > 0:
+            for i in np.flatnonzero(rng.random(count) < malformed).tolist():
+                _corrupt(chunk[i], MALFORMED_KINDS[i % len(MALFORMED_KINDS)], as_of)
+        yield chunk
+
+
+def _corrupt(row, kind, as_of):
+    """Makes one generated row invalid in the given way."""
+    if kind == 'bad_date':
+        row[1] = 'notadate'
+    elif kind == 'bad_number':
+        row[4] = 'n/a'
+    elif kind == 'negative':
+        row[5] = '-' + row[5]
+    elif kind == 'blank_confirmation':
+        row[0] = ''
+    elif kind == 'future_date':
+        row[1] = date(as_of.year + 1, as_of.month, 1).isoformat()
+    elif kind == 'empty_field':
+        row[2] = ''
+
+
+def write_synthetic_csv(path, rows, seed=0, malformed=0.0, as_of=None):
+    """Writes a synthetic bond CSV with the analyzer's column names. Returns the file size in bytes."""
+    analyzer = load_analyzer()
+    header = [analyzer.CSV_COL_CONFIRMATION, analyzer.CSV_COL_ISSUE_DATE, analyzer.CSV_COL_FIXED_RATE,
+              analyzer.CSV_COL_COMPOSITE_RATE, analyzer.CSV_COL_PRINCIPAL, analyzer.CSV_COL_CURRENT_VALUE]
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        for chunk in generate_rows(rows, seed=seed, malformed=malformed, as_of=as_of):
+            writer.writerows(chunk)
+    return os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic I bond CSV for benchmarking.")
+    parser.add_argument('output', help="CSV file to write.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of bonds (1k to 10M is typical).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same file.")
+    parser.add_argument('--malformed', type=float, default=0.001, help="Share of rows to corrupt (0 to 1).")
+    parser.add_argument('--as-of', default=None, metavar='YYYY-MM-DD', help="Date bond ages are generated against.")
+    args = parser.parse_args(argv)
+    if args.rows <= 0:
+        parser.error("Rows must be a positive integer.")
+    if not 0.0 <= args.malformed <= 1.0:
+        parser.error("Malformed share must be between 0 and 1.")
+    as_of = date.fromisoformat(args.as_of) if args.as_of else None
+
+    size = write_synthetic_csv(args.output, args.rows, seed=args.seed, malformed=args.malformed, as_of=as_of)
+    print(f"Wrote {args.rows:,} bonds to {args.output} ({size / 1e6:,.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Stage benchmarks for the I bond analyzer.
+
+Generates (or reuses) a synthetic portfolio and times each stage separately:
+
+    parse           CSV read, validation and BondPortfolio build (load_portfolio)
+    compute         vectorized metrics for every bond (BondPortfolio.analyze)
+    compute_scalar  calculate_rotation_metrics, one call per bond, on a sample
+    summarize       recommended count and total net gain (BondPortfolio.summary)
+    render          results table columns, the table's default sort and the result CSV rows
+    cold_start      a fresh `python "i_bond _analysis.py"` process analyzing a one-bond CSV
+    interpreter     a fresh `python -c pass` process, the floor cold_start is measured against
+
+Each stage reports the best of --repeat wall-clock runs, rows/sec and tracemalloc peak memory
+(measured in a separate traced run so tracing does not skew the timings). Results can be saved
+as a JSON baseline and compared against later runs:
+
+    python benchmarks/run_benchmarks.py --rows 1000000 --save-baseline baseline.json
+    python benchmarks/run_benchmarks.py --rows 1000000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+
+from generate_bonds import ANALYZER_PATH, load_analyzer, write_synthetic_csv
+
+DEFAULT_TOLERANCE = 0.20 # Slowdown (as a fraction of the baseline) reported as a regression
+DEFAULT_SCALAR_SAMPLE = 20000
+DEFAULT_COLD_START_RUNS = 5
+
+
+class _NullWriter:
+    """File-like sink that discards everything written to it."""
+
+    def write(self, text):
+        return len(text)
+
+
+def _run_stage(function, repeat, measure_memory):
+    """Returns (best_seconds, peak_bytes, result) for a zero-argument callable."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def _time_process(command, runs):
+    """Best wall-clock seconds for a fresh process running command."""
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_cold_start(csv_filename, runs=DEFAULT_COLD_START_RUNS):
+    """Times the headless CLI from process start on the first bond of csv_filename.
+
+    Returns the cold_start and interpreter stage results.
+    """
+    with open(csv_filename, newline='', encoding='utf-8') as source:
+        head = [source.readline(), source.readline()]
+    stages = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        one_bond = os.path.join(temp_dir, 'one.csv')
+        with open(one_bond, 'w', newline='', encoding='utf-8') as target:
+            target.writelines(head)
+        commands = {
+            'cold_start': [sys.executable, ANALYZER_PATH, one_bond, '--output', os.path.join(temp_dir, 'out.csv')],
+            'interpreter': [sys.executable, '-c', 'pass'],
+        }
+        for name, command in commands.items():
+            seconds = _time_process(command, runs)
+            stages[name] = {'rows': 1, 'seconds': seconds, 'rows_per_sec': None, 'peak_bytes': None}
+    return stages
+
+
+def run_benchmarks(analyzer, csv_filename, repeat=3, scalar_sample=DEFAULT_SCALAR_SAMPLE, measure_memory=True,
+                   new_rate=1.3, tax_rate=22.0, horizon=10, as_of=None):
+    """Times every stage against one CSV. Returns a dictionary of stage results."""
+    as_of = as_of or date.today()
+    stages = {}
+
+    def record(name, rows, function):
+        seconds, peak, result = _run_stage(function, repeat, measure_memory)
+        stages[name] = {
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_sec': rows / seconds if seconds > 0 else None,
+            'peak_bytes': peak,
+        }
+        return result
+
+    portfolio, warnings = record('parse', 0, lambda: analyzer.load_portfolio(csv_filename, as_of=as_of))
+    rows = len(portfolio)
+    stages['parse']['rows'] = rows + len(warnings)
+    stages['parse']['rows_per_sec'] = stages['parse']['rows'] / stages['parse']['seconds']
+
+    record('compute', rows, lambda: portfolio.analyze(new_rate, tax_rate, horizon, as_of=as_of))
+
+    sample = min(scalar_sample, rows)
+    if sample:
+        inputs = [portfolio.bond_input(i) for i in range(sample)]
+        record('compute_scalar', sample, lambda: [
+            analyzer.calculate_rotation_metrics(
+                bond['principal'], bond['issue_date'], bond['fixed_rate_pct'], bond['current_value'],
+                bond['composite_rate_pct'], new_rate, tax_rate, horizon, as_of=as_of
+            ) for bond in inputs
+        ])
+
+    record('summarize', rows, portfolio.summary)
+
+    def render():
+        table = portfolio.results_table()
+        np.argsort(table['net_gain'], kind='stable')
+        analyzer.write_rotation_results([('results', portfolio)], _NullWriter(), _NullWriter())
+    record('render', rows, render)
+    stages.update(run_cold_start(csv_filename))
+    return stages
+
+
+def compare_to_baseline(stages, baseline, tolerance):
+    """Prints per-stage changes against a baseline. Returns the names of regressed stages."""
+    regressed = []
+    print(f"\n{'Stage':<16}{'Baseline s':>12}{'Now s':>12}{'Change':>10}")
+    for name, result in stages.items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            print(f"{name:<16}{'-':>12}{result['seconds']:>12.4f}{'new':>10}")
+            continue
+        change = result['seconds'] / before['seconds'] - 1.0 if before['seconds'] else 0.0
+        flag = ''
+        if change > tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<16}{before['seconds']:>12.4f}{result['seconds']:>12.4f}{change:>+10.1%}{flag}")
+    if baseline.get('rows') != stages['compute']['rows']:
+        print("Note: the baseline was recorded with a different number of bonds.")
+    return regressed
+
+
+def print_stages(stages):
+    """Prints the stage timing table."""
+    print(f"{'Stage':<16}{'Rows':>12}{'Seconds':>12}{'Rows/sec':>14}{'Peak MB':>10}")
+    for name, result in stages.items():
+        rate = f"{result['rows_per_sec']:,.0f}" if result['rows_per_sec'] else '-'
+        peak = f"{result['peak_bytes'] / 1e6:,.1f}" if result['peak_bytes'] is not None else '-'
+        print(f"{name:<16}{result['rows']:>12,}{result['seconds']:>12.4f}{rate:>14}{peak:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the I bond analyzer stage by stage.")
+    parser.add_argument('--csv', default=None, help="Benchmark this CSV instead of generating one.")
+    parser.add_argument('--rows', type=int, default=100000, help="Bonds to generate (ignored with --csv).")
+    parser.add_argument('--seed', type=int, default=0, help="Generator seed.")
+    parser.add_argument('--malformed', type=float, default=0.001, help="Share of malformed generated rows.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage; the best is reported.")
+    parser.add_argument('--scalar-sample', type=int, default=DEFAULT_SCALAR_SAMPLE,
+                        help="Bonds timed through the per-bond calculate_rotation_metrics.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak memory runs.")
+    parser.add_argument('--save-baseline', default=None, help="Write the results to this JSON file.")
+    parser.add_argument('--compare', default=None, help="Compare against a baseline JSON file.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown fraction counted as a regression (default 0.2 = 20%%).")
+    args = parser.parse_args(argv)
+    if args.rows <= 0 or args.repeat <= 0:
+        parser.error("Rows and repeat must be positive integers.")
+
+    analyzer = load_analyzer()
+    as_of = date.today()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_filename = args.csv
+        if csv_filename is None:
+            csv_filename = os.path.join(temp_dir, 'bonds.csv')
+            started = time.perf_counter()
+            size = write_synthetic_csv(csv_filename, args.rows, seed=args.seed, malformed=args.malformed, as_of=as_of)
+            print(f"Generated {args.rows:,} bonds ({size / 1e6:,.1f} MB) in {time.perf_counter() - started:.1f}s\n")
+        stages = run_benchmarks(analyzer, csv_filename, repeat=args.repeat, scalar_sample=args.scalar_sample,
+                                measure_memory=not args.no_memory, as_of=as_of)
+
+    print_stages(stages)
+    results = {
+        'rows': stages['compute']['rows'],
+        'source': args.csv or f"synthetic rows={args.rows} seed={args.seed} malformed={args.malformed}",
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'stages': stages,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare_to_baseline(stages, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""I bond rotation analysis.
+
+The per-bond core (ibond.core) needs neither NumPy nor Tk and is imported eagerly. The
+vectorized engines, the process-pool modes, the service and the GUI live in submodules that
+load on first use, so `import ibond` stays cheap:
+
+    import ibond
+    metrics = ibond.calculate_rotation_metrics(1000.0, '2020-01-01', 0.0, 1300.0, 3.1, 1.3, 22.0, 10)
+    portfolio, warnings = ibond.load_portfolio('my_i_bonds.csv') # imports NumPy here
+"""
+import importlib
+
+from .core import (
+    RESULT_CSV_COLUMNS, RotationSummary, calculate_rotation_metrics, expand_csv_sources, is_multi_file_source,
+    missing_csv_columns, parse_bond_rows, parse_issue_date, read_csv_rows, solve_break_even, whole_months_between,
+    write_scalar_rotation_results
+)
+from .defaults import (
+    CSV_COL_COMPOSITE_RATE, CSV_COL_CONFIRMATION, CSV_COL_CURRENT_VALUE, CSV_COL_FIXED_RATE, CSV_COL_ISSUE_DATE,
+    CSV_COL_PRINCIPAL, DEFAULT_FEDERAL_TAX_RATE_PCT, DEFAULT_INVESTMENT_HORIZON_YEARS, DEFAULT_NEW_BOND_FIXED_RATE_PCT
+)
+from .instrumentation import INSTRUMENTATION, Instrumentation
+
+_LAZY_ATTRIBUTES = { # Public name -> submodule that defines it (imported on first access)
+    'calculate_rotation_metrics_batch': 'batch',
+    'solve_break_even_batch': 'batch',
+    'summarize_batch': 'batch',
+    'months_held_batch': 'batch',
+    'pow_table': 'batch',
+    'holding_stage_batch': 'batch',
+    'proceeds_stage_batch': 'batch',
+    'rotation_stage_batch': 'batch',
+    'horizon_curve_batch': 'batch',
+    'horizon_curve_rows': 'batch',
+    'summarize_horizon_curve': 'batch',
+    'write_horizon_curve': 'batch',
+    'BondPortfolio': 'portfolio',
+    'BondPortfolioBuilder': 'portfolio',
+    'load_portfolio': 'pipeline',
+    'compute_rotation_chunks': 'pipeline',
+    'portfolio_rotation_chunks': 'pipeline',
+    'write_rotation_results': 'pipeline',
+    'export_rotation_results': 'export',
+    'export_portfolio': 'export',
+    'MultiFileAnalysis': 'ingest',
+    'file_signature': 'ingest',
+    'load_multi_file_portfolio': 'ingest',
+    'TreasuryRateTable': 'rates',
+    'RateTableCheck': 'rates',
+    'load_rate_table': 'rates',
+    'RotationResultCache': 'cache',
+    'open_portfolio_snapshot': 'snapshot',
+    'write_portfolio_snapshot': 'snapshot',
+    'run_parameter_sweep': 'sweep',
+    'write_sweep_grid': 'sweep',
+    'simulate_rotation_batch': 'montecarlo',
+    'optimize_rotation_plan': 'optimizer',
+    'backtest_rotation_batch': 'backtest',
+    'backtest_dates': 'backtest',
+    'redemption_timing_batch': 'timing',
+    'RotationService': 'service',
+    'RotationServiceClient': 'service',
+    'main_cli': 'cli',
+    'run_gui': 'gui',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module 'ibond' has no attribute '{name}'")
+    return getattr(importlib.import_module(f'.{module}', __name__), name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
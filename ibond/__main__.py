@@ -0,0 +1,16 @@
+"""`python -m ibond [CSV options]`: the headless CLI when arguments are given, otherwise the GUI."""
+import sys
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from .cli import main_cli
+        return main_cli(argv)
+    from .gui import run_gui # Tk is only imported when the window is actually opened
+    run_gui()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
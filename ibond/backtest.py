@@ -0,0 +1,244 @@
+"""As-of-date backtest: what the analysis would have recommended on each of a series of dates (bonds x dates)."""
+import csv
+
+import numpy as np
+
+from .batch import pow_table
+from .rates import I_BOND_MATURITY_MONTHS, I_BOND_VALUE_BASE, load_rate_table
+
+
+# --- As-Of-Date Backtest (bonds x dates evaluated in bounded blocks) ---
+BACKTEST_MAX_CELLS = 1000000 # Bonds x dates evaluated per block (bounds memory)
+BACKTEST_LOCKOUT_MONTHS = 12 # Bonds cannot be redeemed before 12 months
+BACKTEST_PENALTY_MONTHS = 60 # Redeeming before 5 years costs three months of interest
+BACKTEST_CSV_COLUMNS = [
+    'As Of', 'New Bond Fixed Rate', 'Bonds Held', 'Under 12 Months', 'Under 5 Years (Penalty)',
+    'Not Covered by Rate Table', 'Recommended Count', 'Newly Recommended', 'No Longer Recommended',
+    'Portfolio Value', 'Portfolio Net Gain',
+]
+
+
+def backtest_dates(start, end, frequency='month-end'):
+    """The as-of dates from start to end (inclusive) as datetime64[D]: every 'day', 'week' (from start),
+    'month-start' or 'month-end'. Raises ValueError for an unknown frequency or an empty range."""
+    start = np.datetime64(start, 'D')
+    end = np.datetime64(end, 'D')
+    if frequency == 'day':
+        dates = np.arange(start, end + 1, dtype='datetime64[D]')
+    elif frequency == 'week':
+        dates = np.arange(start, end + 1, 7, dtype='datetime64[D]')
+    elif frequency in ('month-start', 'month-end'):
+        months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1, dtype='datetime64[M]')
+        dates = (months + 1).astype('datetime64[D]') - 1 if frequency == 'month-end' else months.astype('datetime64[D]')
+        dates = dates[(dates >= start) & (dates <= end)]
+    else:
+        raise ValueError(f"Unknown backtest frequency '{frequency}'.")
+    if not len(dates):
+        raise ValueError(f"No {frequency} dates between {start} and {end}.")
+    return dates
+
+
+def _table_value_grid(rate_table, offsets):
+    """Value per $25 and composite rate (%) for each distinct issue-month offset at 0 .. 360 months held.
+
+    Returns (value, composite, offset_index), the grids flattened so that row i's entry for m months is
+    at offset_index[i] * 361 + m; rows outside the table get offset_index -1.
+    """
+    covered = (offsets >= 0) & (offsets < len(rate_table.fixed_rate_pct))
+    distinct, inverse = np.unique(offsets[covered], return_inverse=True)
+    offset_index = np.full(offsets.shape, -1, dtype=np.int64)
+    offset_index[covered] = inverse
+    steps = I_BOND_MATURITY_MONTHS + 1
+    value, composite = rate_table.value_per_base(np.repeat(distinct, steps), np.tile(np.arange(steps), len(distinct)))
+    return value, composite, offset_index
+
+
+def backtest_rotation_batch(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    dates,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    new_bond_fixed_rate_pct=None,
+    rate_table=None,
+    use_csv_values=False,
+    max_cells=BACKTEST_MAX_CELLS
+):
+    """Runs the rotation analysis as of every date in dates, vectorized over bonds x dates.
+
+    At each date only bonds issued by then are held; those under 12 months old cannot be redeemed, and
+    those under 5 years pay the three-month penalty. Current value and composite rate are recomputed
+    for each date from rate_table (as RateTableCheck derives them; bonds it does not cover are counted
+    and left out), or with use_csv_values the CSV's values are used at every date. The new bond's
+    fixed rate is new_bond_fixed_rate_pct, or when None the rate Treasury offered in each date's month.
+    rate_table defaults to the bundled table.
+    Each bond and date gives the same net gain as analyze(as_of=date) with those values, without the
+    break-even search.
+
+    Returns a dictionary of per-date arrays ('as_of', 'new_bond_fixed_rate_pct', 'held_count',
+    'locked_count', 'penalty_count', 'not_covered_count', 'recommended_count', 'newly_recommended',
+    'no_longer_recommended', 'portfolio_value', 'portfolio_net_gain') and per-bond arrays
+    ('recommended_dates', 'first_recommended'). Newly/no longer recommended compare with the previous
+    date (everything recommended on the first date is new).
+    """
+    if not isinstance(investment_horizon_years, int) or investment_horizon_years <= 0:
+        raise ValueError("Investment horizon must be a positive integer.")
+    dates = np.sort(np.asarray(dates, dtype='datetime64[D]'))
+    if not dates.size:
+        raise ValueError("No as-of dates to backtest.")
+    if rate_table is None and (new_bond_fixed_rate_pct is None or not use_csv_values):
+        rate_table = load_rate_table()
+    issue_dates = np.asarray(old_bond_issue_date, dtype='datetime64[D]')
+    principal = np.asarray(old_bond_principal, dtype=np.float64)
+    old_fixed_rate = np.asarray(old_bond_fixed_rate_pct, dtype=np.float64) / 100.0
+    count = principal.shape[0]
+    date_count = dates.shape[0]
+
+    # --- Per-Date Terms ---
+    date_months = dates.astype('datetime64[M]')
+    date_days = (dates - date_months.astype('datetime64[D]')).astype(np.int64) + 1
+    date_month_days = ((date_months + 1).astype('datetime64[D]') - date_months.astype('datetime64[D]')).astype(np.int64)
+    date_months = date_months.astype(np.int64)
+    if new_bond_fixed_rate_pct is None:
+        offsets = date_months - rate_table.first_month
+        if date_count and (offsets.min() < 0 or offsets.max() >= len(rate_table.fixed_rate_pct)):
+            raise ValueError(f"The rate table has no new bond fixed rate for every date (it covers issue months "
+                             f"through {rate_table.last_covered_month}).")
+        new_rates_pct = rate_table.fixed_rate_pct[offsets]
+    else:
+        new_rates_pct = np.full(date_count, float(new_bond_fixed_rate_pct))
+    unique_new_rates, new_rate_index = np.unique(new_rates_pct / 100.0, return_inverse=True)
+    pow_new = pow_table(1 + unique_new_rates, [investment_horizon_years])[:, 0][new_rate_index]
+
+    # --- Per-Bond Terms (pow once per distinct fixed rate, values once per issue month and age) ---
+    valid = ~np.isnat(issue_dates)
+    rows = np.flatnonzero(valid)
+    unique_old_rates, old_rate_index = np.unique(old_fixed_rate[rows], return_inverse=True)
+    pow_old = pow_table(1 + unique_old_rates, [investment_horizon_years])[:, 0][old_rate_index]
+    issue_month_start = issue_dates[rows].astype('datetime64[M]')
+    issue_months = issue_month_start.astype(np.int64)
+    issue_days = (issue_dates[rows] - issue_month_start.astype('datetime64[D]')).astype(np.int64) + 1
+    if use_csv_values:
+        csv_value = np.asarray(old_bond_current_value, dtype=np.float64)[rows]
+        csv_composite = np.asarray(old_bond_composite_rate_pct, dtype=np.float64)[rows] / 100.0
+    else:
+        value_grid, composite_grid, offset_index = _table_value_grid(rate_table, issue_months - rate_table.first_month)
+        units = principal[rows] / I_BOND_VALUE_BASE
+        covered = offset_index >= 0
+        grid_base = np.maximum(offset_index, 0) * (I_BOND_MATURITY_MONTHS + 1)
+    principal = principal[rows]
+    tax_fraction = federal_tax_rate_pct / 100.0
+
+    result = {key: np.zeros(date_count, dtype=np.int64) for key in (
+        'held_count', 'locked_count', 'penalty_count', 'not_covered_count', 'recommended_count',
+        'newly_recommended', 'no_longer_recommended'
+    )}
+    portfolio_value = np.zeros(date_count, dtype=np.float64)
+    portfolio_net_gain = np.zeros(date_count, dtype=np.float64)
+    recommended_dates = np.zeros(count, dtype=np.int64)
+    first_recommended = np.full(count, np.datetime64('NaT'), dtype='datetime64[D]')
+    previous = np.zeros(rows.size, dtype=bool) # Recommendations at the previous date
+
+    # A bond's result only changes when its whole months held or the new rate does. Bonds issued on
+    # the same day of the month reach a new month on the same dates, so each such group is evaluated
+    # once per run of dates sharing both, not once per date.
+    for issue_day in np.unique(issue_days):
+        group = np.flatnonzero(issue_days == issue_day)
+        elapsed = date_months - (date_days < np.minimum(issue_day, date_month_days)) # Months held + issue month
+        change = np.ones(date_count, dtype=bool)
+        change[1:] = (elapsed[1:] != elapsed[:-1]) | (new_rate_index[1:] != new_rate_index[:-1])
+        run_start = np.flatnonzero(change)
+        run_length = np.diff(np.append(run_start, date_count))
+        run_of_date = np.cumsum(change) - 1
+        run_count = run_start.size
+        run_elapsed = elapsed[run_start]
+        run_pow_new = pow_new[run_start]
+        run_totals = {key: np.zeros(run_count, dtype=np.int64) for key in result}
+        run_value = np.zeros(run_count, dtype=np.float64)
+        run_gain = np.zeros(run_count, dtype=np.float64)
+
+        run_block = int(np.clip(max_cells // group.size, 1, run_count))
+        row_block = max(1, max_cells // run_block)
+        for j0 in range(0, run_count, run_block):
+            j = slice(j0, min(j0 + run_block, run_count))
+            for g0 in range(0, group.size, row_block):
+                b = group[g0:g0 + row_block]
+                months = run_elapsed[None, j] - issue_months[b, None] # Negative before the issue date
+                held = months >= 0
+                redeemable = months >= BACKTEST_LOCKOUT_MONTHS
+                if use_csv_values:
+                    value = np.broadcast_to(csv_value[b, None], months.shape)
+                    composite = csv_composite[b, None]
+                    uncovered = np.zeros(months.shape, dtype=bool)
+                else:
+                    cell = grid_base[b, None] + np.clip(months, 0, I_BOND_MATURITY_MONTHS)
+                    value = np.round(value_grid[cell] * units[b, None], 2)
+                    composite = composite_grid[cell] / 100.0
+                    uncovered = redeemable & ~covered[b, None]
+                    value[~covered[b]] = np.nan
+
+                # Same operations, in the same order, as the holding, proceeds and rotation stages
+                in_penalty = redeemable & (months < BACKTEST_PENALTY_MONTHS)
+                penalty = np.where(in_penalty, value * (composite / 4.0), 0.0)
+                immediate_cost = penalty + np.maximum(0.0, value - principal[b, None]) * tax_fraction
+                net_proceeds = value - immediate_cost
+                with np.errstate(invalid='ignore', over='ignore'):
+                    benefit = net_proceeds * run_pow_new[None, j] - net_proceeds * pow_old[b, None]
+                net_gain = benefit - immediate_cost
+                finite_pow = np.isfinite(run_pow_new[None, j]) & np.isfinite(pow_old[b, None])
+                recommended = redeemable & (net_proceeds > 0) & finite_pow & (net_gain > 0)
+
+                before = np.concatenate((previous[b, None], recommended[:, :-1]), axis=1)
+                previous[b] = recommended[:, -1]
+                run_totals['held_count'][j] += held.sum(axis=0)
+                run_totals['locked_count'][j] += (held & ~redeemable).sum(axis=0)
+                run_totals['penalty_count'][j] += in_penalty.sum(axis=0)
+                run_totals['not_covered_count'][j] += uncovered.sum(axis=0)
+                run_totals['recommended_count'][j] += recommended.sum(axis=0)
+                run_totals['newly_recommended'][j] += (recommended & ~before).sum(axis=0)
+                run_totals['no_longer_recommended'][j] += (before & ~recommended).sum(axis=0)
+                run_value[j] += np.where(held & ~np.isnan(value), value, 0.0).sum(axis=0)
+                run_gain[j] += np.where(recommended, net_gain, 0.0).sum(axis=0)
+
+                recommended_dates[rows[b]] += recommended.astype(np.int64) @ run_length[j]
+                first = np.flatnonzero(recommended.any(axis=1) & np.isnat(first_recommended[rows[b]]))
+                if first.size:
+                    first_recommended[rows[b][first]] = dates[run_start[j][np.argmax(recommended[first], axis=1)]]
+
+        # Every date of a run shares its totals; changes happen on a run's first date
+        for key, totals in run_totals.items():
+            if key in ('newly_recommended', 'no_longer_recommended'):
+                result[key][run_start] += totals
+            else:
+                result[key] += totals[run_of_date]
+        portfolio_value += run_value[run_of_date]
+        portfolio_net_gain += run_gain[run_of_date]
+
+    result.update({
+        'as_of': dates,
+        'new_bond_fixed_rate_pct': new_rates_pct,
+        'portfolio_value': portfolio_value,
+        'portfolio_net_gain': portfolio_net_gain,
+        'recommended_dates': recommended_dates,
+        'first_recommended': first_recommended,
+    })
+    return result
+
+
+def write_backtest_results(backtest, output_file):
+    """Writes one BACKTEST_CSV_COLUMNS row per as-of date."""
+    writer = csv.writer(output_file)
+    writer.writerow(BACKTEST_CSV_COLUMNS)
+    writer.writerows(zip(
+        np.datetime_as_string(backtest['as_of'], unit='D').tolist(),
+        backtest['new_bond_fixed_rate_pct'].tolist(),
+        *(backtest[key].tolist() for key in (
+            'held_count', 'locked_count', 'penalty_count', 'not_covered_count', 'recommended_count',
+            'newly_recommended', 'no_longer_recommended'
+        )),
+        np.round(backtest['portfolio_value'], 2).tolist(),
+        backtest['portfolio_net_gain'].tolist()
+    ))
@@ -0,0 +1,490 @@
+"""Vectorized batch engine: calculate_rotation_metrics over whole NumPy columns, with result codes."""
+import csv
+import math
+from datetime import date
+
+import numpy as np
+
+from .core import days_in_month
+from .instrumentation import INSTRUMENTATION
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal() # datetime64[D] day 0
+
+
+# --- Batch Result Codes (one small integer per bond instead of message strings) ---
+BATCH_OK = 0
+BATCH_ERR_INVALID_DATE = 1
+BATCH_ERR_UNDER_12_MONTHS = 2
+BATCH_ERR_NONPOSITIVE_PROCEEDS = 3
+BATCH_ERR_INVALID_HORIZON = 4
+BATCH_ERR_OVERFLOW = 5
+BATCH_ERR_MATH_DOMAIN = 6
+BATCH_ERROR_MESSAGES = {
+    BATCH_OK: None,
+    BATCH_ERR_INVALID_DATE: "Could not calculate age from issue date.",
+    BATCH_ERR_UNDER_12_MONTHS: "Cannot be redeemed (held less than 12 months).",
+    BATCH_ERR_NONPOSITIVE_PROCEEDS: "Calculated Net Proceeds are zero or negative after costs. Rotation not possible/sensible.",
+    BATCH_ERR_INVALID_HORIZON: "Math domain error during compounding: Investment horizon must be a positive integer. (check rates/horizon).",
+    BATCH_ERR_OVERFLOW: "Calculation resulted in overflow (likely very large horizon or rates).",
+    BATCH_ERR_MATH_DOMAIN: "Math domain error during compounding (check rates/horizon).",
+}
+BATCH_ERROR_CATEGORIES = { # Instrumentation error category per code
+    BATCH_ERR_INVALID_DATE: 'invalid_date',
+    BATCH_ERR_UNDER_12_MONTHS: 'under_12_months',
+    BATCH_ERR_NONPOSITIVE_PROCEEDS: 'nonpositive_proceeds',
+    BATCH_ERR_INVALID_HORIZON: 'invalid_horizon',
+    BATCH_ERR_OVERFLOW: 'overflow',
+    BATCH_ERR_MATH_DOMAIN: 'math_domain',
+}
+BATCH_WARN_NONE = 0
+BATCH_WARN_VALUE_BELOW_PRINCIPAL = 1
+BATCH_NOTE_NONE = 0
+BATCH_NOTE_RATE_NOT_HIGHER = 1
+
+
+def pow_table(bases, exponents):
+    """math.pow for every (base, exponent) pair; inf marks overflow, nan a domain error."""
+    table = np.empty((len(bases), len(exponents)), dtype=np.float64)
+    for i, base in enumerate(bases):
+        for j, exponent in enumerate(exponents):
+            try:
+                table[i, j] = math.pow(base, exponent)
+            except OverflowError:
+                table[i, j] = np.inf
+            except ValueError:
+                table[i, j] = np.nan
+    return table
+
+
+def _horizon_exponents(max_years, periods_per_year):
+    """Compounding exponents (years) of the steps 1 .. max_years * periods_per_year."""
+    steps = int(max_years * periods_per_year)
+    if periods_per_year == 1:
+        return np.arange(1, steps + 1, dtype=np.float64)
+    return np.array([step / periods_per_year for step in range(1, steps + 1)], dtype=np.float64)
+
+
+def _rate_power_table(old_fixed_rate, new_fixed_rate, exponents):
+    """math.pow of 1 + rate at every exponent, once per distinct old rate. Returns (pow_new, pow_old, rate_index)."""
+    unique_old_rates, rate_index = np.unique(old_fixed_rate, return_inverse=True)
+    powers = pow_table(np.concatenate(([1 + new_fixed_rate], 1 + unique_old_rates)), exponents.tolist())
+    return powers[0], powers[1:], rate_index.reshape(-1)
+
+
+def solve_break_even_batch(net_proceeds, immediate_cost, old_fixed_rate, new_fixed_rate, max_years=100, periods_per_year=1,
+                           power_table=None):
+    """Vectorized solve_break_even: old_fixed_rate, net_proceeds and immediate_cost are arrays, new_fixed_rate a scalar.
+
+    Powers come from a table built once per distinct fixed rate, and every bond is bisected in
+    lockstep, so the cost is O(log N) array passes instead of one pass per year. power_table, a
+    (pow_new, pow_old, rate_index) for exactly these steps and rows (e.g. from a horizon curve),
+    is used instead of building one.
+    """
+    net_proceeds = np.asarray(net_proceeds, dtype=np.float64)
+    immediate_cost = np.asarray(immediate_cost, dtype=np.float64)
+    old_fixed_rate = np.asarray(old_fixed_rate, dtype=np.float64)
+    steps = int(max_years * periods_per_year)
+    if power_table is None:
+        power_table = _rate_power_table(old_fixed_rate, new_fixed_rate, _horizon_exponents(max_years, periods_per_year))
+    pow_new, pow_old, rate_index = power_table
+
+    def stops_at(rows, step):
+        """Returns (stop, failed) arrays for the given rows at the given 1-based steps."""
+        proceeds = net_proceeds[rows]
+        fv_new = pow_new[step - 1]
+        fv_old = pow_old[rate_index[rows], step - 1]
+        failed = ~np.isfinite(fv_new) | ~np.isfinite(fv_old)
+        with np.errstate(invalid='ignore', over='ignore'):
+            reached = proceeds * fv_new - proceeds * fv_old >= immediate_cost[rows]
+        return failed | reached, failed
+
+    first_step = np.full(net_proceeds.shape[0], steps + 1, dtype=np.int64)
+    if new_fixed_rate >= 0:
+        bisect = np.flatnonzero(old_fixed_rate > -1)
+    else:
+        bisect = np.empty(0, dtype=np.int64)
+    low = np.ones(bisect.size, dtype=np.int64)
+    high = np.full(bisect.size, steps + 1, dtype=np.int64)
+    while True:
+        open_rows = np.flatnonzero(low < high)
+        if not open_rows.size:
+            break
+        mid = (low[open_rows] + high[open_rows]) // 2
+        stop, _ = stops_at(bisect[open_rows], mid)
+        high[open_rows[stop]] = mid[stop]
+        low[open_rows[~stop]] = mid[~stop] + 1
+    first_step[bisect] = low
+
+    unbisected = np.ones(net_proceeds.shape[0], dtype=bool)
+    unbisected[bisect] = False
+    scan = np.flatnonzero(unbisected)
+    for step in range(1, steps + 1):
+        if not scan.size:
+            break
+        stop, _ = stops_at(scan, np.full(scan.size, step))
+        first_step[scan[stop]] = step
+        scan = scan[~stop]
+
+    reached = first_step <= steps
+    _, failed = stops_at(np.flatnonzero(reached), first_step[reached])
+    if periods_per_year == 1:
+        break_even = np.full(first_step.shape[0], -1, dtype=np.int64)
+        break_even[reached] = first_step[reached]
+    else:
+        break_even = np.full(first_step.shape[0], -1.0)
+        break_even[reached] = first_step[reached] / periods_per_year
+    break_even[np.flatnonzero(reached)[failed]] = -2
+    return break_even
+
+
+def months_held_batch(issue_dates, today):
+    """Signed whole months from issue_dates to today; whole_months_between over a datetime64[D] column."""
+    issue_month_start = issue_dates.astype('datetime64[M]')
+    issue_months = issue_month_start.astype(np.int64)
+    issue_days = (issue_dates - issue_month_start.astype('datetime64[D]')).astype(np.int64) + 1
+    today_months = (today.year - 1970) * 12 + (today.month - 1)
+    days_in_today_month = days_in_month(today.year, today.month)
+
+    # Same clipping rule as whole_months_between
+    months = today_months - issue_months
+    clipped_days = np.minimum(issue_days, days_in_today_month)
+    future = issue_dates > np.datetime64(today, 'D')
+    months -= (~future & (today.day < clipped_days)).astype(np.int64)
+    months += (future & (today.day > clipped_days)).astype(np.int64)
+    return months
+
+
+# --- Analysis Stages (each depends only on the inputs in its signature, so callers can cache them) ---
+def holding_stage_batch(old_bond_principal, old_bond_issue_date, old_bond_current_value, old_bond_composite_rate_pct,
+                        as_of=None):
+    """Stage 1: bond age, early redemption penalty and accrued interest. Depends on the bond inputs and as_of only."""
+    principal = np.asarray(old_bond_principal, dtype=np.float64)
+    issue_dates = np.asarray(old_bond_issue_date, dtype='datetime64[D]')
+    current_value = np.asarray(old_bond_current_value, dtype=np.float64)
+    old_composite_rate = np.asarray(old_bond_composite_rate_pct, dtype=np.float64) / 100.0
+    count = principal.shape[0]
+
+    error_code = np.zeros(count, dtype=np.int8)
+    warning_code = np.where(current_value < principal, BATCH_WARN_VALUE_BELOW_PRINCIPAL, BATCH_WARN_NONE).astype(np.int8)
+
+    # --- Calculate Bond Age ---
+    valid_date = ~np.isnat(issue_dates)
+    total_months_held = np.zeros(count, dtype=np.int64)
+    total_months_held[valid_date] = months_held_batch(issue_dates[valid_date], as_of or date.today())
+    error_code[~valid_date] = BATCH_ERR_INVALID_DATE
+    under_12 = valid_date & (total_months_held < 12)
+    error_code[under_12] = BATCH_ERR_UNDER_12_MONTHS
+    redeemable = valid_date & ~under_12
+
+    # --- Penalty and Accrued Interest ---
+    penalty_applies = redeemable & (total_months_held < 60)
+    penalty = np.where(penalty_applies, current_value * (old_composite_rate / 4.0), 0.0)
+    accrued_interest = np.maximum(0.0, current_value - principal)
+    accrued_interest[~valid_date] = np.nan
+    return {
+        'total_months_held': total_months_held,
+        'penalty_applies': penalty_applies,
+        'penalty': penalty,
+        'accrued_interest': accrued_interest,
+        'current_value': current_value,
+        'valid_date': valid_date,
+        'redeemable': redeemable,
+        'error_code': error_code,
+        'warning_code': warning_code,
+    }
+
+
+def proceeds_stage_batch(holding, federal_tax_rate_pct):
+    """Stage 2: taxes, immediate cost and net proceeds from a holding_stage_batch result and the federal tax rate."""
+    valid_date = holding['valid_date']
+    taxes_owed = holding['accrued_interest'] * (federal_tax_rate_pct / 100.0)
+    immediate_cost = holding['penalty'] + taxes_owed
+    net_proceeds = holding['current_value'] - immediate_cost
+
+    error_code = holding['error_code'].copy()
+    nonpositive = holding['redeemable'] & (net_proceeds <= 0)
+    error_code[nonpositive] = BATCH_ERR_NONPOSITIVE_PROCEEDS
+    for column in (taxes_owed, immediate_cost, net_proceeds):
+        column[~valid_date] = np.nan
+    return {
+        'taxes_owed': taxes_owed,
+        'immediate_cost': immediate_cost,
+        'net_proceeds': net_proceeds,
+        'nonpositive': nonpositive,
+        'active': holding['redeemable'] & ~nonpositive,
+        'error_code': error_code,
+    }
+
+
+def horizon_curve_batch(proceeds, old_bond_fixed_rate_pct, new_bond_fixed_rate_pct, max_years=100, periods_per_year=1):
+    """Net gain versus horizon for every bond, at each step 1 .. max_years * periods_per_year.
+
+    Built from a proceeds_stage_batch result: the powers of 1 + rate are evaluated once per
+    distinct fixed rate and step (the same math.pow values the single-horizon path uses), and
+    rows are expanded on demand by horizon_curve_rows, so memory grows with rates x steps rather
+    than bonds x steps. rotation_stage_batch(curve=...) reads the chosen horizon and break-even
+    from it. Returns a dictionary with 'horizon_years' (the step exponents), the power table
+    ('pow_new', 'pow_old', per-bond 'rate_index') and the stage's proceeds columns.
+    """
+    old_fixed_rate = np.asarray(old_bond_fixed_rate_pct, dtype=np.float64) / 100.0
+    horizon_years = _horizon_exponents(max_years, periods_per_year)
+    pow_new, pow_old, rate_index = _rate_power_table(old_fixed_rate, new_bond_fixed_rate_pct / 100.0, horizon_years)
+    return {
+        'horizon_years': horizon_years,
+        'periods_per_year': periods_per_year,
+        'new_bond_fixed_rate_pct': new_bond_fixed_rate_pct,
+        'pow_new': pow_new,
+        'pow_old': pow_old,
+        'rate_index': rate_index,
+        'net_proceeds': proceeds['net_proceeds'],
+        'immediate_cost': proceeds['immediate_cost'],
+        'active': proceeds['active'],
+        'nonpositive': proceeds['nonpositive'],
+    }
+
+
+def _curve_columns(curve, exponents):
+    """Positions of exponents among the curve's steps, or None when the curve does not cover all of them."""
+    if curve is None:
+        return None
+    horizon_years = curve['horizon_years']
+    positions = np.minimum(np.searchsorted(horizon_years, exponents), len(horizon_years) - 1)
+    if not len(horizon_years) or not np.array_equal(horizon_years[positions], exponents):
+        return None
+    return positions
+
+
+def horizon_curve_rows(curve, rows):
+    """Net gain at every curve step for the given rows, as a rows x steps array.
+
+    Matches net_gain_or_loss at each horizon: bonds whose proceeds are not positive keep their
+    immediate loss at every step, and bonds that cannot be rotated (or overflow) are NaN.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    gains = np.full((rows.size, len(curve['horizon_years'])), np.nan)
+    active = curve['active'][rows]
+    nonpositive = curve['nonpositive'][rows]
+    gains[nonpositive] = -curve['immediate_cost'][rows[nonpositive], None]
+    if active.any():
+        active_rows = rows[active]
+        proceeds = curve['net_proceeds'][active_rows, None]
+        with np.errstate(invalid='ignore', over='ignore'):
+            benefit = proceeds * curve['pow_new'] - proceeds * curve['pow_old'][curve['rate_index'][active_rows]]
+            benefit[~np.isfinite(benefit)] = np.nan
+            gains[active] = benefit - curve['immediate_cost'][active_rows, None]
+    return gains
+
+
+def summarize_horizon_curve(curve, chunk_rows=50000):
+    """Portfolio totals at every curve step: {'horizon_years', 'recommended_count', 'portfolio_net_gain'}.
+
+    A bond counts at a step when its net gain there is positive (as summarize_batch does). Rows
+    are expanded chunk_rows at a time.
+    """
+    steps = len(curve['horizon_years'])
+    recommended_count = np.zeros(steps, dtype=np.int64)
+    portfolio_net_gain = np.zeros(steps, dtype=np.float64)
+    candidates = np.flatnonzero(curve['active'])
+    for start in range(0, candidates.size, chunk_rows):
+        gains = horizon_curve_rows(curve, candidates[start:start + chunk_rows])
+        positive = gains > 0
+        recommended_count += positive.sum(axis=0)
+        portfolio_net_gain += np.where(positive, gains, 0.0).sum(axis=0)
+    return {
+        'horizon_years': curve['horizon_years'],
+        'recommended_count': recommended_count,
+        'portfolio_net_gain': portfolio_net_gain,
+    }
+
+
+def write_horizon_curve(curve_summary, output_file):
+    """Writes one CSV row per horizon of a summarize_horizon_curve result."""
+    writer = csv.writer(output_file)
+    writer.writerow(['Investment Horizon', 'Recommended Count', 'Portfolio Net Gain'])
+    writer.writerows(zip(
+        curve_summary['horizon_years'].tolist(), curve_summary['recommended_count'].tolist(),
+        curve_summary['portfolio_net_gain'].tolist()
+    ))
+
+
+def rotation_stage_batch(
+    holding,
+    proceeds,
+    old_bond_fixed_rate_pct,
+    new_bond_fixed_rate_pct,
+    investment_horizon_years,
+    break_even_max_years=100,
+    break_even_periods_per_year=1,
+    include_break_even=True,
+    curve=None
+):
+    """Stage 3: compounded benefit, net gain and break-even from the two earlier stages and the new bond's terms.
+
+    Returns the calculate_rotation_metrics_batch dictionary. The stage inputs are not modified, and
+    their arrays are shared with the result. With a horizon_curve_batch curve built from the same
+    proceeds and new rate, the chosen horizon and the break-even search are read from its power
+    table (steps it does not cover are computed as usual).
+    """
+    old_fixed_rate_pct = np.asarray(old_bond_fixed_rate_pct, dtype=np.float64)
+    old_fixed_rate = old_fixed_rate_pct / 100.0
+    new_fixed_rate = new_bond_fixed_rate_pct / 100.0
+    valid_date = holding['valid_date']
+    nonpositive = proceeds['nonpositive']
+    immediate_cost = proceeds['immediate_cost']
+    net_proceeds = proceeds['net_proceeds']
+    count = old_fixed_rate.shape[0]
+
+    error_code = proceeds['error_code'].copy()
+    note_code = np.where(new_bond_fixed_rate_pct <= old_fixed_rate_pct, BATCH_NOTE_RATE_NOT_HIGHER, BATCH_NOTE_NONE).astype(np.int8)
+    active = proceeds['active'].copy()
+    compounded_fixed_rate_benefit = np.zeros(count, dtype=np.float64)
+    net_gain_or_loss = np.zeros(count, dtype=np.float64)
+    net_gain_or_loss[nonpositive] = -immediate_cost[nonpositive]
+    break_even_years = np.full(count, -1, dtype=np.int64 if break_even_periods_per_year == 1 else np.float64)
+    compounded_fixed_rate_benefit[~valid_date] = np.nan
+    net_gain_or_loss[~valid_date] = np.nan
+
+    if not isinstance(investment_horizon_years, int) or investment_horizon_years <= 0:
+        error_code[active] = BATCH_ERR_INVALID_HORIZON
+        compounded_fixed_rate_benefit[active] = np.nan
+        net_gain_or_loss[active] = np.nan
+        active[:] = False
+
+    # --- Compounded Benefit (pow evaluated once per distinct fixed rate, or read from the curve) ---
+    if active.any():
+        idx = np.flatnonzero(active)
+        horizon_column = _curve_columns(curve, np.array([investment_horizon_years], dtype=np.float64))
+        if horizon_column is not None:
+            pow_new = curve['pow_new'][horizon_column[0]]
+            pow_old = curve['pow_old'][curve['rate_index'][idx], horizon_column[0]]
+        else:
+            unique_old_rates, rate_index = np.unique(old_fixed_rate[idx], return_inverse=True)
+            bases = np.concatenate(([1 + new_fixed_rate], 1 + unique_old_rates))
+            powers = pow_table(bases, [investment_horizon_years])[:, 0]
+            pow_new = powers[0]
+            pow_old = powers[1:][rate_index]
+        proceeds_active = net_proceeds[idx]
+        with np.errstate(invalid='ignore', over='ignore'):
+            benefit = proceeds_active * pow_new - proceeds_active * pow_old
+        overflow = np.isinf(pow_new) | np.isinf(pow_old)
+        domain = ~overflow & (np.isnan(pow_new) | np.isnan(pow_old))
+        error_code[idx[overflow]] = BATCH_ERR_OVERFLOW
+        error_code[idx[domain]] = BATCH_ERR_MATH_DOMAIN
+        benefit[overflow | domain] = np.nan
+        compounded_fixed_rate_benefit[idx] = benefit
+        net_gain_or_loss[idx] = benefit - immediate_cost[idx]
+        active[idx[overflow | domain]] = False
+
+        # --- Break-Even Point ---
+        higher_rate = active & (new_fixed_rate > old_fixed_rate) & include_break_even
+        pending = np.flatnonzero(higher_rate & (immediate_cost > 0))
+        break_even_years[higher_rate & (immediate_cost <= 0)] = 0
+        if pending.size:
+            power_table = None
+            columns = _curve_columns(curve, _horizon_exponents(break_even_max_years, break_even_periods_per_year))
+            if columns is not None:
+                power_table = (curve['pow_new'][columns], curve['pow_old'][:, columns], curve['rate_index'][pending])
+            with INSTRUMENTATION.timer('break_even'):
+                break_even_years[pending] = solve_break_even_batch(
+                    net_proceeds[pending], immediate_cost[pending], old_fixed_rate[pending], new_fixed_rate,
+                    max_years=break_even_max_years, periods_per_year=break_even_periods_per_year,
+                    power_table=power_table
+                )
+
+    return {
+        'total_months_held': holding['total_months_held'],
+        'penalty_applies': holding['penalty_applies'],
+        'penalty': holding['penalty'],
+        'accrued_interest': holding['accrued_interest'],
+        'taxes_owed': proceeds['taxes_owed'],
+        'immediate_cost': immediate_cost,
+        'net_proceeds': net_proceeds,
+        'compounded_fixed_rate_benefit': compounded_fixed_rate_benefit,
+        'net_gain_or_loss': net_gain_or_loss,
+        'break_even_years': break_even_years,
+        'error_code': error_code,
+        'warning_code': holding['warning_code'],
+        'note_code': note_code,
+    }
+
+
+def calculate_rotation_metrics_batch(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    break_even_max_years=100,
+    break_even_periods_per_year=1,
+    include_break_even=True,
+    as_of=None
+):
+    """Vectorized calculate_rotation_metrics over whole columns. Returns a dictionary of NumPy arrays.
+
+    Bond inputs are array-likes of equal length (issue dates as datetime64[D]); the rotation
+    parameters are scalars. Each row yields the same numbers as the scalar function, with the
+    per-bond error/warning/note strings replaced by the BATCH_* codes. Callers that only need
+    net gains can pass include_break_even=False, leaving break_even_years at -1. Bond ages are
+    taken as of as_of (default today). Runs the three analysis stages in order.
+    """
+    holding = holding_stage_batch(old_bond_principal, old_bond_issue_date, old_bond_current_value,
+                                  old_bond_composite_rate_pct, as_of=as_of)
+    proceeds = proceeds_stage_batch(holding, federal_tax_rate_pct)
+    return rotation_stage_batch(
+        holding, proceeds, old_bond_fixed_rate_pct, new_bond_fixed_rate_pct, investment_horizon_years,
+        break_even_max_years=break_even_max_years, break_even_periods_per_year=break_even_periods_per_year,
+        include_break_even=include_break_even
+    )
+
+
+def batch_row_to_metrics(batch, index, old_bond_fixed_rate_pct, new_bond_fixed_rate_pct, max_years_to_check=100):
+    """Rebuilds the calculate_rotation_metrics dictionary for one row of a batch result."""
+    results = {}
+    results['warning'] = "Current value is less than principal. Check inputs." if batch['warning_code'][index] else None
+    if batch['note_code'][index]:
+        results['note'] = f"New fixed rate ({new_bond_fixed_rate_pct}%) is not higher than this bond's rate ({old_bond_fixed_rate_pct}%)."
+    else:
+        results['note'] = None
+
+    error_code = int(batch['error_code'][index])
+    if error_code == BATCH_ERR_INVALID_DATE:
+        results['error'] = BATCH_ERROR_MESSAGES[error_code]
+        return results
+
+    total_months_held = int(batch['total_months_held'][index])
+    sign = -1 if total_months_held < 0 else 1
+    bond_age_years, bond_age_months = divmod(total_months_held * sign, 12)
+    bond_age_years *= sign
+    bond_age_months *= sign
+    results['age_str'] = f"{bond_age_years} years, {bond_age_months} months ({total_months_held} total months)"
+    results['total_months_held'] = total_months_held
+
+    results['error'] = BATCH_ERROR_MESSAGES[error_code]
+    results['penalty_applies'] = bool(batch['penalty_applies'][index])
+    for key in ('penalty', 'accrued_interest', 'taxes_owed', 'immediate_cost', 'net_proceeds'):
+        results[key] = float(batch[key][index])
+    if error_code in (BATCH_ERR_INVALID_HORIZON, BATCH_ERR_OVERFLOW, BATCH_ERR_MATH_DOMAIN):
+        return results
+
+    results['compounded_fixed_rate_benefit'] = float(batch['compounded_fixed_rate_benefit'][index])
+    results['net_gain_or_loss'] = float(batch['net_gain_or_loss'][index])
+    results['break_even_years'] = batch['break_even_years'][index].item()
+    if error_code == BATCH_OK:
+        results['max_years_to_check'] = max_years_to_check
+    return results
+
+
+def summarize_batch(batch):
+    """Returns (recommended_count, total_net_gain) over rows without errors and with a positive net gain."""
+    recommended = (batch['error_code'] == BATCH_OK) & (batch['net_gain_or_loss'] > 0)
+    return int(recommended.sum()), float(batch['net_gain_or_loss'][recommended].sum())
+
+
+def recommended_net_gains(batch):
+    """Each row's net gain where summarize_batch counts it, 0.0 elsewhere (the RotationSummary input)."""
+    recommended = (batch['error_code'] == BATCH_OK) & (batch['net_gain_or_loss'] > 0)
+    return np.where(recommended, batch['net_gain_or_loss'], 0.0)
@@ -0,0 +1,183 @@
+"""Persistent per-bond result cache for repeated runs over mostly unchanged portfolios."""
+import hashlib
+import os
+from datetime import date
+
+import numpy as np
+
+from .batch import calculate_rotation_metrics_batch, months_held_batch
+from .defaults import DEFAULT_RESULT_CACHE_MAX_ENTRIES
+from .instrumentation import INSTRUMENTATION
+
+
+# --- Persistent Result Cache (skip recomputing bonds whose inputs have not changed) ---
+RESULT_CACHE_VERSION = 1
+DEFAULT_RESULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'i_bond_analysis', 'rotation_results.npz')
+RESULT_CACHE_COLUMNS = {
+    'total_months_held': np.int64, 'penalty_applies': np.bool_, 'penalty': np.float64,
+    'accrued_interest': np.float64, 'taxes_owed': np.float64, 'immediate_cost': np.float64,
+    'net_proceeds': np.float64, 'compounded_fixed_rate_benefit': np.float64,
+    'net_gain_or_loss': np.float64, 'break_even_years': np.float64,
+    'error_code': np.int8, 'warning_code': np.int8, 'note_code': np.int8,
+}
+
+
+def _mix64(values):
+    """splitmix64 finalizer applied element-wise to a uint64 array."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class RotationResultCache:
+    """On-disk cache of per-bond batch results, keyed by a hash of each row's inputs plus the run parameters.
+
+    The as-of date only enters the metrics through the whole months held, so that is what goes into the
+    key: a daily refresh still hits for every bond that has not crossed a month boundary. Keys are two
+    independent 64-bit hashes computed with vectorized NumPy arithmetic; entries live in arrays sorted by
+    the first hash and are looked up with searchsorted. Least recently used entries are evicted beyond
+    max_entries when the cache is saved.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_RESULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._keys = np.empty(0, dtype=np.uint64) # Sorted first hash
+        self._checks = np.empty(0, dtype=np.uint64) # Second hash, guards against first-hash collisions
+        self._last_used = np.empty(0, dtype=np.int64) # Generation that last read or wrote the entry
+        self._values = {column: np.empty(0, dtype=dtype) for column, dtype in RESULT_CACHE_COLUMNS.items()}
+        self._pending = [] # (keys, checks, values) stored this run, merged on save()
+        self._generation = 1
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self._keys) + sum(len(keys) for keys, _, _ in self._pending)
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                if int(stored['version']) != RESULT_CACHE_VERSION:
+                    return # Stale format: start over
+                self._keys = stored['keys']
+                self._checks = stored['checks']
+                self._last_used = stored['last_used']
+                self._values = {column: stored['value_' + column] for column in RESULT_CACHE_COLUMNS}
+                self._generation = int(stored['generation']) + 1
+        except (OSError, ValueError, KeyError):
+            pass # Unreadable cache file: start over
+
+    def row_keys(self, columns, months_held, parameters):
+        """Returns (keys, checks) uint64 arrays for batch input columns, months held and a parameter tuple."""
+        words = [
+            columns['old_bond_issue_date'].astype('datetime64[D]').view(np.int64).view(np.uint64),
+            np.ascontiguousarray(columns['old_bond_fixed_rate_pct'], dtype=np.float64).view(np.uint64),
+            np.ascontiguousarray(columns['old_bond_composite_rate_pct'], dtype=np.float64).view(np.uint64),
+            np.ascontiguousarray(columns['old_bond_principal'], dtype=np.float64).view(np.uint64),
+            np.ascontiguousarray(columns['old_bond_current_value'], dtype=np.float64).view(np.uint64),
+            np.asarray(months_held, dtype=np.int64).view(np.uint64),
+        ]
+        digest = hashlib.blake2b(repr((RESULT_CACHE_VERSION,) + tuple(parameters)).encode(), digest_size=16).digest()
+        keys = np.full(len(words[0]), int.from_bytes(digest[:8], 'little'), dtype=np.uint64)
+        checks = np.full(len(words[0]), int.from_bytes(digest[8:], 'little'), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for word in words:
+                keys = _mix64(keys ^ word)
+                checks = _mix64(checks ^ _mix64(word ^ np.uint64(0x9E3779B97F4A7C15)))
+        return keys, checks
+
+    def lookup(self, keys, checks):
+        """Returns (hit_mask, positions) for the given keys and marks the hits as recently used."""
+        positions = np.searchsorted(self._keys, keys)
+        in_range = positions < len(self._keys)
+        hit = np.zeros(len(keys), dtype=bool)
+        hit[in_range] = (self._keys[positions[in_range]] == keys[in_range]) & (self._checks[positions[in_range]] == checks[in_range])
+        self._last_used[positions[hit]] = self._generation
+        self.hits += int(hit.sum())
+        self.misses += int(len(keys) - hit.sum())
+        INSTRUMENTATION.count('cache_hits', int(hit.sum()))
+        INSTRUMENTATION.count('cache_misses', int(len(keys) - hit.sum()))
+        return hit, positions[hit]
+
+    def fetch(self, positions):
+        """Cached result columns for positions returned by lookup()."""
+        return {column: values[positions] for column, values in self._values.items()}
+
+    def store(self, keys, checks, metrics):
+        """Queues freshly computed result rows; they are merged into the cache on save()."""
+        values = {column: np.asarray(metrics[column], dtype=dtype) for column, dtype in RESULT_CACHE_COLUMNS.items()}
+        self._pending.append((keys, checks, values))
+
+    def calculate(self, columns, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, **batch_options):
+        """calculate_rotation_metrics_batch that only computes rows missing from the cache."""
+        as_of = batch_options.pop('as_of', None) or date.today() # Keyed through months held only
+        valid = ~np.isnat(columns['old_bond_issue_date'])
+        months_held = np.full(len(valid), -1, dtype=np.int64)
+        months_held[valid] = months_held_batch(columns['old_bond_issue_date'][valid], as_of)
+        parameters = (new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, sorted(batch_options.items()))
+        keys, checks = self.row_keys(columns, months_held, parameters)
+        hit, positions = self.lookup(keys, checks)
+
+        metrics = {column: np.empty(len(keys), dtype=dtype) for column, dtype in RESULT_CACHE_COLUMNS.items()}
+        for column, values in self.fetch(positions).items():
+            metrics[column][hit] = values
+        miss = np.flatnonzero(~hit)
+        if miss.size:
+            computed = calculate_rotation_metrics_batch(
+                **{name: column[miss] for name, column in columns.items()},
+                new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                as_of=as_of,
+                **batch_options
+            )
+            for column in RESULT_CACHE_COLUMNS:
+                metrics[column][miss] = computed[column]
+            self.store(keys[miss], checks[miss], computed)
+        if batch_options.get('break_even_periods_per_year', 1) == 1:
+            metrics['break_even_years'] = metrics['break_even_years'].astype(np.int64)
+        return metrics
+
+    def save(self):
+        """Merges new entries, evicts the least recently used beyond max_entries and writes the file atomically."""
+        keys = np.concatenate([self._keys] + [pending[0] for pending in self._pending])
+        checks = np.concatenate([self._checks] + [pending[1] for pending in self._pending])
+        last_used = np.concatenate([self._last_used] + [np.full(len(pending[0]), self._generation, dtype=np.int64) for pending in self._pending])
+        values = {column: np.concatenate([self._values[column]] + [pending[2][column] for pending in self._pending])
+                  for column in RESULT_CACHE_COLUMNS}
+        self._pending = []
+
+        # Sort by key, newest entry first within equal keys, and keep one entry per key
+        order = np.lexsort((-np.arange(len(keys)), keys))
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = keys[order][1:] != keys[order][:-1]
+        order = order[keep]
+        if len(order) > self.max_entries:
+            self.evicted += len(order) - self.max_entries
+            recent = np.argsort(last_used[order], kind='stable')[-self.max_entries:]
+            order = np.sort(order[recent])
+            order = order[np.argsort(keys[order], kind='stable')]
+
+        self._keys = keys[order]
+        self._checks = checks[order]
+        self._last_used = last_used[order]
+        self._values = {column: column_values[order] for column, column_values in values.items()}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            np.savez(cache_file, version=RESULT_CACHE_VERSION, generation=self._generation,
+                     keys=self._keys, checks=self._checks, last_used=self._last_used,
+                     **{'value_' + column: column_values for column, column_values in self._values.items()})
+        os.replace(temp_path, self.path)
+
+    def report(self):
+        """One-line hit/miss summary."""
+        total = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / total if total else 0.0
+        return (f"Result cache: {self.hits:,} hit(s), {self.misses:,} miss(es) ({hit_rate:.1f}% hits), "
+                f"{self.evicted:,} evicted, {len(self):,} entries")
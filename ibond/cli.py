@@ -0,0 +1,600 @@
+"""Command line entry point.
+
+Only the NumPy-free core is imported up front; the batch engines, the process pools and the
+service are imported by the mode that needs them, so small runs start quickly.
+"""
+import argparse
+import functools
+import math
+import os
+import sys
+import time
+from datetime import date
+
+from .core import is_multi_file_source, parse_bond_rows, parse_issue_date, read_csv_rows, write_scalar_rotation_results
+from .defaults import (
+    BACKTEST_FREQUENCIES, DEFAULT_FEDERAL_TAX_RATE_PCT, DEFAULT_INVESTMENT_HORIZON_YEARS, DEFAULT_NEW_BOND_FIXED_RATE_PCT,
+    DEFAULT_PIPELINE_CHUNK_SIZE, DEFAULT_RESULT_CACHE_MAX_ENTRIES, EXPORT_BATCH_ROWS, EXPORT_FORMATS,
+    HORIZON_CURVE_DEFAULT_YEARS, MC_INFLATION_MEAN_PCT, MC_INFLATION_VOLATILITY_PCT, OPTIMIZER_DEFAULT_YEARS,
+    OPTIMIZER_METHODS, PURCHASE_LIMIT_PER_SSN, SCALAR_FAST_PATH_MAX_BYTES, SERVICE_BATCH_WINDOW_MS, SERVICE_DEFAULT_HOST,
+    SERVICE_DEFAULT_PORT, SERVICE_MAX_PENDING_BONDS, SNAPSHOT_SUFFIX, TIMING_DEFAULT_MONTHS, WATCH_DEFAULT_INTERVAL_S
+)
+from .instrumentation import INSTRUMENTATION
+
+
+def parse_sweep_values(spec, value_type=float):
+    """Parses 'a,b,c' or an inclusive 'start:stop:step' range into a list of values."""
+    if ':' in spec:
+        start, stop, step = (value_type(part) for part in spec.split(':'))
+        if step <= 0:
+            raise ValueError(f"Sweep step must be positive in '{spec}'.")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [value_type(round(start + i * step, 10)) for i in range(max(count, 0))]
+    return [value_type(part) for part in spec.split(',') if part.strip()]
+
+
+def _write_metrics_exports(json_filename, prometheus_filename):
+    """Writes the collected instrumentation to the requested export files."""
+    if json_filename:
+        with open(json_filename, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(INSTRUMENTATION.to_json())
+    if prometheus_filename:
+        with open(prometheus_filename, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(INSTRUMENTATION.to_prometheus())
+
+
+def _load_cli_portfolio(args, multi_file, as_of, rate_check=None):
+    """The parsed portfolio for the whole-portfolio modes: one CSV (optionally via its snapshot) or every CSV source merged.
+
+    An optional RateTableCheck is applied to the result.
+    """
+    if not multi_file:
+        from .pipeline import load_portfolio
+        portfolio, warnings = load_portfolio(args.csv_files[0], args.snapshot, as_of=as_of, derive_rates=args.derive_rates)
+    else:
+        from .ingest import load_multi_file_portfolio
+        portfolio, warnings, _ = load_multi_file_portfolio(args.csv_files, workers=args.workers, as_of=as_of,
+                                                           derive_rates=args.derive_rates)
+    if rate_check is not None:
+        portfolio, rate_warnings = rate_check.apply(portfolio, as_of)
+        warnings = warnings + rate_warnings
+    return portfolio, warnings
+
+
+def _write_cli_results(args, events, output_file, warnings_file, include_source=False):
+    """Pipeline sink for the per-bond modes: the results CSV (-o), or the bulk export when --export is given."""
+    if args.export:
+        from .export import export_rotation_results
+        return export_rotation_results(events, args.export, warnings_file, export_format=args.export_format,
+                                       include_source=include_source, batch_rows=args.export_batch_rows)
+    from .pipeline import write_rotation_results
+    return write_rotation_results(events, output_file, warnings_file, include_source=include_source)
+
+
+def _watch_csv_sources(args, as_of):
+    """--watch: re-analyzes changed CSVs every interval and rewrites the output files until interrupted."""
+    from .ingest import MultiFileAnalysis
+    from .pipeline import write_rotation_results
+    parameters = (args.new_rate, args.tax_rate, args.horizon)
+    with MultiFileAnalysis(args.csv_files, workers=args.workers) as analysis:
+        first_pass = True
+        try:
+            while True:
+                started = time.perf_counter()
+                changes = analysis.refresh(parameters, as_of=as_of)
+                if first_pass or changes['changed'] or changes['removed']:
+                    portfolio, warnings, stats = analysis.merge()
+                    events = [('warning', warning) for warning in warnings] + [('results', portfolio)]
+                    temporary = args.output + '.tmp' # Readers never see a half-written results file
+                    with open(temporary, 'w', newline='', encoding='utf-8') as output_file:
+                        if args.warnings is None:
+                            summary = write_rotation_results(events, output_file, sys.stderr, include_source=True)
+                        else:
+                            with open(args.warnings, 'w', encoding='utf-8') as warnings_file:
+                                summary = write_rotation_results(events, output_file, warnings_file, include_source=True)
+                    os.replace(temporary, args.output)
+                    print(f"[{time.strftime('%H:%M:%S')}] {len(changes['changed'])} file(s) analyzed, "
+                          f"{len(changes['removed'])} removed in {time.perf_counter() - started:.2f}s: "
+                          f"{summary['processed']} bonds from {stats['files']} file(s), "
+                          f"{summary['recommended_count']} recommended, ${summary['total_net_gain']:,.2f} net gain",
+                          flush=True)
+                    first_pass = False
+                time.sleep(args.watch)
+        except KeyboardInterrupt:
+            pass
+        except OSError as oe:
+            print(f"Error: {oe}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def _cli_parser():
+    """The headless command line's argument parser."""
+    parser = argparse.ArgumentParser(description="Analyze an I bond CSV without the GUI.")
+    parser.add_argument('csv_files', nargs='*', metavar='CSV',
+                        help="Bond CSV with the required columns; several files, directories of CSVs or glob patterns "
+                             "are analyzed in parallel and merged by confirmation number.")
+    parser.add_argument('-o', '--output', default='-', help="Results CSV path ('-' for stdout).")
+    parser.add_argument('-w', '--warnings', default=None, help="File for CSV warnings (default: stderr).")
+    parser.add_argument('--new-rate', type=float, default=DEFAULT_NEW_BOND_FIXED_RATE_PCT, help="New bond fixed rate (%%).")
+    parser.add_argument('--tax-rate', type=float, default=DEFAULT_FEDERAL_TAX_RATE_PCT, help="Federal tax rate (%%).")
+    parser.add_argument('--horizon', type=int, default=DEFAULT_INVESTMENT_HORIZON_YEARS, help="Investment horizon (years).")
+    parser.add_argument('--as-of', default=None, metavar='YYYY-MM-DD',
+                        help="Date bond ages are measured at (default: today).")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_PIPELINE_CHUNK_SIZE, help="Bonds per batch computation.")
+    parser.add_argument('--cache', default=None, help="Persistent result cache file (.npz); unchanged bonds are not recomputed.")
+    parser.add_argument('--snapshot', default=None,
+                        help=f"Binary snapshot of the parsed CSV ({SNAPSHOT_SUFFIX}); reused while the CSV is unchanged, rebuilt otherwise.")
+    parser.add_argument('--metrics-json', default=None, help="Write stage timings, counters and error counts to this JSON file.")
+    parser.add_argument('--metrics-prom', default=None, help="Write the same metrics in Prometheus text format to this file.")
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_RESULT_CACHE_MAX_ENTRIES,
+                        help="Least recently used cache entries beyond this count are evicted.")
+    parser.add_argument('--watch', type=float, nargs='?', const=WATCH_DEFAULT_INTERVAL_S, default=None, metavar='SECONDS',
+                        help=f"Keep running and re-analyze only the CSVs that changed, every SECONDS "
+                             f"(default {WATCH_DEFAULT_INTERVAL_S:g}); rewrites -o after each change.")
+    service_group = parser.add_argument_group("analysis service", "Serve POST /analyze, GET /stats and GET /health as JSON over HTTP.")
+    service_group.add_argument('--serve', action='store_true', help="Run the local analysis service instead of analyzing a CSV.")
+    service_group.add_argument('--host', default=SERVICE_DEFAULT_HOST, help="Address to listen on (default: localhost only).")
+    service_group.add_argument('--port', type=int, default=SERVICE_DEFAULT_PORT, help="Port to listen on.")
+    service_group.add_argument('--max-pending', type=int, default=SERVICE_MAX_PENDING_BONDS,
+                               help="Queued bonds beyond which requests are refused with 503.")
+    service_group.add_argument('--batch-window-ms', type=float, default=SERVICE_BATCH_WINDOW_MS,
+                               help="How long to wait to group small requests into one computation.")
+    sweep_group = parser.add_argument_group("parameter sweep", "Values as 'a,b,c' or an inclusive 'start:stop:step' range.")
+    sweep_group.add_argument('--sweep-new-rates', help="New bond fixed rates (%%) to sweep.")
+    sweep_group.add_argument('--sweep-tax-rates', help="Federal tax rates (%%) to sweep.")
+    sweep_group.add_argument('--sweep-horizons', help="Investment horizons (years) to sweep.")
+    sweep_group.add_argument('--workers', type=int, default=None,
+                             help="Worker processes for sweeps and multi-file runs (default: CPU count).")
+    sweep_group.add_argument('--bond-gains', default=None, help="Save the points x bonds net gain grid to this .npy file.")
+    sweep_group.add_argument('--horizon-curve', action='store_true',
+                             help="Write the portfolio's net gain at every horizon (one pass over the bonds) instead of per-bond results.")
+    sweep_group.add_argument('--curve-years', type=int, default=HORIZON_CURVE_DEFAULT_YEARS,
+                             help="Longest horizon on the curve (years).")
+    sweep_group.add_argument('--curve-monthly', action='store_true', help="Evaluate the curve at every month instead of every year.")
+    simulation_group = parser.add_argument_group("inflation simulation", "Net gain distributions over simulated inflation paths.")
+    simulation_group.add_argument('--simulate', type=int, default=None, metavar='PATHS',
+                                  help="Simulate this many inflation paths and write per-bond net gain distributions.")
+    simulation_group.add_argument('--seed', type=int, default=0, help="Random seed for the simulated paths.")
+    simulation_group.add_argument('--current-inflation', type=float, default=None,
+                                  help="Semiannual inflation rate (%%) in effect now (default: implied by the CSV's composite rates).")
+    simulation_group.add_argument('--inflation-mean', type=float, default=MC_INFLATION_MEAN_PCT,
+                                  help="Long-run semiannual inflation rate (%%) the paths revert to.")
+    simulation_group.add_argument('--inflation-volatility', type=float, default=MC_INFLATION_VOLATILITY_PCT,
+                                  help="Standard deviation (%%) of each semiannual inflation shock.")
+    plan_group = parser.add_argument_group(
+        "year-by-year plan", "Plan rotations under the annual I bond purchase limit. Each calendar year is filled in turn "
+                             "from the bonds not yet planned: a greedy heuristic across years, not a joint optimum.")
+    plan_group.add_argument('--yearly-plan', '--optimize', dest='optimize', action='store_true',
+                            help="Write the year-by-year rotation plan instead of per-bond results (--optimize is the old name).")
+    plan_group.add_argument('--ssns', type=int, default=1, help="SSNs in the household; each adds one annual limit.")
+    plan_group.add_argument('--annual-limit', type=float, default=PURCHASE_LIMIT_PER_SSN, help="Purchase limit per SSN per year ($).")
+    plan_group.add_argument('--plan-years', type=int, default=OPTIMIZER_DEFAULT_YEARS, help="Calendar years the plan may use.")
+    plan_group.add_argument('--purchased-this-year', type=float, default=0.0, help="Amount already bought this year ($).")
+    plan_group.add_argument('--optimizer', choices=OPTIMIZER_METHODS, default='auto',
+                            help="Knapsack solver for each year: exact dynamic programming, greedy by gain per dollar, "
+                                 "or auto (DP when small enough).")
+    timing_group = parser.add_argument_group("redemption timing", "The best upcoming month to redeem each bond.")
+    timing_group.add_argument('--timing', type=int, nargs='?', const=TIMING_DEFAULT_MONTHS, default=None, metavar='MONTHS',
+                              help=f"Write each bond's best month to redeem within the next MONTHS (default "
+                                   f"{TIMING_DEFAULT_MONTHS}) instead of per-bond results for today.")
+    rate_group = parser.add_argument_group("Treasury rate table", "Historical fixed and inflation rates by issue month.")
+    rate_group.add_argument('--check-rates', action='store_true',
+                            help="Warn about bonds whose Fixed Rate, Composite Interest rate or Current Value disagree with the rate table.")
+    rate_group.add_argument('--derive-rates', action='store_true',
+                            help="Compute those three values from the rate table instead (the CSV columns may be blank or absent); "
+                                 "supplied values that disagree are still reported.")
+    rate_group.add_argument('--rate-table', default=None, metavar='CSV',
+                            help="Rate table to use instead of the bundled one (Effective Month, Fixed Rate, Semiannual Inflation Rate).")
+    backtest_group = parser.add_argument_group("as-of backtest", "What the analysis would have recommended on past dates.")
+    backtest_group.add_argument('--backtest', default=None, metavar='START[:END]',
+                                help="Write per-date totals for every as-of date from START to END (YYYY-MM-DD; "
+                                     "END defaults to --as-of) instead of per-bond results.")
+    backtest_group.add_argument('--backtest-every', choices=BACKTEST_FREQUENCIES, default='month-end',
+                                help="Spacing of the as-of dates.")
+    backtest_group.add_argument('--backtest-treasury-rates', action='store_true',
+                                help="Use the fixed rate Treasury offered at each date as the new bond's rate instead of --new-rate.")
+    backtest_group.add_argument('--backtest-csv-values', action='store_true',
+                                help="Use the CSV's current value and composite rate at every date instead of recomputing "
+                                     "them from the rate table.")
+    export_group = parser.add_argument_group("bulk export", "Per-bond results with result codes and the run parameters, "
+                                                            "streamed in batches.")
+    export_group.add_argument('--export', default=None, metavar='PATH',
+                              help="Write the results here instead of -o ('-' for stdout), as CSV, JSON Lines or Parquet.")
+    export_group.add_argument('--export-format', choices=EXPORT_FORMATS, default=None,
+                              help="Export format (default: from the suffix: .csv, .jsonl/.ndjson, .parquet; Parquet needs pyarrow).")
+    export_group.add_argument('--export-batch-rows', type=int, default=EXPORT_BATCH_ROWS,
+                              help="Bonds converted and written per batch (one Parquet row group each).")
+    return parser
+
+
+def _is_sweep(args):
+    """True when any --sweep-* option is given."""
+    return any((args.sweep_new_rates, args.sweep_tax_rates, args.sweep_horizons))
+
+
+def _check_cli_args(parser, args):
+    """Rejects invalid values and mode combinations (through parser.error). Returns the sweep's (new_rates, tax_rates, horizons)."""
+    sweep_mode = _is_sweep(args)
+    try:
+        new_rates = parse_sweep_values(args.sweep_new_rates) if args.sweep_new_rates else [args.new_rate]
+        tax_rates = parse_sweep_values(args.sweep_tax_rates) if args.sweep_tax_rates else [args.tax_rate]
+        horizons = parse_sweep_values(args.sweep_horizons, int) if args.sweep_horizons else [args.horizon]
+    except ValueError as ve:
+        parser.error(f"Invalid sweep values: {ve}")
+    if min(new_rates + tax_rates, default=0) < 0:
+        parser.error("Rates cannot be negative.")
+    if min(horizons, default=1) <= 0:
+        parser.error("Horizon must be a positive integer.")
+    if args.chunk_size <= 0:
+        parser.error("Chunk size must be a positive integer.")
+    if args.workers is not None and args.workers <= 0:
+        parser.error("Workers must be a positive integer.")
+    if args.simulate is not None and (args.simulate <= 0 or sweep_mode):
+        parser.error("Simulated paths must be a positive integer, and --simulate cannot be combined with a sweep.")
+    if args.inflation_volatility < 0:
+        parser.error("Inflation volatility cannot be negative.")
+    if args.optimize and (sweep_mode or args.simulate is not None):
+        parser.error("--yearly-plan cannot be combined with a sweep or --simulate.")
+    if args.horizon_curve and (sweep_mode or args.simulate is not None or args.optimize):
+        parser.error("--horizon-curve cannot be combined with a sweep, --simulate or --yearly-plan.")
+    if args.backtest is not None and (sweep_mode or args.simulate is not None or args.optimize or args.horizon_curve):
+        parser.error("--backtest cannot be combined with a sweep, --simulate, --yearly-plan or --horizon-curve.")
+    if args.timing is not None:
+        if sweep_mode or args.simulate is not None or args.optimize or args.horizon_curve or args.backtest is not None:
+            parser.error("--timing cannot be combined with a sweep, --simulate, --yearly-plan, --horizon-curve or --backtest.")
+        if not 0 <= args.timing < args.horizon * 12:
+            parser.error("Timing months must be zero or more and shorter than the investment horizon.")
+    if args.curve_years <= 0:
+        parser.error("Curve years must be a positive integer.")
+    if args.ssns <= 0 or args.annual_limit <= 0 or args.plan_years <= 0 or args.purchased_this_year < 0:
+        parser.error("SSNs, annual limit and plan years must be positive, and prior purchases cannot be negative.")
+    if args.cache_max_entries <= 0:
+        parser.error("Cache max entries must be a positive integer.")
+    return new_rates, tax_rates, horizons
+
+
+def _check_source_args(parser, args, multi_file):
+    """Rejects options that do not fit the CSV sources or the chosen output (through parser.error)."""
+    sweep_mode = _is_sweep(args)
+    use_rate_table = args.check_rates or args.derive_rates
+    if multi_file and args.snapshot:
+        parser.error("--snapshot takes a single CSV file.")
+    if args.derive_rates and args.snapshot:
+        parser.error("--snapshot cannot be combined with --derive-rates.")
+    if args.rate_table and not (use_rate_table or args.backtest is not None):
+        parser.error("--rate-table needs --check-rates, --derive-rates or --backtest.")
+    if (args.backtest_treasury_rates or args.backtest_csv_values) and args.backtest is None:
+        parser.error("--backtest-treasury-rates and --backtest-csv-values need --backtest.")
+    if args.export_format and not args.export:
+        parser.error("--export-format needs --export.")
+    if args.export:
+        if (sweep_mode or args.simulate is not None or args.optimize or args.horizon_curve or args.backtest is not None
+                or args.timing is not None or args.watch is not None):
+            parser.error("--export cannot be combined with a sweep, --simulate, --yearly-plan, --horizon-curve, --backtest, "
+                         "--timing or --watch.")
+        if args.output != '-':
+            parser.error("--export replaces -o; give only one of them.")
+        if args.export_batch_rows <= 0:
+            parser.error("Export batch rows must be a positive integer.")
+        from .export import check_export_format
+        try:
+            check_export_format(args.export, args.export_format)
+        except ValueError as ve:
+            parser.error(str(ve))
+    if args.watch is not None:
+        if args.watch <= 0 or args.output == '-':
+            parser.error("--watch needs a positive interval and an -o output file.")
+        if (sweep_mode or args.simulate is not None or args.optimize or args.horizon_curve or args.backtest is not None
+                or args.timing is not None or args.cache or use_rate_table):
+            parser.error("--watch cannot be combined with a sweep, --simulate, --yearly-plan, --horizon-curve, --backtest, "
+                         "--timing, --cache or the rate table options.")
+
+
+def _serve(parser, args):
+    """--serve: runs the analysis service until interrupted."""
+    if args.max_pending <= 0 or args.batch_window_ms < 0:
+        parser.error("Max pending must be positive and the batch window cannot be negative.")
+    from .service import RotationService
+    service = RotationService(args.host, args.port, workers=args.workers, batch_window_ms=args.batch_window_ms,
+                              max_pending_bonds=args.max_pending)
+    host, port = service.address
+    print(f"Serving I bond analysis on http://{host}:{port} with {service.workers} worker(s). Press Ctrl+C to stop.",
+          file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+    return 0
+
+
+# --- Modes (each writes its output and returns the summary lines) ---
+def _run_portfolio_mode(mode, args, multi_file, as_of, rate_check, output_file, warnings_file):
+    """Shared by the whole-portfolio modes: loads the portfolio, writes its warnings, then runs
+    mode(args, portfolio, warning_count, output_file, as_of)."""
+    portfolio, warnings = _load_cli_portfolio(args, multi_file, as_of, rate_check)
+    for warning in warnings:
+        warnings_file.write(warning + "\n")
+    return mode(args, portfolio, len(warnings), output_file, as_of)
+
+
+def _sweep_mode(args, portfolio, warning_count, output_file, as_of, sweep_values=None):
+    import numpy as np
+    from .sweep import run_parameter_sweep, write_sweep_grid
+    with INSTRUMENTATION.timer('sweep'):
+        grid = run_parameter_sweep(portfolio, *sweep_values, workers=args.workers,
+                                   include_bond_gains=args.bond_gains is not None, as_of=as_of)
+    write_sweep_grid(grid, output_file)
+    if args.bond_gains is not None:
+        np.save(args.bond_gains, grid['bond_net_gain'])
+    lines = [
+        f"Bonds Processed: {len(portfolio)} ({warning_count} CSV warning(s), "
+        f"{portfolio.memory_footprint()['total'] / 1e6:,.1f} MB in memory)",
+        f"Parameter Points Evaluated: {len(grid['portfolio_net_gain'])}",
+    ]
+    if len(grid['portfolio_net_gain']):
+        best = int(np.argmax(grid['portfolio_net_gain']))
+        lines.append(f"Best Point: new rate {grid['new_rate'][best]}%, tax rate {grid['tax_rate'][best]}%, "
+                     f"horizon {grid['horizon'][best]} years -> ${grid['portfolio_net_gain'][best]:,.2f} "
+                     f"({grid['recommended_count'][best]} bond(s))")
+    return lines
+
+
+def _horizon_curve_mode(args, portfolio, warning_count, output_file, as_of):
+    import numpy as np
+    from .batch import summarize_horizon_curve, write_horizon_curve
+    portfolio.analyze(args.new_rate, args.tax_rate, args.horizon, as_of=as_of)
+    with INSTRUMENTATION.timer('horizon_curve'):
+        curve_summary = summarize_horizon_curve(
+            portfolio.horizon_curve(max_years=args.curve_years, periods_per_year=12 if args.curve_monthly else 1)
+        )
+    write_horizon_curve(curve_summary, output_file)
+    gains = curve_summary['portfolio_net_gain']
+    best = int(np.argmax(gains))
+    recommended_count, total_net_gain = portfolio.summary()
+    return [
+        f"Bonds Processed: {len(portfolio)} ({warning_count} CSV warning(s))",
+        f"Best Horizon: {curve_summary['horizon_years'][best]:g} years -> ${gains[best]:,.2f} "
+        f"({curve_summary['recommended_count'][best]} bond(s))",
+        f"At the Chosen Horizon ({args.horizon} years): ${total_net_gain:,.2f} ({recommended_count} bond(s))",
+    ]
+
+
+def _backtest_mode(args, portfolio, warning_count, output_file, as_of, dates=None, rate_table=None):
+    import numpy as np
+    from .backtest import write_backtest_results
+    backtest = portfolio.backtest(
+        dates, args.tax_rate, args.horizon,
+        new_bond_fixed_rate_pct=None if args.backtest_treasury_rates else args.new_rate,
+        rate_table=rate_table, use_csv_values=args.backtest_csv_values
+    )
+    write_backtest_results(backtest, output_file)
+    as_of_text = np.datetime_as_string(backtest['as_of'], unit='D')
+    counts = backtest['recommended_count']
+    peak = int(np.argmax(counts))
+    lines = [
+        f"Bonds Processed: {len(portfolio)} ({warning_count} CSV warning(s))",
+        f"As-Of Dates Evaluated: {len(counts)} ({as_of_text[0]} to {as_of_text[-1]}, {args.backtest_every})",
+        f"Most Bonds Recommended: {as_of_text[peak]} -> {counts[peak]} bond(s), "
+        f"${backtest['portfolio_net_gain'][peak]:,.2f}",
+        f"Last Date ({as_of_text[-1]}): {counts[-1]} bond(s), ${backtest['portfolio_net_gain'][-1]:,.2f}",
+    ]
+    if backtest['not_covered_count'].any():
+        lines.append(f"Bonds Not Covered by the Rate Table: up to {backtest['not_covered_count'].max()} per date "
+                     "(left out; see --backtest-csv-values)")
+    return lines
+
+
+def _timing_mode(args, portfolio, warning_count, output_file, as_of):
+    from .timing import write_redemption_timing
+    timing = portfolio.redemption_timing(args.new_rate, args.tax_rate, args.horizon, months_ahead=args.timing,
+                                         as_of=as_of)
+    now_count, wait_count, total_best_gain, total_from_waiting = write_redemption_timing(portfolio, timing, output_file)
+    return [
+        f"Bonds Processed: {len(portfolio)} ({warning_count} CSV warning(s))",
+        f"Best Redeemed Now: {now_count} bond(s)",
+        f"Best Redeemed Within {args.timing} Month(s): {wait_count} bond(s), "
+        f"${total_from_waiting:,.2f} more than redeeming now",
+        f"Total Estimated Net Gain at the Best Months (Horizon): ${total_best_gain:,.2f}",
+    ]
+
+
+def _simulation_mode(args, portfolio, warning_count, output_file, as_of):
+    from .montecarlo import write_simulation_results
+    simulation = portfolio.simulate(
+        args.new_rate, args.tax_rate, args.horizon, paths=args.simulate, seed=args.seed,
+        current_inflation_pct=args.current_inflation, inflation_mean_pct=args.inflation_mean,
+        inflation_volatility_pct=args.inflation_volatility, as_of=as_of
+    )
+    likely_count, total_mean_gain = write_simulation_results(portfolio, simulation, output_file)
+    lines = [f"Bonds Simulated: {len(portfolio)} over {args.simulate} inflation path(s) ({warning_count} CSV warning(s))"]
+    if simulation['inflation_paths'] is not None:
+        lines.append(f"Current Semiannual Inflation Rate Used: {simulation['inflation_paths'][0, 0]:.2f}%")
+    lines.append(f"Bonds More Likely Than Not to Gain From Rotation: {likely_count} bond(s)")
+    lines.append(f"Total Mean Net Gain of Those Bonds (Horizon, After Tax): ${total_mean_gain:,.2f}")
+    return lines
+
+
+def _yearly_plan_mode(args, portfolio, warning_count, output_file, as_of):
+    from .optimizer import format_plan_summary, write_rotation_plan
+    plan = portfolio.optimize(
+        args.new_rate, args.tax_rate, args.horizon, ssn_count=args.ssns, annual_limit=args.annual_limit,
+        plan_years=args.plan_years, purchased_this_year=args.purchased_this_year, method=args.optimizer,
+        as_of=as_of
+    )
+    write_rotation_plan(portfolio, plan, output_file)
+    return [f"Bonds Processed: {len(portfolio)} ({warning_count} CSV warning(s))"] + format_plan_summary(plan)
+
+
+def _results_report(summary, cache=None, file_stats=None):
+    """Summary lines of the per-bond modes."""
+    lines = []
+    if file_stats is not None:
+        lines.append(f"Files Analyzed: {file_stats['files']} ({file_stats['skipped_files']} skipped, "
+                     f"{file_stats['duplicates']} duplicate confirmation(s) across files)")
+    lines += [
+        f"Bonds Processed: {summary['processed']} ({summary['warnings']} CSV warning(s))",
+        f"Bonds Recommended for Rotation: {summary['recommended_count']} bond(s)",
+        f"Total Estimated Net Gain (Horizon): ${summary['total_net_gain']:,.2f}",
+    ]
+    if cache is not None:
+        lines.append(cache.report())
+    return lines
+
+
+def _multi_file_mode(args, as_of, rate_check, output_file, warnings_file):
+    """Per-bond results for several CSVs, analyzed in parallel and merged by confirmation number."""
+    from .cache import RotationResultCache
+    from .ingest import load_multi_file_portfolio
+    parameters = (args.new_rate, args.tax_rate, args.horizon)
+    cache = None if args.cache is None else RotationResultCache(args.cache, args.cache_max_entries)
+    # Workers analyze their own files; with a cache or a rate check the merged portfolio is analyzed here instead
+    analyze_merged = cache is not None or rate_check is not None
+    portfolio, warnings, file_stats = load_multi_file_portfolio(
+        args.csv_files, None if analyze_merged else parameters, workers=args.workers, as_of=as_of,
+        derive_rates=args.derive_rates
+    )
+    if rate_check is not None:
+        portfolio, rate_warnings = rate_check.apply(portfolio, as_of)
+        warnings += rate_warnings
+    if analyze_merged:
+        portfolio.analyze(*parameters, cache=cache, as_of=as_of)
+    events = [('warning', warning) for warning in warnings] + [('results', portfolio)]
+    summary = _write_cli_results(args, events, output_file, warnings_file, include_source=True)
+    if cache is not None:
+        cache.save()
+    return _results_report(summary, cache, file_stats)
+
+
+def _single_file_mode(args, as_of, rate_check, output_file, warnings_file):
+    """Per-bond results for one CSV, streamed through the pipeline in chunks (or its snapshot's portfolio)."""
+    csv_file = args.csv_files[0]
+    # Plain runs over small CSVs use the per-bond core and never import NumPy
+    if (not (args.cache or args.snapshot or rate_check is not None or args.export)
+            and os.path.getsize(csv_file) <= SCALAR_FAST_PATH_MAX_BYTES):
+        summary = write_scalar_rotation_results(
+            parse_bond_rows(read_csv_rows(csv_file), as_of),
+            args.new_rate, args.tax_rate, args.horizon, output_file, warnings_file, as_of=as_of
+        )
+        return _results_report(summary)
+
+    from .cache import RotationResultCache
+    from .pipeline import compute_rotation_chunks, load_portfolio, portfolio_rotation_chunks
+    cache = None if args.cache is None else RotationResultCache(args.cache, args.cache_max_entries)
+    if args.snapshot is None:
+        events = compute_rotation_chunks(
+            parse_bond_rows(read_csv_rows(csv_file, args.derive_rates), as_of, args.derive_rates),
+            args.new_rate, args.tax_rate, args.horizon, chunk_size=args.chunk_size, cache=cache, as_of=as_of,
+            rate_check=rate_check
+        )
+    else:
+        portfolio, warnings = load_portfolio(csv_file, args.snapshot, as_of=as_of) # Repeated confirmations keep the last row
+        events = portfolio_rotation_chunks(
+            portfolio, warnings,
+            args.new_rate, args.tax_rate, args.horizon, chunk_size=args.chunk_size, cache=cache, as_of=as_of,
+            rate_check=rate_check
+        )
+    summary = _write_cli_results(args, events, output_file, warnings_file)
+    if cache is not None:
+        cache.save()
+    return _results_report(summary, cache)
+
+
+def _cli_mode(parser, args, multi_file, as_of, rate_check, sweep_values):
+    """The requested mode as a function of (output_file, warnings_file) returning the summary lines.
+
+    Options only a mode can check (the backtest dates and rate table) are checked here, through parser.error.
+    """
+    if args.backtest is not None:
+        from .backtest import backtest_dates
+        from .rates import load_rate_table
+        start, _, end = args.backtest.partition(':')
+        try:
+            dates = backtest_dates(parse_issue_date(start), parse_issue_date(end) if end else as_of, args.backtest_every)
+        except ValueError as ve:
+            parser.error(f"Invalid --backtest dates: {ve}")
+        try:
+            rate_table = load_rate_table(args.rate_table)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not load the rate table: {e}")
+        mode = functools.partial(_backtest_mode, dates=dates, rate_table=rate_table)
+    elif _is_sweep(args):
+        mode = functools.partial(_sweep_mode, sweep_values=sweep_values)
+    elif args.horizon_curve:
+        mode = _horizon_curve_mode
+    elif args.timing is not None:
+        mode = _timing_mode
+    elif args.simulate is not None:
+        mode = _simulation_mode
+    elif args.optimize:
+        mode = _yearly_plan_mode
+    else:
+        per_bond_mode = _multi_file_mode if multi_file else _single_file_mode
+        return functools.partial(per_bond_mode, args, as_of, rate_check)
+    return functools.partial(_run_portfolio_mode, mode, args, multi_file, as_of, rate_check)
+
+
+def main_cli(argv=None):
+    """Headless entry point: streams a bond CSV through the pipeline (or a parameter sweep) and prints a summary."""
+    parser = _cli_parser()
+    args = parser.parse_intermixed_args(argv) # CSV sources may follow the options
+    sweep_values = _check_cli_args(parser, args)
+    if args.serve:
+        return _serve(parser, args)
+    if not args.csv_files:
+        parser.error("A CSV file is required unless --serve is given.")
+    multi_file = args.watch is not None or is_multi_file_source(args.csv_files)
+    _check_source_args(parser, args, multi_file)
+    try:
+        as_of = parse_issue_date(args.as_of) if args.as_of else date.today() # One as-of date for the whole run
+    except ValueError as ve:
+        parser.error(f"Invalid --as-of date: {ve}")
+    if args.watch is not None:
+        return _watch_csv_sources(args, as_of if args.as_of else None) # Without --as-of each pass uses its own today
+    rate_check = None
+    if args.check_rates or args.derive_rates:
+        from .rates import RateTableCheck, load_rate_table
+        try:
+            rate_check = RateTableCheck(load_rate_table(args.rate_table), derive=args.derive_rates)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not load the rate table: {e}")
+    run_mode = _cli_mode(parser, args, multi_file, as_of, rate_check, sweep_values)
+    INSTRUMENTATION.enabled = bool(args.metrics_json or args.metrics_prom)
+    INSTRUMENTATION.reset()
+    started = time.perf_counter()
+
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    warnings_file = sys.stderr if args.warnings is None else open(args.warnings, 'w', encoding='utf-8')
+    summary_file = sys.stderr if (args.export or args.output) == '-' else sys.stdout
+    try:
+        report = run_mode(output_file, warnings_file)
+    except FileNotFoundError:
+        print(f"Error: CSV file not found at '{args.csv_files[0]}'", file=sys.stderr)
+        return 1
+    except ValueError as ve:
+        print(f"Error: {ve}", file=sys.stderr)
+        return 1
+    except OSError as oe:
+        print(f"Error: {oe}", file=sys.stderr)
+        return 1
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+        if warnings_file is not sys.stderr:
+            warnings_file.close()
+
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.add_time('total', time.perf_counter() - started)
+        try:
+            _write_metrics_exports(args.metrics_json, args.metrics_prom)
+        except OSError as oe:
+            print(f"Error: could not write metrics: {oe}", file=sys.stderr)
+            return 1
+
+    if rate_check is not None:
+        print(rate_check.report(), file=summary_file)
+    for line in report:
+        print(line, file=summary_file)
+    return 0
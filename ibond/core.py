@@ -0,0 +1,495 @@
+"""Calculation core without NumPy or Tk: date arithmetic, the break-even solver, the per-bond
+rotation metrics and CSV parsing.
+
+Everything the command line needs for a small CSV lives here, so a one-bond run starts in
+milliseconds; the vectorized engines in ibond.batch and ibond.portfolio build on the same rules.
+"""
+import csv
+import functools
+import math
+import os
+import time
+from datetime import date, datetime
+
+from .defaults import (
+    CSV_COL_COMPOSITE_RATE, CSV_COL_CONFIRMATION, CSV_COL_CURRENT_VALUE, CSV_COL_FIXED_RATE,
+    CSV_COL_ISSUE_DATE, CSV_COL_PRINCIPAL
+)
+from .instrumentation import INSTRUMENTATION
+
+
+# --- Date Arithmetic (fixed-format issue dates and whole months held) ---
+ISSUE_DATE_MEMO_SIZE = 8192 # Distinct issue date strings remembered by parse_issue_date
+
+
+@functools.lru_cache(maxsize=ISSUE_DATE_MEMO_SIZE)
+def parse_issue_date(text):
+    """Parses a YYYY-MM-DD issue date. Memoized, since bonds cluster on a few issue dates.
+
+    Anything else datetime.strptime(text, '%Y-%m-%d') would accept (or reject) goes through
+    strptime, so results and error messages are unchanged.
+    """
+    if len(text) == 10 and text[4] == '-' and text[7] == '-' and text.isascii():
+        year, month, day = text[:4], text[5:7], text[8:]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                pass # Let strptime report it
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def days_in_month(year, month):
+    """calendar.monthrange(year, month)[1], without importing calendar (and locale) at startup."""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+def month_ordinal(day):
+    """Months since year 0 (year * 12 + month - 1) for a date."""
+    return day.year * 12 + day.month - 1
+
+
+def whole_months_between(start, end):
+    """Signed whole months from start to end, identical to relativedelta(end, start) in months."""
+    months = month_ordinal(end) - month_ordinal(start)
+    # relativedelta adds the month difference to start (clipping the day to the end of the
+    # month) and steps back one month if that overshoots end.
+    clipped_day = min(start.day, days_in_month(end.year, end.month))
+    if end >= start and end.day < clipped_day:
+        months -= 1
+    elif end < start and end.day > clipped_day:
+        months += 1
+    return months
+
+
+# --- Break-Even Solver ---
+def solve_break_even(net_proceeds, immediate_cost, old_fixed_rate, new_fixed_rate, max_years=100, periods_per_year=1):
+    """Finds the first time (in steps of 1/periods_per_year years) where the fixed-rate benefit covers the cost.
+
+    Rates are decimals. Returns the break-even point in years (an int for yearly resolution), -1 if it is
+    not reached within max_years, or -2 if compounding overflows before it is reached. The benefit grows
+    monotonically whenever new_fixed_rate > old_fixed_rate >= -1 and new_fixed_rate >= 0, so the first
+    crossing is found by bisection (O(log N)); other rate combinations fall back to a linear scan.
+    """
+    steps = int(max_years * periods_per_year)
+
+    def stops_at(step):
+        """Returns (stop, failed): stop is True once the benefit covers the cost or compounding fails."""
+        exponent = step if periods_per_year == 1 else step / periods_per_year
+        try:
+            fv_new = net_proceeds * math.pow((1 + new_fixed_rate), exponent)
+            fv_old = net_proceeds * math.pow((1 + old_fixed_rate), exponent)
+        except (OverflowError, ValueError):
+            return True, True
+        return fv_new - fv_old >= immediate_cost, False
+
+    if new_fixed_rate >= 0 and old_fixed_rate > -1:
+        low, high = 1, steps + 1 # First stopping step lies in [low, high); high means never
+        while low < high:
+            mid = (low + high) // 2
+            if stops_at(mid)[0]:
+                high = mid
+            else:
+                low = mid + 1
+        first_step = low
+    else:
+        first_step = next((step for step in range(1, steps + 1) if stops_at(step)[0]), steps + 1)
+
+    if first_step > steps:
+        return -1
+    if stops_at(first_step)[1]:
+        return -2 # Indicate calculation issue
+    return first_step if periods_per_year == 1 else first_step / periods_per_year
+
+
+# --- Core Calculation Logic ---
+def calculate_rotation_metrics(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    break_even_max_years=100,
+    break_even_periods_per_year=1,
+    as_of=None
+):
+    """Calculates rotation metrics for a single bond as of a date (default today). Returns a dictionary of results."""
+    results = {} # Dictionary to store results
+    instrumented = INSTRUMENTATION.enabled
+    if instrumented:
+        INSTRUMENTATION.count('scalar_calculations')
+
+    # --- Input Validation (Basic checks on provided values) ---
+    if old_bond_current_value < old_bond_principal:
+        results['warning'] = "Current value is less than principal. Check inputs."
+    else:
+        results['warning'] = None
+
+    if new_bond_fixed_rate_pct <= old_bond_fixed_rate_pct:
+         results['note'] = f"New fixed rate ({new_bond_fixed_rate_pct}%) is not higher than this bond's rate ({old_bond_fixed_rate_pct}%)."
+    else:
+        results['note'] = None
+
+    # --- Convert Percentages to Decimals ---
+    try:
+        old_fixed_rate = old_bond_fixed_rate_pct / 100.0
+        old_composite_rate = old_bond_composite_rate_pct / 100.0
+        new_fixed_rate = new_bond_fixed_rate_pct / 100.0
+        tax_rate = federal_tax_rate_pct / 100.0
+    except TypeError:
+        results['error'] = "Invalid non-numeric rate/percentage detected."
+        return results
+
+    # --- Calculate Bond Age ---
+    today = as_of or date.today()
+    try:
+        # Ensure old_bond_issue_date is a date object
+        if not isinstance(old_bond_issue_date, date):
+             # Attempt conversion if it's a string (should be date object already)
+             if isinstance(old_bond_issue_date, str):
+                 old_bond_issue_date = parse_issue_date(old_bond_issue_date)
+             else:
+                 raise TypeError("Issue date is not a valid date object or string.")
+        total_months_held = whole_months_between(old_bond_issue_date, today)
+        bond_age_years = int(total_months_held / 12) # Truncates toward zero, like relativedelta
+        bond_age_months = total_months_held - bond_age_years * 12
+        results['age_str'] = f"{bond_age_years} years, {bond_age_months} months ({total_months_held} total months)"
+        results['total_months_held'] = total_months_held
+    except Exception as e:
+        results['error'] = f"Could not calculate age from issue date {old_bond_issue_date}: {e}"
+        return results # Stop calculation for this bond
+
+    # --- Check Minimum Holding Period ---
+    if total_months_held < 12:
+        results['error'] = "Cannot be redeemed (held less than 12 months)."
+        if instrumented:
+            INSTRUMENTATION.count_error('under_12_months')
+        # Don't return yet, still useful to show other info like age
+        results['penalty_applies'] = False # No penalty if cannot redeem
+        results['penalty'] = 0.0
+        results['accrued_interest'] = max(0, old_bond_current_value - old_bond_principal)
+        results['taxes_owed'] = results['accrued_interest'] * tax_rate
+        results['immediate_cost'] = results['taxes_owed'] # No penalty applicable
+        results['net_proceeds'] = old_bond_current_value - results['immediate_cost']
+        results['compounded_fixed_rate_benefit'] = 0.0 # Cannot rotate
+        results['net_gain_or_loss'] = 0.0 # Cannot rotate
+        results['break_even_years'] = -1 # Not applicable
+        return results
+
+
+    # --- Calculate Early Withdrawal Penalty ---
+    penalty = 0.0
+    penalty_applies = False
+    if total_months_held < 60: # Less than 5 years (5 * 12 = 60 months)
+        penalty_applies = True
+        # Estimate penalty: 3 months interest based on the *current* composite rate
+        three_months_interest = old_bond_current_value * (old_composite_rate / 4.0)
+        penalty = three_months_interest
+    results['penalty_applies'] = penalty_applies
+    results['penalty'] = penalty
+
+    # --- Calculate Accrued Interest & Taxes ---
+    accrued_interest = max(0, old_bond_current_value - old_bond_principal) # Ensure non-negative
+    taxes_owed = accrued_interest * tax_rate
+    results['accrued_interest'] = accrued_interest
+    results['taxes_owed'] = taxes_owed
+
+    # --- Calculate Costs and Net Proceeds ---
+    immediate_cost = penalty + taxes_owed
+    net_proceeds = old_bond_current_value - immediate_cost
+    results['immediate_cost'] = immediate_cost
+    results['net_proceeds'] = net_proceeds
+
+    if net_proceeds <= 0:
+         results['error'] = "Calculated Net Proceeds are zero or negative after costs. Rotation not possible/sensible."
+         results['compounded_fixed_rate_benefit'] = 0.0
+         results['net_gain_or_loss'] = -immediate_cost # Net loss is the cost itself
+         results['break_even_years'] = -1
+         return results # Stop calculation
+
+    # --- Calculate Compounded Benefit of Fixed Rate Difference (over specified horizon) ---
+    try:
+        # Ensure horizon is positive integer
+        if not isinstance(investment_horizon_years, int) or investment_horizon_years <= 0:
+             raise ValueError("Investment horizon must be a positive integer.")
+
+        fv_new_fixed = net_proceeds * math.pow((1 + new_fixed_rate), investment_horizon_years)
+        fv_old_fixed = net_proceeds * math.pow((1 + old_fixed_rate), investment_horizon_years)
+        compounded_fixed_rate_benefit = fv_new_fixed - fv_old_fixed
+        results['compounded_fixed_rate_benefit'] = compounded_fixed_rate_benefit
+    except OverflowError:
+         results['error'] = "Calculation resulted in overflow (likely very large horizon or rates)."
+         return results
+    except ValueError as ve:
+         results['error'] = f"Math domain error during compounding: {ve} (check rates/horizon)."
+         return results
+
+
+    # --- Compare Benefit vs. Cost (over specified horizon) ---
+    net_gain_or_loss = compounded_fixed_rate_benefit - immediate_cost
+    results['net_gain_or_loss'] = net_gain_or_loss
+
+    # --- Calculate Break-Even Point ---
+    break_even_years = -1
+    if immediate_cost > 0 and new_fixed_rate > old_fixed_rate:
+        if instrumented:
+            started = time.perf_counter()
+        break_even_years = solve_break_even(
+            net_proceeds, immediate_cost, old_fixed_rate, new_fixed_rate,
+            max_years=break_even_max_years, periods_per_year=break_even_periods_per_year
+        )
+        if instrumented:
+            INSTRUMENTATION.add_time('break_even', time.perf_counter() - started)
+    elif immediate_cost <= 0 and new_fixed_rate > old_fixed_rate:
+         break_even_years = 0 # No cost to recoup, benefit starts immediately if rate is higher
+    results['break_even_years'] = break_even_years
+    results['max_years_to_check'] = break_even_max_years
+
+    results['error'] = None # No error if calculation completes this far
+    return results
+
+
+# --- CSV Parsing (shared by the GUI and the headless pipeline) ---
+REQUIRED_CSV_COLUMNS = {
+    CSV_COL_CONFIRMATION, CSV_COL_ISSUE_DATE, CSV_COL_FIXED_RATE,
+    CSV_COL_COMPOSITE_RATE, CSV_COL_PRINCIPAL, CSV_COL_CURRENT_VALUE
+}
+DERIVABLE_CSV_COLUMNS = {CSV_COL_FIXED_RATE, CSV_COL_COMPOSITE_RATE, CSV_COL_CURRENT_VALUE} # Filled in from the rate table
+
+
+def missing_csv_columns(fieldnames, derive_rates=False):
+    """Returns the set of required columns absent from a CSV header.
+
+    With derive_rates, the columns the rate table can fill in are optional.
+    """
+    required = REQUIRED_CSV_COLUMNS - DERIVABLE_CSV_COLUMNS if derive_rates else REQUIRED_CSV_COLUMNS
+    return required - set(map(str.strip, fieldnames))
+
+
+def _float_or_nan(text):
+    """float(text), with a blank field read as NaN (a value the rate table fills in)."""
+    return float(text) if text else math.nan
+
+
+def parse_bond_rows(reader, as_of=None, derive_rates=False):
+    """Validates csv.DictReader rows. Yields (bond_input, warning) pairs where exactly one is None.
+
+    Issue dates after as_of (default today) are rejected. With derive_rates, blank or absent
+    DERIVABLE_CSV_COLUMNS are read as NaN for ibond.rates to fill in.
+    """
+    today = as_of or date.today()
+    to_optional = _float_or_nan if derive_rates else float
+    line_num = 1
+    parse_date = parse_issue_date
+    instrumented = INSTRUMENTATION.enabled
+    if instrumented:
+        reader = INSTRUMENTATION.timed_iter(reader, 'csv_read')
+        parse_date = _timed_parse_issue_date
+    count_error = INSTRUMENTATION.count_error
+    for row in reader:
+        line_num += 1
+        confirmation_num = None
+        if instrumented:
+            INSTRUMENTATION.count('rows_read')
+        try:
+            confirmation_num = row[CSV_COL_CONFIRMATION].strip()
+            if not confirmation_num: # Skip rows with blank confirmation
+                 count_error('blank_confirmation')
+                 yield None, f"Skipping CSV line {line_num}: Blank confirmation number."
+                 continue
+
+            issue_date_str = row[CSV_COL_ISSUE_DATE].strip()
+            principal_str = row[CSV_COL_PRINCIPAL].strip()
+            if derive_rates:
+                fixed_rate_str = (row.get(CSV_COL_FIXED_RATE) or '').strip()
+                composite_rate_str = (row.get(CSV_COL_COMPOSITE_RATE) or '').strip()
+                current_value_str = (row.get(CSV_COL_CURRENT_VALUE) or '').strip()
+            else:
+                fixed_rate_str = row[CSV_COL_FIXED_RATE].strip()
+                composite_rate_str = row[CSV_COL_COMPOSITE_RATE].strip()
+                current_value_str = row[CSV_COL_CURRENT_VALUE].strip()
+
+            bond_input = {
+                "confirmation": confirmation_num,
+                "issue_date": parse_date(issue_date_str),
+                "fixed_rate_pct": to_optional(fixed_rate_str),
+                "composite_rate_pct": to_optional(composite_rate_str),
+                "principal": float(principal_str),
+                "current_value": to_optional(current_value_str),
+                "csv_line": line_num
+            }
+
+            if bond_input["fixed_rate_pct"] < 0 or \
+               bond_input["composite_rate_pct"] < 0 or \
+               bond_input["principal"] < 0 or \
+               bond_input["current_value"] < 0:
+                count_error('negative_value')
+                yield None, f"Skipping CSV line {line_num} (Conf: {confirmation_num}): Negative numeric value(s)."
+                continue
+            if bond_input["issue_date"] > today:
+                count_error('future_date')
+                yield None, f"Skipping CSV line {line_num} (Conf: {confirmation_num}): Future issue date."
+                continue
+
+            yield bond_input, None
+
+        except ValueError as ve:
+            count_error('conversion_error')
+            yield None, f"Skipping CSV line {line_num} (Conf: {confirmation_num}): Data conversion error - {ve}."
+        except KeyError as ke:
+            count_error('missing_column')
+            yield None, f"Skipping CSV line {line_num} (Conf: {confirmation_num}): Missing column key '{ke}'."
+        except Exception as e:
+            count_error('unexpected_error')
+            yield None, f"Skipping CSV line {line_num} (Conf: {confirmation_num}): Unexpected error - {e}."
+
+
+def _timed_parse_issue_date(text):
+    """parse_issue_date that adds its time to the date_parse timer (used while instrumenting)."""
+    started = time.perf_counter()
+    try:
+        return parse_issue_date(text)
+    finally:
+        INSTRUMENTATION.add_time('date_parse', time.perf_counter() - started)
+
+
+# --- CSV Sources (files, directories and glob patterns) ---
+CSV_SOURCE_SUFFIX = '.csv' # Files picked up from a directory source (case-insensitive)
+_GLOB_CHARACTERS = frozenset('*?[')
+
+
+def is_multi_file_source(sources):
+    """True when sources (a list of paths) can name more than one CSV: several paths, a directory or a glob."""
+    return len(sources) != 1 or os.path.isdir(sources[0]) or not _GLOB_CHARACTERS.isdisjoint(sources[0])
+
+
+def expand_csv_sources(sources):
+    """Expands files, directories (their CSV files) and glob patterns into a sorted list of unique paths.
+
+    Plain file paths are kept even if they do not exist, so the caller can report them.
+    """
+    import glob # Only multi-file runs need it; keeps the single-CSV start-up lean
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            with os.scandir(source) as entries:
+                paths.update(entry.path for entry in entries
+                             if entry.name.lower().endswith(CSV_SOURCE_SUFFIX) and entry.is_file())
+        elif not _GLOB_CHARACTERS.isdisjoint(source):
+            paths.update(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        else:
+            paths.add(source)
+    return sorted({os.path.normpath(path) for path in paths})
+
+
+# --- Result CSV (shared by the scalar fast path and the headless pipeline) ---
+RESULT_CSV_COLUMNS = [
+    'Confirmation', 'CSV Line', 'Total Months Held', 'Penalty Applies', 'Penalty',
+    'Accrued Interest', 'Taxes Owed', 'Immediate Cost', 'Net Proceeds',
+    'Compounded Fixed Rate Benefit', 'Net Gain or Loss', 'Break-Even Years',
+    'Error', 'Warning', 'Note'
+]
+
+
+def read_csv_rows(csv_filename, derive_rates=False):
+    """Pipeline stage: yields csv.DictReader rows one at a time. Raises ValueError for a bad header.
+
+    With derive_rates, the DERIVABLE_CSV_COLUMNS may be absent.
+    """
+    with open(csv_filename, mode='r', newline='', encoding='utf-8-sig') as csvfile:
+        reader = csv.DictReader(csvfile)
+        if not reader.fieldnames:
+            raise ValueError(f"CSV file '{os.path.basename(csv_filename)}' appears to be empty or has no header.")
+        missing = missing_csv_columns(reader.fieldnames, derive_rates)
+        if missing:
+            raise ValueError(f"CSV file '{os.path.basename(csv_filename)}' is missing required columns: {', '.join(missing)}")
+        yield from reader
+
+
+class RotationSummary:
+    """Running totals for the result sinks that count each confirmation number once.
+
+    As in BondPortfolioBuilder(deduplicate=True) the last row of a repeated confirmation is the one
+    counted: earlier rows stay in the written results but leave the totals, so a streamed CSV gives
+    the same totals as the whole-portfolio analysis. as_dict() is the sinks' summary dictionary.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.warnings = 0
+        self.recommended_count = 0
+        self.total_net_gain = 0.0
+        self._counted = {} # Confirmation -> (CSV line, net gain counted in the totals, 0.0 if not recommended)
+
+    def add_rows(self, confirmations, csv_lines, counted_gains):
+        """Counts analyzed rows; counted_gains holds each row's net gain if it is recommended, else 0.0.
+
+        Returns a warning for every row that replaces an earlier row of the same confirmation.
+        """
+        warnings = []
+        counted = self._counted
+        for confirmation, csv_line, gain in zip(confirmations, csv_lines, counted_gains):
+            earlier = counted.get(confirmation)
+            if earlier is not None:
+                warnings.append(f"Duplicate confirmation {confirmation}: line {csv_line} replaces line {earlier[0]} "
+                                f"in the totals.")
+                self.processed -= 1
+                if earlier[1] > 0:
+                    self.recommended_count -= 1
+                    self.total_net_gain -= earlier[1]
+            counted[confirmation] = (csv_line, gain)
+            self.processed += 1
+            if gain > 0:
+                self.recommended_count += 1
+                self.total_net_gain += gain
+        self.warnings += len(warnings)
+        return warnings
+
+    def as_dict(self):
+        return {'processed': self.processed, 'warnings': self.warnings, 'recommended_count': self.recommended_count,
+                'total_net_gain': self.total_net_gain}
+
+
+def write_scalar_rotation_results(parsed_rows, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                                  output_file, warnings_file, as_of=None):
+    """write_rotation_results for small inputs: one calculate_rotation_metrics call per bond, no NumPy.
+
+    Writes the same RESULT_CSV_COLUMNS rows and returns the same summary dictionary (see RotationSummary).
+    """
+    writer = csv.writer(output_file)
+    writer.writerow(RESULT_CSV_COLUMNS)
+    summary = RotationSummary()
+    nan = float('nan')
+    for bond_input, warning in parsed_rows:
+        if warning is not None:
+            warnings_file.write(warning + "\n")
+            summary.warnings += 1
+            continue
+
+        metrics = calculate_rotation_metrics(
+            bond_input['principal'], bond_input['issue_date'], bond_input['fixed_rate_pct'],
+            bond_input['current_value'], bond_input['composite_rate_pct'],
+            new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, as_of=as_of
+        )
+        INSTRUMENTATION.count('bonds_analyzed')
+        net_gain_or_loss = float(metrics.get('net_gain_or_loss', nan))
+        writer.writerow([
+            bond_input['confirmation'], bond_input['csv_line'], metrics['total_months_held'],
+            metrics['penalty_applies'], float(metrics['penalty']), float(metrics['accrued_interest']),
+            float(metrics['taxes_owed']), float(metrics['immediate_cost']), float(metrics['net_proceeds']),
+            float(metrics.get('compounded_fixed_rate_benefit', nan)), net_gain_or_loss,
+            metrics.get('break_even_years', -1), metrics['error'] or '', metrics['warning'] or '', metrics['note'] or ''
+        ])
+        recommended = metrics['error'] is None and net_gain_or_loss > 0
+        for duplicate in summary.add_rows((bond_input['confirmation'],), (bond_input['csv_line'],),
+                                          (net_gain_or_loss if recommended else 0.0,)):
+            warnings_file.write(duplicate + "\n")
+    return summary.as_dict()
@@ -0,0 +1,46 @@
+"""Default values and CSV configuration shared by the GUI, the CLI and the engines.
+
+Kept free of third-party imports so the command line can build its argument parser
+without loading NumPy or Tk.
+"""
+
+# --- Default Values (Used for GUI initialization) ---
+DEFAULT_NEW_BOND_FIXED_RATE_PCT = 1.3
+DEFAULT_FEDERAL_TAX_RATE_PCT = 22.0
+DEFAULT_INVESTMENT_HORIZON_YEARS = 10
+# --- CSV File Configuration ---
+CSV_COL_CONFIRMATION = 'Confirmation'
+CSV_COL_ISSUE_DATE = 'Issue Date'
+CSV_COL_FIXED_RATE = 'Fixed Rate'
+CSV_COL_COMPOSITE_RATE = 'Composite Interest rate'
+CSV_COL_PRINCIPAL = 'Original amount'
+CSV_COL_CURRENT_VALUE = 'Current Value'
+# --- Headless Pipeline ---
+DEFAULT_PIPELINE_CHUNK_SIZE = 10000
+SCALAR_FAST_PATH_MAX_BYTES = 64 * 1024 # Plain CLI runs on CSVs up to this size skip NumPy entirely
+# --- Multi-File Ingestion ---
+WATCH_DEFAULT_INTERVAL_S = 10.0 # Seconds between --watch passes over the CSV sources
+# --- Horizon Curve ---
+HORIZON_CURVE_DEFAULT_YEARS = 50 # Horizons --horizon-curve evaluates (1 .. this many years)
+# --- As-Of-Date Backtest ---
+BACKTEST_FREQUENCIES = ('month-end', 'month-start', 'week', 'day')
+# --- Redemption Timing ---
+TIMING_DEFAULT_MONTHS = 24 # Upcoming months --timing searches for the best redemption month
+# --- Bulk Export ---
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet') # Parquet needs pyarrow
+EXPORT_BATCH_ROWS = 50000 # Bonds converted and written per export batch (one Parquet row group)
+# --- Persistent Result Cache and Snapshots ---
+DEFAULT_RESULT_CACHE_MAX_ENTRIES = 2000000
+SNAPSHOT_SUFFIX = '.ibsnap'
+# --- Local Analysis Service ---
+SERVICE_DEFAULT_HOST = '127.0.0.1'
+SERVICE_DEFAULT_PORT = 8765
+SERVICE_BATCH_WINDOW_MS = 5 # How long the dispatcher waits to group small requests
+SERVICE_MAX_PENDING_BONDS = 500000 # Queued + running bonds before new requests get 503
+# --- Monte Carlo Inflation Simulation ---
+MC_INFLATION_MEAN_PCT = 1.25 # Long-run semiannual inflation rate (about 2.5% a year)
+MC_INFLATION_VOLATILITY_PCT = 0.6 # Standard deviation of each announcement's shock
+# --- Purchase Limit Optimizer ---
+PURCHASE_LIMIT_PER_SSN = 10000.0 # Electronic I bond purchases per SSN per calendar year
+OPTIMIZER_DEFAULT_YEARS = 5 # Calendar years (this one first) the plan may spread rotations over
+OPTIMIZER_METHODS = ('auto', 'dp', 'greedy')
@@ -0,0 +1,228 @@
+"""Bulk export: per-bond results and run parameters streamed to CSV, JSON Lines or Parquet in buffered batches."""
+import csv
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+
+from .batch import BATCH_ERROR_MESSAGES, recommended_net_gains
+from .core import RotationSummary
+from .defaults import EXPORT_BATCH_ROWS, EXPORT_FORMATS
+from .instrumentation import INSTRUMENTATION
+
+
+# --- Export Fields (one record per bond; identical names in every format) ---
+EXPORT_FIELDS = [
+    'confirmation', 'csv_line', 'issue_date', 'principal', 'current_value', 'fixed_rate_pct', 'composite_rate_pct',
+    'total_months_held', 'penalty_applies', 'penalty', 'accrued_interest', 'taxes_owed', 'immediate_cost',
+    'net_proceeds', 'compounded_fixed_rate_benefit', 'net_gain_or_loss', 'break_even_years',
+    'error_code', 'warning_code', 'note_code', 'error',
+    'new_bond_fixed_rate_pct', 'federal_tax_rate_pct', 'investment_horizon_years', 'as_of',
+]
+EXPORT_SOURCE_FIELD = 'source_file' # Appended for portfolios merged from several CSVs
+_METRIC_FIELDS = (
+    'total_months_held', 'penalty_applies', 'penalty', 'accrued_interest', 'taxes_owed', 'immediate_cost',
+    'net_proceeds', 'compounded_fixed_rate_benefit', 'net_gain_or_loss', 'break_even_years',
+    'error_code', 'warning_code', 'note_code',
+)
+_STRING_FIELDS = ('confirmation', 'error', EXPORT_SOURCE_FIELD)
+_DATE_FIELDS = ('issue_date', 'as_of')
+_EXPORT_SUFFIXES = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet', '.pq': 'parquet'}
+_ERROR_TEXT = np.array([BATCH_ERROR_MESSAGES[code] for code in range(len(BATCH_ERROR_MESSAGES))], dtype=object)
+
+
+def check_export_format(path, export_format=None):
+    """The export format for path: export_format, else the one its suffix names.
+
+    Raises ValueError for an unknown format, a suffix that names none, Parquet on stdout ('-'),
+    or Parquet without pyarrow installed.
+    """
+    if export_format is None:
+        export_format = _EXPORT_SUFFIXES.get(os.path.splitext(path)[1].lower())
+        if export_format is None:
+            raise ValueError(f"Cannot tell the export format of '{path}'; name a .csv, .jsonl or .parquet file "
+                             "or give the format.")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}' (expected one of {', '.join(EXPORT_FORMATS)}).")
+    if export_format == 'parquet':
+        if path == '-':
+            raise ValueError("Parquet exports need a file path.")
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow).")
+    return export_format
+
+
+def _export_columns(portfolio, start, stop, sources):
+    """The EXPORT_FIELDS columns of rows start:stop as arrays (dates as datetime64, errors as text or None)."""
+    metrics = portfolio.metrics
+    params = portfolio.params
+    count = stop - start
+    columns = {
+        'confirmation': np.array(portfolio.confirmations[start:stop], dtype=object),
+        'csv_line': portfolio.csv_line[start:stop],
+        'issue_date': portfolio.issue_date[start:stop],
+        'principal': portfolio.principal[start:stop],
+        'current_value': portfolio.current_value[start:stop],
+        'fixed_rate_pct': portfolio.fixed_rate_pct[start:stop],
+        'composite_rate_pct': portfolio.composite_rate_pct[start:stop],
+    }
+    for key in _METRIC_FIELDS:
+        columns[key] = metrics[key][start:stop]
+    columns['error'] = _ERROR_TEXT[metrics['error_code'][start:stop]]
+    columns['new_bond_fixed_rate_pct'] = np.full(count, float(params['new_bond_fixed_rate_pct']))
+    columns['federal_tax_rate_pct'] = np.full(count, float(params['federal_tax_rate_pct']))
+    columns['investment_horizon_years'] = np.full(count, int(params['investment_horizon_years']), dtype=np.int64)
+    columns['as_of'] = np.full(count, np.datetime64(params['as_of'], 'D'))
+    if sources is not None:
+        columns[EXPORT_SOURCE_FIELD] = sources[portfolio.source_index[start:stop]]
+    return columns
+
+
+def _python_values(name, values):
+    """One column as a list of plain Python values; NaN, infinities, NaT and missing text become None.
+
+    (None is a blank CSV field and a JSON null; JSON has no NaN or Infinity.)
+    """
+    if name in _DATE_FIELDS:
+        return [None if text == 'NaT' else text for text in np.datetime_as_string(values, unit='D').tolist()]
+    if values.dtype.kind == 'f':
+        finite = np.isfinite(values)
+        if not finite.all():
+            return [value if keep else None for value, keep in zip(values.tolist(), finite.tolist())]
+    return values.tolist()
+
+
+# --- Format Writers (write(columns) per batch, close() once) ---
+class _CsvExportWriter:
+    def __init__(self, output_file, fields):
+        self.fields = fields
+        self._writer = csv.writer(output_file)
+        self._writer.writerow(fields)
+
+    def write(self, columns):
+        self._writer.writerows(zip(*(_python_values(name, columns[name]) for name in self.fields)))
+
+    def close(self):
+        pass
+
+
+class _JsonlExportWriter:
+    def __init__(self, output_file, fields):
+        self.fields = fields
+        self._output_file = output_file
+        self._encode = json.JSONEncoder(allow_nan=False, separators=(',', ':')).encode
+
+    def write(self, columns):
+        fields = self.fields
+        encode = self._encode
+        self._output_file.writelines(
+            encode(dict(zip(fields, row))) + "\n"
+            for row in zip(*(_python_values(name, columns[name]) for name in fields))
+        )
+
+    def close(self):
+        pass
+
+
+class _ParquetExportWriter:
+    """One Parquet row group per batch; the schema is fixed by the first batch."""
+
+    def __init__(self, path, fields):
+        import pyarrow
+        import pyarrow.parquet
+        self.fields = fields
+        self._pa = pyarrow
+        self._path = path
+        self._parquet = pyarrow.parquet
+        self._writer = None
+
+    def write(self, columns):
+        pa = self._pa
+        arrays = []
+        for name in self.fields:
+            values = columns[name]
+            if name in _STRING_FIELDS:
+                arrays.append(pa.array(values, type=pa.string()))
+            elif name in _DATE_FIELDS:
+                arrays.append(pa.array(values, type=pa.date32()))
+            else:
+                arrays.append(pa.array(values))
+        table = pa.Table.from_arrays(arrays, names=self.fields)
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is None: # No bonds: still leave a valid, empty file
+            pa = self._pa
+            empty = {name: [] for name in self.fields}
+            self._writer = self._parquet.ParquetWriter(self._path, pa.table(empty).schema)
+        self._writer.close()
+
+
+def export_rotation_results(events, path, warnings_file=None, export_format=None, include_source=False,
+                            batch_rows=EXPORT_BATCH_ROWS):
+    """Pipeline sink like write_rotation_results, writing EXPORT_FIELDS records to path ('-' for stdout).
+
+    Analyzed chunks are regrouped into batches of about batch_rows bonds, each converted and written
+    at once (one Parquet row group per batch), so memory stays bounded by the batch size whatever the
+    number of bonds. Warnings go to warnings_file when given. The format comes from export_format or
+    path's suffix (see check_export_format). Returns the write_rotation_results summary dictionary.
+    """
+    export_format = check_export_format(path, export_format)
+    fields = EXPORT_FIELDS + [EXPORT_SOURCE_FIELD] if include_source else list(EXPORT_FIELDS)
+    summary = RotationSummary()
+    pending = [] # Column dicts waiting to fill a batch
+    pending_rows = 0
+
+    output_file = None
+    if export_format == 'parquet':
+        writer = _ParquetExportWriter(path, fields)
+    else:
+        output_file = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        writer = (_CsvExportWriter if export_format == 'csv' else _JsonlExportWriter)(output_file, fields)
+
+    def flush():
+        with INSTRUMENTATION.timer('write_results'):
+            if len(pending) == 1:
+                writer.write(pending[0])
+            else:
+                writer.write({name: np.concatenate([columns[name] for columns in pending]) for name in fields})
+        pending.clear()
+
+    try:
+        for event in events:
+            if event[0] == 'warning':
+                if warnings_file is not None:
+                    warnings_file.write(event[1] + "\n")
+                summary.warnings += 1
+                continue
+
+            portfolio = event[1]
+            sources = np.array(portfolio.source_files, dtype=object) if include_source else None
+            for start in range(0, len(portfolio), batch_rows):
+                stop = min(start + batch_rows, len(portfolio))
+                pending.append(_export_columns(portfolio, start, stop, sources))
+                pending_rows += stop - start
+                if pending_rows >= batch_rows:
+                    flush()
+                    pending_rows = 0
+            for duplicate in summary.add_rows(portfolio.confirmations, portfolio.csv_line.tolist(),
+                                              recommended_net_gains(portfolio.metrics).tolist()):
+                if warnings_file is not None:
+                    warnings_file.write(duplicate + "\n")
+        if pending:
+            flush()
+        writer.close()
+    finally:
+        if output_file is not None and output_file is not sys.stdout:
+            output_file.close()
+    return summary.as_dict()
+
+
+def export_portfolio(portfolio, path, export_format=None, batch_rows=EXPORT_BATCH_ROWS):
+    """Exports an analyzed BondPortfolio (with a source_file field when it was merged from several CSVs)."""
+    return export_rotation_results([('results', portfolio)], path, export_format=export_format,
+                                   include_source=portfolio.source_files is not None, batch_rows=batch_rows)
@@ -0,0 +1,1010 @@
+"""Tk desktop application: parameters, a background analysis worker, the virtualized results table and details."""
+import csv
+import functools
+import os
+import queue
+import sys
+import threading
+import time
+import tkinter as tk
+from datetime import date
+from tkinter import ttk, messagebox # Import messagebox for potential errors
+from tkinter import filedialog
+from tkinter import scrolledtext
+
+import numpy as np
+
+from .batch import horizon_curve_rows
+from .cache import DEFAULT_RESULT_CACHE_PATH, RotationResultCache
+from .core import expand_csv_sources, is_multi_file_source, missing_csv_columns, parse_bond_rows
+from .defaults import DEFAULT_FEDERAL_TAX_RATE_PCT, DEFAULT_INVESTMENT_HORIZON_YEARS, DEFAULT_NEW_BOND_FIXED_RATE_PCT
+from .export import check_export_format, export_portfolio
+from .ingest import MultiFileAnalysis, file_signature
+from .instrumentation import INSTRUMENTATION
+from .optimizer import format_plan_summary
+from .portfolio import TABLE_STATUS_LABELS, BondPortfolioBuilder
+from .rates import RateTableCheck, load_rate_table
+from .snapshot import default_snapshot_path, open_portfolio_snapshot, write_portfolio_snapshot
+
+# --- Background Analysis (GUI worker thread) ---
+WORKER_POLL_INTERVAL_MS = 100 # How often the Tk thread drains the worker queue
+WORKER_PROGRESS_INTERVAL_S = 0.25 # Minimum time between progress messages
+WORKER_CANCEL_CHECK_ROWS = 500 # Rows between cancel/progress checks
+WHAT_IF_DELAY_MS = 400 # Debounce before a parameter edit re-analyzes the loaded bonds
+# --- Results Table ---
+TABLE_FILTER_CHOICES = ["All bonds", "Recommended only", "Not recommended", "Errors only"]
+TABLE_FILTER_DELAY_MS = 250 # Debounce for the filter text box
+DETAIL_CACHE_SIZE = 512 # Rendered detail texts kept by the LRU cache
+# --- Horizon Chart ---
+CHART_WIDTH = 280
+CHART_HEIGHT = 200
+CHART_MARGIN = 34 # Pixels left for the axis labels
+CHART_MIN_YEARS = 20 # The chart spans at least this many years, more to show the horizon and break-even
+
+
+# --- Virtualized Results Table (GUI widget) ---
+class VirtualResultsTable(ttk.Frame):
+    """A ttk.Treeview that only materializes the rows currently in view.
+
+    Rows live in parallel column arrays. Sorting and filtering only rebuild an index array,
+    and scrolling re-renders a window of at most visible_rows items, so the widget cost does
+    not grow with the number of bonds.
+    """
+
+    def __init__(self, master, columns, on_select, visible_rows=10):
+        super().__init__(master)
+        self._columns = columns # [(key, heading, width, anchor, formatter), ...]
+        self._on_select = on_select
+        self._visible_rows = visible_rows
+        self._data = {}
+        self._base_order = np.empty(0, dtype=np.int64) # Sorted order over all rows
+        self._order = self._base_order # Sorted order restricted to the filter
+        self._filter_mask = None
+        self._sort_key = None
+        self._sort_descending = False
+        self._offset = 0
+        self._selected_row = None
+
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns], show='headings',
+                                 height=visible_rows, selectmode='browse')
+        for key, heading, width, anchor, _ in columns:
+            self.tree.heading(key, text=heading, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor=anchor, stretch=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+        self.tree.bind('<Up>', lambda event: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda event: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda event: self._move_selection(-self._visible_rows))
+        self.tree.bind('<Next>', lambda event: self._move_selection(self._visible_rows))
+
+    @property
+    def row_count(self):
+        """Number of rows passing the current filter."""
+        return len(self._order)
+
+    def set_data(self, data):
+        """Replaces the table contents with new column arrays (all of equal length)."""
+        self._data = data
+        row_count = len(next(iter(data.values()))) if data else 0
+        self._base_order = np.arange(row_count)
+        self._filter_mask = None
+        self._sort_key = None
+        self._sort_descending = False
+        self._selected_row = None
+        self._update_headings()
+        self._apply_order()
+
+    def sort_by(self, key):
+        """Sorts by a column; sorting the same column again reverses the direction."""
+        if not self._data:
+            return
+        self._sort_descending = not self._sort_descending if key == self._sort_key else False
+        self._sort_key = key
+        order = np.argsort(self._data[key], kind='stable')
+        self._base_order = order[::-1] if self._sort_descending else order
+        self._update_headings()
+        self._apply_order()
+
+    def set_filter(self, mask):
+        """Shows only rows where mask is True (None shows every row)."""
+        self._filter_mask = mask
+        self._apply_order()
+
+    def select_first(self):
+        """Selects the first visible row, if any."""
+        if self.row_count:
+            self._select_position(0)
+
+    def scroll(self, delta):
+        """Scrolls by delta rows."""
+        self._scroll_to(self._offset + delta)
+        return 'break'
+
+    def _update_headings(self):
+        for key, heading, _, _, _ in self._columns:
+            arrow = (" \u25bc" if self._sort_descending else " \u25b2") if key == self._sort_key else ""
+            self.tree.heading(key, text=heading + arrow)
+
+    def _apply_order(self):
+        order = self._base_order
+        if self._filter_mask is not None:
+            order = order[self._filter_mask[order]]
+        self._order = order
+        self._offset = 0
+        self._render()
+
+    def _scroll_to(self, offset):
+        offset = max(0, min(offset, self.row_count - self._visible_rows))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (self._visible_rows if args[2] == 'pages' else 1)
+            self.scroll(step)
+
+    def _render(self):
+        """Re-inserts only the rows inside the visible window."""
+        self.tree.delete(*self.tree.get_children())
+        rows = self._order[self._offset:self._offset + self._visible_rows].tolist()
+        for row in rows:
+            values = [formatter(self._data[key][row]) for key, _, _, _, formatter in self._columns]
+            self.tree.insert('', tk.END, iid=str(row), values=values)
+        if self._selected_row is not None and self.tree.exists(str(self._selected_row)):
+            self.tree.selection_set(str(self._selected_row))
+        if self.row_count:
+            self.scrollbar.set(self._offset / self.row_count, (self._offset + len(rows)) / self.row_count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_tree_select(self, event=None):
+        selection = self.tree.selection()
+        if selection and int(selection[0]) != self._selected_row:
+            self._selected_row = int(selection[0])
+            self._on_select(self._selected_row)
+
+    def _move_selection(self, step):
+        if not self.row_count:
+            return 'break'
+        position = 0
+        if self._selected_row is not None:
+            matches = np.flatnonzero(self._order == self._selected_row)
+            position = int(matches[0]) + step if matches.size else 0
+        self._select_position(max(0, min(position, self.row_count - 1)))
+        return 'break'
+
+    def _select_position(self, position):
+        if position < self._offset:
+            self._offset = position
+        elif position >= self._offset + self._visible_rows:
+            self._offset = position - self._visible_rows + 1
+        self._selected_row = int(self._order[position])
+        self._render()
+        self.tree.focus(str(self._selected_row))
+        self._on_select(self._selected_row)
+
+
+# --- GUI Application Class ---
+class IBondAnalyzerApp:
+    def __init__(self, master):
+        self.master = master
+        master.title("I Bond Rotation Analyzer")
+        master.geometry("800x750") # Increased size slightly
+
+        # --- Data Storage ---
+        self.portfolio = None # BondPortfolio holding the inputs, results and parameters of the last run
+        self.horizon_curve = None # BondPortfolio.horizon_curve of the last run, charted for the selected bond
+
+        # --- Background Analysis State ---
+        self._worker = None # Thread running _analysis_worker
+        self._worker_queue = queue.Queue() # Worker -> GUI messages, drained by _poll_worker_queue
+        self._cancel_event = threading.Event()
+        self._analysis_started = 0.0
+        self._warnings_logged = False
+
+        # --- What-If State (parameter edits re-analyze the loaded bonds without re-reading the CSV) ---
+        self._loaded_source = None # _source_key of the bonds in self.portfolio
+        self._pending_source = None # _source_key of the run in progress
+        self._what_if_after_id = None
+
+        # --- Results Table State ---
+        self.results_table_data = {} # Column arrays from BondPortfolio.results_table
+        self._filter_after_id = None
+        self._detail_cache = functools.lru_cache(maxsize=DETAIL_CACHE_SIZE)(self._cached_bond_details)
+
+        # --- Variables for input fields ---
+        self.csv_filepath = tk.StringVar()
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Repository root, next to the launcher
+        default_csv = os.path.join(script_dir, 'my_i_bonds.csv')
+        self.csv_filepath.set(default_csv)
+
+        self.new_rate_var = tk.DoubleVar(value=DEFAULT_NEW_BOND_FIXED_RATE_PCT)
+        self.tax_rate_var = tk.DoubleVar(value=DEFAULT_FEDERAL_TAX_RATE_PCT)
+        self.horizon_var = tk.IntVar(value=DEFAULT_INVESTMENT_HORIZON_YEARS)
+        self.use_cache_var = tk.BooleanVar(value=False)
+        self.instrument_var = tk.BooleanVar(value=False)
+        self.ssn_count_var = tk.IntVar(value=1)
+        self.derive_rates_var = tk.BooleanVar(value=False)
+        for variable in (self.new_rate_var, self.tax_rate_var, self.horizon_var, self.ssn_count_var):
+            variable.trace_add('write', lambda *args: self._schedule_what_if())
+
+        # --- Create Widgets ---
+        self.create_widgets()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self.master, padding="10 10 10 10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.master.columnconfigure(0, weight=1)
+        self.master.rowconfigure(0, weight=1) # Allow main frame to expand
+
+        # --- Input Parameter Section (Row 0) ---
+        input_frame = ttk.LabelFrame(main_frame, text="Parameters", padding="10")
+        input_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        input_frame.columnconfigure(1, weight=1)
+        # (Widgets inside input_frame remain the same as before)
+        ttk.Label(input_frame, text="CSV File, Folder or Glob:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
+        csv_entry = ttk.Entry(input_frame, textvariable=self.csv_filepath, width=60)
+        csv_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=5, pady=2)
+        browse_button = ttk.Button(input_frame, text="Browse...", command=self.browse_file)
+        browse_button.grid(row=0, column=2, sticky=tk.E, padx=5, pady=2)
+        browse_folder_button = ttk.Button(input_frame, text="Folder...", command=self.browse_folder)
+        browse_folder_button.grid(row=0, column=3, sticky=tk.E, padx=5, pady=2)
+        ttk.Label(input_frame, text="New Bond Fixed Rate (%):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+        new_rate_entry = ttk.Entry(input_frame, textvariable=self.new_rate_var, width=10)
+        new_rate_entry.grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(input_frame, text="Federal Tax Rate (%):").grid(row=2, column=0, sticky=tk.W, padx=5, pady=2)
+        tax_rate_entry = ttk.Entry(input_frame, textvariable=self.tax_rate_var, width=10)
+        tax_rate_entry.grid(row=2, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(input_frame, text="Investment Horizon (Years):").grid(row=3, column=0, sticky=tk.W, padx=5, pady=2)
+        horizon_entry = ttk.Entry(input_frame, textvariable=self.horizon_var, width=10)
+        horizon_entry.grid(row=3, column=1, sticky=tk.W, padx=5, pady=2)
+        cache_check = ttk.Checkbutton(input_frame, text="Reuse cached CSV snapshot and results for unchanged bonds", variable=self.use_cache_var)
+        cache_check.grid(row=4, column=1, sticky=tk.W, padx=5, pady=2)
+        instrument_check = ttk.Checkbutton(input_frame, text="Show timing breakdown", variable=self.instrument_var)
+        instrument_check.grid(row=5, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(input_frame, text="SSNs for Purchase Limit:").grid(row=6, column=0, sticky=tk.W, padx=5, pady=2)
+        ssn_entry = ttk.Entry(input_frame, textvariable=self.ssn_count_var, width=10)
+        ssn_entry.grid(row=6, column=1, sticky=tk.W, padx=5, pady=2)
+        derive_check = ttk.Checkbutton(input_frame, text="Compute composite rate and current value from the Treasury rate table "
+                                       "(flags CSV values that disagree)", variable=self.derive_rates_var)
+        derive_check.grid(row=7, column=1, columnspan=3, sticky=tk.W, padx=5, pady=2)
+
+
+        # --- Action Buttons and Progress (Row 1) ---
+        action_frame = ttk.Frame(main_frame)
+        action_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=10)
+        action_frame.columnconfigure(2, weight=1)
+        self.analyze_button = ttk.Button(action_frame, text="Analyze Bonds from CSV", command=self.run_analysis)
+        self.analyze_button.grid(row=0, column=0, padx=(0, 5))
+        self.cancel_button = ttk.Button(action_frame, text="Cancel", command=self.cancel_analysis, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=1, padx=(0, 10))
+        self.progress_var = tk.DoubleVar(value=0.0)
+        progress_bar = ttk.Progressbar(action_frame, variable=self.progress_var, maximum=100.0, mode='determinate')
+        progress_bar.grid(row=0, column=2, sticky=(tk.W, tk.E))
+        self.export_button = ttk.Button(action_frame, text="Export Results...", command=self.export_results, state=tk.DISABLED)
+        self.export_button.grid(row=0, column=3, padx=(10, 0))
+
+        # --- Results Display Area (Row 2) ---
+        results_area_frame = ttk.Frame(main_frame)
+        results_area_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        main_frame.rowconfigure(2, weight=1) # Allow results area to expand vertically
+        results_area_frame.columnconfigure(0, weight=1) # Allow results area to expand horizontally
+
+        # Filter Bar
+        filter_frame = ttk.Frame(results_area_frame)
+        filter_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        filter_frame.columnconfigure(1, weight=1)
+        ttk.Label(filter_frame, text="Filter Confirmation:").grid(row=0, column=0, padx=(0, 5), sticky=tk.W)
+        self.filter_text_var = tk.StringVar()
+        self.filter_text_var.trace_add('write', lambda *args: self._schedule_table_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_text_var, width=30).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self.filter_show_var = tk.StringVar(value=TABLE_FILTER_CHOICES[0])
+        show_selector = ttk.Combobox(filter_frame, textvariable=self.filter_show_var, values=TABLE_FILTER_CHOICES, state="readonly", width=18)
+        show_selector.grid(row=0, column=2, padx=5)
+        show_selector.bind("<<ComboboxSelected>>", lambda event: self._apply_table_filter())
+        self.table_count_var = tk.StringVar(value="")
+        ttk.Label(filter_frame, textvariable=self.table_count_var).grid(row=0, column=3, sticky=tk.E)
+
+        # Results Table (click a heading to sort, click a row to view details)
+        self.results_table = VirtualResultsTable(results_area_frame, [
+            ('confirmation', "Confirmation", 160, tk.W, str),
+            ('issue_date', "Issue Date", 90, tk.CENTER, str),
+            ('months_held', "Months Held", 90, tk.E, lambda v: f"{v}" if v >= 0 else "N/A"),
+            ('net_gain', "Net Gain/(Loss)", 120, tk.E, lambda v: f"${v:,.2f}" if v == v else "N/A"),
+            ('break_even', "Break-Even (yrs)", 110, tk.E, lambda v: f"{v}" if v >= 0 else "N/A"),
+            ('status', "Conclusion", 150, tk.W, lambda v: TABLE_STATUS_LABELS[v]),
+        ], on_select=self.on_bond_select, visible_rows=10)
+        self.results_table.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+
+        # Detailed Results Text Area
+        detail_frame = ttk.LabelFrame(results_area_frame, text="Selected Bond Details", padding="10")
+        detail_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        results_area_frame.rowconfigure(2, weight=1) # Allow detail frame to expand
+        detail_frame.columnconfigure(0, weight=1)
+        detail_frame.rowconfigure(0, weight=1)
+
+        self.detail_text = scrolledtext.ScrolledText(detail_frame, wrap=tk.WORD, width=80, height=12, state=tk.DISABLED)
+        self.detail_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.chart_canvas = tk.Canvas(detail_frame, width=CHART_WIDTH, height=CHART_HEIGHT, background='white',
+                                      highlightthickness=1, highlightbackground='gray')
+        self.chart_canvas.grid(row=0, column=1, sticky=tk.N, padx=(10, 0))
+
+        # --- Summary Section (Row 3) ---
+        summary_frame = ttk.LabelFrame(main_frame, text="Overall Summary", padding="10")
+        summary_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        summary_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(summary_frame, text="Bonds Recommended for Rotation:").grid(row=0, column=0, sticky=tk.W, padx=5)
+        self.summary_count_var = tk.StringVar(value="N/A")
+        ttk.Label(summary_frame, textvariable=self.summary_count_var).grid(row=0, column=1, sticky=tk.W, padx=5)
+
+        ttk.Label(summary_frame, text="Total Estimated Net Gain (Horizon):").grid(row=1, column=0, sticky=tk.W, padx=5)
+        self.summary_gain_var = tk.StringVar(value="N/A")
+        ttk.Label(summary_frame, textvariable=self.summary_gain_var).grid(row=1, column=1, sticky=tk.W, padx=5)
+
+        ttk.Label(summary_frame, text="Year-by-Year Plan:").grid(row=2, column=0, sticky=tk.W, padx=5)
+        self.summary_plan_var = tk.StringVar(value="N/A")
+        ttk.Label(summary_frame, textvariable=self.summary_plan_var).grid(row=2, column=1, sticky=tk.W, padx=5)
+
+        # --- Status Bar (Row 4) ---
+        self.status_var = tk.StringVar(value="Ready")
+        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5,0))
+        self.timing_var = tk.StringVar(value="")
+        timing_bar = ttk.Label(main_frame, textvariable=self.timing_var, anchor=tk.W, wraplength=760)
+        timing_bar.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E))
+
+
+    def browse_file(self):
+        """Opens a file dialog to select a CSV file."""
+        filepath = filedialog.askopenfilename(
+            title="Select I Bond CSV File",
+            filetypes=(("CSV files", "*.csv"), ("All files", "*.*"))
+        )
+        if filepath:
+            self.csv_filepath.set(filepath)
+            self.status_var.set(f"Selected file: {os.path.basename(filepath)}")
+
+    def browse_folder(self):
+        """Opens a directory dialog; every CSV in the chosen folder is analyzed and merged."""
+        folder = filedialog.askdirectory(title="Select Folder of I Bond CSV Files")
+        if folder:
+            self.csv_filepath.set(folder)
+            self.status_var.set(f"Selected folder: {folder} ({len(expand_csv_sources([folder]))} CSV file(s))")
+
+    def _clear_results(self):
+        """Clears previous analysis results from GUI elements."""
+        self.portfolio = None
+        self.horizon_curve = None
+        self.chart_canvas.delete('all')
+        self._loaded_source = None
+        self.export_button.config(state=tk.DISABLED)
+        self.results_table_data = {}
+        self.results_table.set_data({})
+        self.table_count_var.set("")
+        self._detail_cache.cache_clear()
+        self.detail_text.config(state=tk.NORMAL)
+        self.detail_text.delete('1.0', tk.END)
+        self.detail_text.config(state=tk.DISABLED)
+        self.summary_count_var.set("N/A")
+        self.summary_gain_var.set("N/A")
+        self.summary_plan_var.set("N/A")
+        self.progress_var.set(0.0)
+        self.timing_var.set("")
+        self._warnings_logged = False
+
+    def _log_to_details(self, message):
+        """Appends a message to the detail results text area."""
+        self._log_lines_to_details([message])
+
+    def _log_lines_to_details(self, messages):
+        """Appends several lines to the detail results text area in a single insert."""
+        self.detail_text.config(state=tk.NORMAL)
+        self.detail_text.insert(tk.END, "".join(message + "\n" for message in messages))
+        self.detail_text.config(state=tk.DISABLED)
+        self.detail_text.see(tk.END) # Scroll to the end
+
+    def _format_bond_details(self, confirmation):
+        """Formats the analysis results for a single bond into a string."""
+        if self.portfolio is None or confirmation not in self.portfolio.index:
+            return "Error: Results not found for this bond."
+
+        row = self.portfolio.index[confirmation]
+        metrics = self.portfolio.row_metrics(row)
+        bond = self.portfolio.bond_input(row)
+        federal_tax_rate_pct = self.portfolio.params['federal_tax_rate_pct'] # Get the rate used for this analysis
+        investment_horizon_years = self.portfolio.params['investment_horizon_years'] # Get the horizon used
+
+        lines = []
+        lines.append(f"--- Details for Bond (Conf: {confirmation}) ---")
+        lines.append(f"    (Issued: {bond['issue_date']}, Fixed Rate: {bond['fixed_rate_pct']}%)")
+        lines.append(f"    (Principal: ${bond['principal']:,.2f}, Current Value: ${bond['current_value']:,.2f})")
+        if self.portfolio.source_files is not None:
+            source_file = self.portfolio.source_files[self.portfolio.source_index[row]]
+            lines.append(f"    (Source: {source_file}, CSV line {bond['csv_line']})")
+
+        analysis_error = metrics.get('error')
+
+        if metrics.get('warning'): lines.append(f"\nInput Warning: {metrics['warning']}")
+        if metrics.get('note'): lines.append(f"Note: {metrics['note']}")
+
+        lines.append(f"\nBond Age: {metrics.get('age_str', 'N/A')}")
+
+        if analysis_error == "Cannot be redeemed (held less than 12 months).":
+             lines.append(f"Status: {analysis_error}")
+             lines.append(f"Accrued Interest: ${metrics.get('accrued_interest', 0):,.2f}")
+             lines.append(f"Estimated Federal Taxes Owed (if redeemed later): ${metrics.get('taxes_owed', 0):,.2f}")
+             lines.append("-" * 25)
+             lines.append("Conclusion: Cannot rotate now.")
+             return "\n".join(lines)
+
+        if analysis_error:
+            lines.append(f"\nAnalysis Error: {analysis_error}")
+            return "\n".join(lines)
+
+        # Display normal results
+        if metrics.get('penalty_applies'):
+            lines.append(f"Penalty Applies (Held < 5 years): YES")
+            lines.append(f"  Estimated Penalty: ${metrics.get('penalty', 0):,.2f}")
+        else:
+            lines.append(f"Penalty Applies (Held >= 5 years): NO")
+            lines.append(f"  Estimated Penalty: $0.00")
+
+        lines.append(f"Accrued Interest: ${metrics.get('accrued_interest', 0):,.2f}")
+        lines.append(f"Estimated Federal Taxes Owed (at {federal_tax_rate_pct:.1f}%): ${metrics.get('taxes_owed', 0):,.2f}")
+        lines.append(f"Total Immediate Cost of Selling: ${metrics.get('immediate_cost', 0):,.2f}")
+        lines.append(f"Net Proceeds to Reinvest: ${metrics.get('net_proceeds', 0):,.2f}")
+        lines.append("-" * 25)
+        lines.append(f"Analysis for {investment_horizon_years}-Year Horizon:")
+
+        be_years = metrics.get('break_even_years', -1)
+        max_be_check = metrics.get('max_years_to_check', 100)
+        if be_years == 0: lines.append(f"Estimated Break-Even Point: Immediate (Year 0)")
+        elif be_years > 0: lines.append(f"Estimated Break-Even Point: Approx. {be_years} years")
+        elif be_years == -2: lines.append(f"Estimated Break-Even Point: Could not calculate accurately.")
+        elif metrics.get('new_rate_used', 0) <= bond['fixed_rate_pct'] and metrics.get('immediate_cost', 0) > 0 :
+             lines.append(f"Estimated Break-Even Point: Not applicable (New fixed rate not higher)")
+        elif metrics.get('immediate_cost', 0) > 0:
+             lines.append(f"Estimated Break-Even Point: Not reached within {max_be_check} years.")
+        else: lines.append(f"Estimated Break-Even Point: Not applicable (No cost, new rate not higher)")
+
+        lines.append(f"Compounded Benefit from Higher Fixed Rate: ${metrics.get('compounded_fixed_rate_benefit', 0):,.2f}")
+        lines.append(f"Net Financial Gain/(Loss) from Rotation: ${metrics.get('net_gain_or_loss', 0):,.2f}")
+        lines.append("-" * 25)
+
+        # Conclusion
+        lines.append("Conclusion for this Bond:")
+        net_gain_loss = metrics.get('net_gain_or_loss', 0)
+        if net_gain_loss > 0:
+            lines.append("  >> CONSIDER ROTATING: Potential net GAIN over horizon.")
+            if be_years > 0 and investment_horizon_years < be_years:
+                 lines.append(f"     (Note: Horizon {investment_horizon_years} yrs is SHORTER than break-even {be_years} yrs)")
+            elif be_years > 0 and investment_horizon_years >= be_years:
+                 lines.append(f"     (Note: Horizon {investment_horizon_years} yrs is LONGER than/equal to break-even {be_years} yrs)")
+        elif net_gain_loss < 0:
+             lines.append("  >> LIKELY DO NOT ROTATE: Potential net LOSS over horizon.")
+             if bond['fixed_rate_pct'] >= metrics.get('new_rate_used', 0):
+                 lines.append("     (Reason: New fixed rate isn't higher)")
+             elif metrics.get('immediate_cost', 0) > metrics.get('compounded_fixed_rate_benefit', 0):
+                 lines.append("     (Reason: Immediate costs outweigh fixed-rate benefit)")
+        else:
+            lines.append("  >> NEUTRAL: Estimated benefits roughly equal costs over horizon.")
+
+        return "\n".join(lines)
+
+
+    def _cached_bond_details(self, confirmation, federal_tax_rate_pct, investment_horizon_years, new_rate_pct):
+        """Cache target for detail text; the parameters are part of the LRU key."""
+        return self._format_bond_details(confirmation)
+
+    def on_bond_select(self, row):
+        """Handles the selection change in the results table."""
+        selected_confirmation = self.portfolio.confirmations[row]
+        params = self.portfolio.params
+
+        self.detail_text.config(state=tk.NORMAL)
+        self.detail_text.delete('1.0', tk.END)
+        details_string = self._detail_cache(
+            selected_confirmation, params['federal_tax_rate_pct'], params['investment_horizon_years'],
+            params['new_bond_fixed_rate_pct']
+        )
+        self.detail_text.insert('1.0', details_string)
+        self.detail_text.config(state=tk.DISABLED)
+        self._draw_horizon_chart(row)
+        self.status_var.set(f"Displaying details for {selected_confirmation}")
+
+    def _draw_horizon_chart(self, row):
+        """Charts the selected bond's net gain against the horizon, marking the chosen horizon and break-even."""
+        canvas = self.chart_canvas
+        canvas.delete('all')
+        if self.horizon_curve is None:
+            return
+        params = self.portfolio.params
+        horizon = params['investment_horizon_years']
+        break_even = float(self.portfolio.metrics['break_even_years'][row])
+        years = self.horizon_curve['horizon_years']
+        gains = horizon_curve_rows(self.horizon_curve, [row])[0]
+        span = max(CHART_MIN_YEARS, int(horizon * 1.5), int(break_even) + 2 if np.isfinite(break_even) else 0)
+        shown = years <= span
+        years, gains = years[shown], gains[shown]
+        if not np.isfinite(gains).any():
+            canvas.create_text(CHART_WIDTH // 2, CHART_HEIGHT // 2, text="No net gain curve\n(bond cannot be rotated)",
+                               justify=tk.CENTER, fill='gray')
+            return
+
+        low = min(0.0, float(np.nanmin(gains)))
+        high = max(0.0, float(np.nanmax(gains)))
+        if high == low:
+            high = low + 1.0
+        right = CHART_WIDTH - 8
+        bottom = CHART_HEIGHT - 20
+        x_scale = (right - CHART_MARGIN) / float(years[-1])
+        y_scale = (bottom - 8) / (high - low)
+
+        def x_of(year):
+            return CHART_MARGIN + year * x_scale
+
+        def y_of(gain):
+            return bottom - (gain - low) * y_scale
+
+        canvas.create_line(CHART_MARGIN, y_of(0.0), right, y_of(0.0), fill='gray', dash=(2, 2))
+        canvas.create_text(CHART_MARGIN - 2, y_of(high), text=f"${high:,.0f}", anchor=tk.NE, font=('TkDefaultFont', 7))
+        canvas.create_text(CHART_MARGIN - 2, y_of(low), text=f"${low:,.0f}", anchor=tk.SE, font=('TkDefaultFont', 7))
+        canvas.create_text(right, bottom + 4, text=f"{years[-1]:g} yrs", anchor=tk.NE, font=('TkDefaultFont', 7))
+        if horizon <= years[-1]:
+            canvas.create_line(x_of(horizon), 8, x_of(horizon), bottom, fill='blue', dash=(4, 2))
+            canvas.create_text(x_of(horizon), bottom + 4, text=f"{horizon}y", anchor=tk.N, fill='blue',
+                               font=('TkDefaultFont', 7))
+        if np.isfinite(break_even) and break_even <= years[-1]:
+            canvas.create_oval(x_of(break_even) - 3, y_of(0.0) - 3, x_of(break_even) + 3, y_of(0.0) + 3,
+                               outline='darkgreen', fill='darkgreen')
+        points = [] # Finite stretches of the curve become separate polylines
+        for year, gain in zip(([0.0] + years.tolist()), ([None] + gains.tolist())):
+            if gain is None or gain != gain:
+                if len(points) >= 4:
+                    canvas.create_line(*points, fill='black', width=2)
+                points = []
+                continue
+            points.extend((x_of(year), y_of(gain)))
+        if len(points) >= 4:
+            canvas.create_line(*points, fill='black', width=2)
+
+
+    def _schedule_table_filter(self):
+        """Debounces typing in the filter box."""
+        if self._filter_after_id is not None:
+            self.master.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.master.after(TABLE_FILTER_DELAY_MS, self._apply_table_filter)
+
+    def _apply_table_filter(self):
+        """Restricts the results table to rows matching the filter text and the Show choice."""
+        self._filter_after_id = None
+        data = self.results_table_data
+        if not data:
+            return
+        mask = None
+        show = self.filter_show_var.get()
+        if show == "Recommended only":
+            mask = data['recommended']
+        elif show == "Not recommended":
+            mask = ~data['recommended'] & ~data['has_error']
+        elif show == "Errors only":
+            mask = data['has_error']
+        text = self.filter_text_var.get().strip().lower()
+        if text:
+            text_mask = np.fromiter((text in confirmation.lower() for confirmation in data['confirmation']),
+                                    dtype=bool, count=len(data['confirmation']))
+            mask = text_mask if mask is None else (mask & text_mask)
+        self.results_table.set_filter(mask)
+        self.table_count_var.set(f"Showing {self.results_table.row_count:,} of {len(data['confirmation']):,} bonds")
+
+    @staticmethod
+    def _source_key(csv_filename, derive_rates):
+        """Identifies the bonds a CSV source yields: its files' sizes and modification times, the rate option and the day."""
+        paths = expand_csv_sources([csv_filename]) if is_multi_file_source([csv_filename]) else [csv_filename]
+        return csv_filename, tuple((path, file_signature(path)) for path in paths), derive_rates, date.today()
+
+    def _schedule_what_if(self):
+        """Debounces parameter edits; once typing pauses, the loaded bonds are re-analyzed."""
+        if self.portfolio is None:
+            return
+        if self._what_if_after_id is not None:
+            self.master.after_cancel(self._what_if_after_id)
+        self._what_if_after_id = self.master.after(WHAT_IF_DELAY_MS, self._run_what_if)
+
+    def _run_what_if(self):
+        """Re-runs the analysis for edited parameters, silently skipping values that are still being typed."""
+        self._what_if_after_id = None
+        if self.portfolio is None:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            self._schedule_what_if() # Try again once the current run is done
+            return
+        try:
+            if (self.new_rate_var.get() < 0 or self.tax_rate_var.get() < 0 or self.horizon_var.get() <= 0
+                    or self.ssn_count_var.get() <= 0):
+                return
+        except tk.TclError:
+            return
+        self.run_analysis()
+
+    def run_analysis(self):
+        """Validates parameters and starts the CSV analysis on a background worker thread.
+
+        When the CSV source is unchanged since the bonds on screen were read, they are re-analyzed
+        in place: only the analysis stages that depend on the edited parameters are recomputed.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            return # An analysis is already running
+        csv_filename = self.csv_filepath.get()
+        derive_rates = self.derive_rates_var.get()
+        source_key = self._source_key(csv_filename, derive_rates)
+        loaded_portfolio = self.portfolio if self.portfolio is not None and source_key == self._loaded_source else None
+        self._clear_results() # Clear previous results first
+        self.status_var.set("Starting analysis...")
+
+        # --- Get parameters from GUI ---
+        try:
+            new_bond_fixed_rate_pct = self.new_rate_var.get()
+            federal_tax_rate_pct = self.tax_rate_var.get()
+            investment_horizon_years = self.horizon_var.get()
+            ssn_count = self.ssn_count_var.get()
+
+            if new_bond_fixed_rate_pct < 0 or federal_tax_rate_pct < 0:
+                 raise ValueError("Rates cannot be negative.")
+            if investment_horizon_years <= 0:
+                 raise ValueError("Horizon must be a positive integer.")
+            if ssn_count <= 0:
+                 raise ValueError("SSN count must be a positive integer.")
+
+        except tk.TclError:
+            messagebox.showerror("Input Error", "Invalid numeric input for Rate, Horizon or SSN count.")
+            self.status_var.set("Error: Invalid input.")
+            return
+        except ValueError as ve:
+             messagebox.showerror("Input Error", f"Invalid input value: {ve}")
+             self.status_var.set("Error: Invalid input.")
+             return
+
+        # --- Hand the CSV off to the worker; results come back through the queue ---
+        self._cancel_event = threading.Event()
+        self._worker_queue = queue.Queue()
+        self._analysis_started = time.monotonic()
+        self.analyze_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        if loaded_portfolio is None:
+            self.status_var.set(f"Reading CSV: {os.path.basename(csv_filename)}...")
+        else:
+            self.status_var.set(f"Re-analyzing {len(loaded_portfolio):,} loaded bonds...")
+        self._pending_source = source_key
+        INSTRUMENTATION.enabled = self.instrument_var.get()
+        INSTRUMENTATION.reset()
+        use_cache = self.use_cache_var.get()
+        cache_path = DEFAULT_RESULT_CACHE_PATH if use_cache else None
+        multi_file = is_multi_file_source([csv_filename])
+        # Snapshots cover single files read without the rate table
+        snapshot_path = default_snapshot_path(csv_filename) if use_cache and not (multi_file or derive_rates) else None
+        self._worker = threading.Thread(
+            target=self._analysis_worker,
+            args=(csv_filename, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                  self._worker_queue, self._cancel_event, cache_path, snapshot_path, ssn_count, derive_rates,
+                  loaded_portfolio),
+            daemon=True
+        )
+        self._worker.start()
+        self.master.after(WORKER_POLL_INTERVAL_MS, self._poll_worker_queue)
+
+    def export_results(self):
+        """Asks for a file and writes the analyzed bonds to it as CSV, JSON Lines or Parquet on a background thread."""
+        if self.portfolio is None or (self._worker is not None and self._worker.is_alive()):
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Analysis Results",
+            defaultextension=".csv",
+            filetypes=(("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("Parquet files", "*.parquet"))
+        )
+        if not path:
+            return
+        try:
+            check_export_format(path)
+        except ValueError as ve:
+            messagebox.showerror("Export Error", str(ve))
+            return
+        self._worker_queue = queue.Queue()
+        self._analysis_started = time.monotonic()
+        self.analyze_button.config(state=tk.DISABLED)
+        self.export_button.config(state=tk.DISABLED)
+        self.status_var.set(f"Exporting {len(self.portfolio):,} bonds to {os.path.basename(path)}...")
+        self._worker = threading.Thread(target=self._export_worker, args=(self.portfolio, path, self._worker_queue), daemon=True)
+        self._worker.start()
+        self.master.after(WORKER_POLL_INTERVAL_MS, self._poll_worker_queue)
+
+    @staticmethod
+    def _export_worker(portfolio, path, out_queue):
+        """Background thread: streams the portfolio to path and reports back through out_queue."""
+        try:
+            summary = export_portfolio(portfolio, path)
+        except (OSError, ValueError) as e:
+            out_queue.put(('error', "Export Error", f"Could not export the results:\n{e}", "Error: Export failed."))
+            return
+        out_queue.put(('exported', path, summary['processed']))
+
+    def cancel_analysis(self):
+        """Asks the running analysis worker to stop."""
+        if self._worker is not None and self._worker.is_alive():
+            self._cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling analysis...")
+
+    @staticmethod
+    def _analysis_worker(csv_filename, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                         out_queue, cancel_event, cache_path=None, snapshot_path=None, ssn_count=1, derive_rates=False,
+                         loaded_portfolio=None):
+        """Runs on the worker thread: parses and analyzes the CSV, reporting through out_queue only (no Tk calls).
+
+        With loaded_portfolio (bonds already read from the unchanged CSV) parsing is skipped.
+        """
+        builder = BondPortfolioBuilder(deduplicate=False)
+        pending_warnings = []
+        all_warnings = [] # Kept for the snapshot
+        as_of = date.today() # One as-of date for parsing and analysis
+        try:
+            portfolio = loaded_portfolio
+            if portfolio is not None:
+                pass # What-if run: the bonds and their cached stages are reused
+            elif is_multi_file_source([csv_filename]):
+                portfolio = IBondAnalyzerApp._read_multi_file_portfolio(csv_filename, as_of, out_queue, cancel_event, derive_rates)
+                if portfolio is None:
+                    out_queue.put(('cancelled',))
+                    return
+            elif snapshot_path is not None:
+                with INSTRUMENTATION.timer('snapshot_open'):
+                    portfolio, snapshot_warnings = open_portfolio_snapshot(snapshot_path, csv_filename, as_of)
+                if portfolio is not None:
+                    total_bytes = os.path.getsize(csv_filename)
+                    rows_done = len(portfolio) + len(snapshot_warnings)
+                    out_queue.put(('progress', rows_done, total_bytes, total_bytes, snapshot_warnings))
+            if portfolio is None:
+                total_bytes = os.path.getsize(csv_filename)
+                with open(csv_filename, mode='r', newline='', encoding='utf-8-sig') as csvfile:
+                    reader = csv.DictReader(csvfile)
+                    if not reader.fieldnames:
+                        out_queue.put(('error', "CSV Error", f"CSV file '{os.path.basename(csv_filename)}' appears to be empty or has no header.", "Error: Empty or headerless CSV."))
+                        return
+
+                    missing = missing_csv_columns(reader.fieldnames, derive_rates)
+                    if missing:
+                        out_queue.put(('error', "CSV Error", f"CSV file '{os.path.basename(csv_filename)}' is missing required columns: {', '.join(missing)}", "Error: Missing CSV columns."))
+                        return
+
+                    rows_done = 0
+                    next_report = time.monotonic() + WORKER_PROGRESS_INTERVAL_S
+                    for bond_input, warning in parse_bond_rows(reader, as_of, derive_rates):
+                        rows_done += 1
+                        if warning is not None:
+                            pending_warnings.append(warning)
+                            all_warnings.append(warning)
+                        else:
+                            builder.add(bond_input)
+
+                        if rows_done % WORKER_CANCEL_CHECK_ROWS == 0:
+                            if cancel_event.is_set():
+                                out_queue.put(('cancelled',))
+                                return
+                            now = time.monotonic()
+                            if now >= next_report:
+                                out_queue.put(('progress', rows_done, csvfile.buffer.tell(), total_bytes, pending_warnings))
+                                pending_warnings = []
+                                next_report = now + WORKER_PROGRESS_INTERVAL_S
+
+                    out_queue.put(('progress', rows_done, total_bytes, total_bytes, pending_warnings))
+
+                portfolio = builder.build()
+                if snapshot_path is not None:
+                    try:
+                        with INSTRUMENTATION.timer('snapshot_write'):
+                            write_portfolio_snapshot(portfolio, all_warnings, snapshot_path, csv_filename, as_of)
+                    except OSError:
+                        pass # The snapshot only speeds up the next run
+
+            # Calculate metrics for every bond in one vectorized pass (cached bonds are not recomputed)
+            portfolio = portfolio.deduplicated() # Repeated confirmations keep the last row
+            rate_report = None
+            if derive_rates and loaded_portfolio is None: # Loaded bonds were derived when read
+                rate_check = RateTableCheck(load_rate_table(), derive=True)
+                portfolio, rate_warnings = rate_check.apply(portfolio, as_of)
+                rate_report = rate_check.report()
+                if rate_warnings:
+                    out_queue.put(('progress', len(portfolio), 1, 1, rate_warnings))
+            # The in-memory stages serve what-if runs better than the persistent cache
+            cache = None if cache_path is None or loaded_portfolio is not None else RotationResultCache(cache_path)
+            portfolio.analyze(new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, cache=cache, as_of=as_of)
+            results_table_data = portfolio.results_table()
+            horizon_curve = portfolio.horizon_curve() # Usually the break-even stage analyze() just built
+            plan = portfolio.optimize(new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                                      ssn_count=ssn_count, as_of=as_of)
+            cache_report = None
+            if cache is not None:
+                cache_report = cache.report()
+                try:
+                    cache.save()
+                except OSError as e:
+                    cache_report += f" (not saved: {e})"
+
+        except FileNotFoundError:
+            out_queue.put(('error', "File Error", f"CSV file not found at '{csv_filename}'", "Error: CSV file not found."))
+            return
+        except Exception as e:
+            out_queue.put(('error', "CSV Error", f"An unexpected error occurred while reading the CSV: {e}", "Error: Failed to read CSV."))
+            return
+
+        out_queue.put(('done', portfolio, results_table_data, cache_report, plan, rate_report, horizon_curve))
+
+    @staticmethod
+    def _read_multi_file_portfolio(sources, as_of, out_queue, cancel_event, derive_rates=False):
+        """Worker thread helper: parses every CSV of a folder or glob over a process pool and merges them.
+
+        Reports progress per finished file. Returns the merged BondPortfolio, or None when cancelled.
+        """
+        paths = expand_csv_sources([sources])
+        sizes = {path: os.path.getsize(path) for path in paths}
+        total_bytes = sum(sizes.values())
+        progress = {'rows': 0, 'bytes': 0}
+
+        def on_file(path, portfolio, warnings):
+            progress['rows'] += (len(portfolio) if portfolio is not None else 0) + len(warnings)
+            progress['bytes'] += sizes.get(path, 0)
+            out_queue.put(('progress', progress['rows'], progress['bytes'], total_bytes, []))
+
+        with MultiFileAnalysis([sources], derive_rates=derive_rates) as analysis:
+            if analysis.refresh(as_of=as_of, on_file=on_file, cancel_event=cancel_event) is None:
+                return None
+            portfolio, warnings, _ = analysis.merge()
+        out_queue.put(('progress', progress['rows'], total_bytes, total_bytes, warnings))
+        return portfolio
+
+    def _poll_worker_queue(self):
+        """Runs on the Tk thread via master.after: applies worker messages to the GUI."""
+        finished = False
+        try:
+            while True:
+                message = self._worker_queue.get_nowait()
+                kind = message[0]
+                if kind == 'progress':
+                    with INSTRUMENTATION.timer('gui_progress'):
+                        self._show_progress(*message[1:4])
+                        if message[4]:
+                            if not self._warnings_logged:
+                                self._log_lines_to_details(["--- CSV Read Warnings ---"])
+                                self._warnings_logged = True
+                            self._log_lines_to_details(message[4])
+                elif kind == 'done':
+                    with INSTRUMENTATION.timer('gui_populate'):
+                        self._finish_analysis(*message[1:])
+                    if INSTRUMENTATION.enabled:
+                        self.timing_var.set(INSTRUMENTATION.summary_line())
+                    finished = True
+                elif kind == 'exported':
+                    elapsed = time.monotonic() - self._analysis_started
+                    self.status_var.set(f"Exported {message[2]:,} bonds to {message[1]} in {elapsed:.1f}s.")
+                    finished = True
+                elif kind == 'cancelled':
+                    self._clear_results()
+                    self.status_var.set("Analysis cancelled.")
+                    finished = True
+                elif kind == 'error':
+                    messagebox.showerror(message[1], message[2])
+                    self.status_var.set(message[3])
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if finished:
+            self.analyze_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            if self.portfolio is not None and len(self.portfolio):
+                self.export_button.config(state=tk.NORMAL)
+        else:
+            self.master.after(WORKER_POLL_INTERVAL_MS, self._poll_worker_queue)
+
+    def _show_progress(self, rows_done, bytes_done, total_bytes):
+        """Updates the progress bar and the rows/sec and ETA status text."""
+        fraction = bytes_done / total_bytes if total_bytes else 1.0
+        elapsed = time.monotonic() - self._analysis_started
+        self.progress_var.set(100.0 * fraction)
+        rate = rows_done / elapsed if elapsed > 0 else 0.0
+        eta = f"{elapsed * (1 - fraction) / fraction:,.0f}s" if fraction > 0 else "unknown"
+        self.status_var.set(f"Analyzing... {rows_done:,} rows ({rate:,.0f} rows/sec, ETA {eta})")
+
+    def _finish_analysis(self, portfolio, results_table_data, cache_report=None, plan=None, rate_report=None,
+                         horizon_curve=None):
+        """Populates the GUI with the results of a completed worker run."""
+        self.portfolio = portfolio
+        self.horizon_curve = horizon_curve
+        self._loaded_source = self._pending_source
+        self.results_table_data = results_table_data
+        self.progress_var.set(100.0)
+        self.status_var.set("Populating results...")
+
+        if self._warnings_logged:
+             self._log_lines_to_details(["-" * 25 + "\n"])
+
+        if not len(self.portfolio):
+            self._log_to_details("No valid bond data found in the CSV file to analyze.")
+            self.status_var.set("Analysis complete: No valid data found.")
+            return
+
+        # Populate results table
+        self.results_table.set_data(self.results_table_data)
+        self._apply_table_filter()
+        self.results_table.select_first() # Trigger display for the first bond
+
+        # Calculate and display summary (only bonds without errors and with a positive net gain)
+        recommended_count, total_net_gain = self.portfolio.summary()
+
+        self.summary_count_var.set(f"{recommended_count} bond(s)")
+        self.summary_gain_var.set(f"${total_net_gain:,.2f}")
+        if plan is not None:
+            self.summary_plan_var.set(f"{plan['planned_count']} bond(s) over {len(plan['years'])} year(s), "
+                                      f"${plan['total_net_gain']:,.2f}")
+
+        elapsed = time.monotonic() - self._analysis_started
+        footprint_mb = self.portfolio.memory_footprint()['total'] / 1e6
+        status = f"Analysis complete. Processed {len(self.portfolio)} bonds in {elapsed:.1f}s ({footprint_mb:,.1f} MB)."
+        if cache_report:
+            status += " " + cache_report
+        if rate_report:
+            status += " " + rate_report
+        if self.portfolio.stages_reused:
+            status += f" Reused the loaded bonds' {' and '.join(self.portfolio.stages_reused)} stages."
+        self.status_var.set(status)
+
+        if plan is not None:
+            self._log_lines_to_details(["\n" + "=" * 50] + format_plan_summary(plan))
+
+        # Add disclaimers to the detail view initially or after warnings
+        self._log_lines_to_details([
+            "\n" + "=" * 50,
+            "--- Important Disclaimers ---",
+            "* Select a bond in the table above to see its specific analysis.",
+            "* This is an estimation based on the inputs and assumptions provided.",
+            "* Penalty calculation is an estimate based on the CURRENT composite rate",
+            "  and CURRENT value provided in the CSV (verify on TreasuryDirect).",
+            "* Assumes the reinvested amount ('Net Proceeds') matches the new bond purchase.",
+            "* Does NOT account for state/local taxes (I Bond interest is typically exempt).",
+            "* The recommended total ignores the annual $10,000 purchase limit per SSN;",
+            "  the year-by-year plan above respects it (pooled across the SSNs entered;",
+            "  each year is filled in turn, a heuristic rather than a joint optimum).",
+            "* Does NOT compare returns against other potential investments.",
+            "* Market conditions and future inflation rates can change.",
+            "* Consult with a qualified financial advisor before making decisions.",
+            "-" * 50,
+        ])
+
+
+def run_gui():
+    """Creates the Tk root window and runs the analyzer until it is closed."""
+    root = tk.Tk()
+    # Optional: Add theme for a more modern look if available
+    try:
+        style = ttk.Style(root)
+        # Choose theme based on OS or preference ('clam', 'alt', 'default', 'classic', 'vista', 'xpnative')
+        if sys.platform == "win32":
+            style.theme_use('vista')
+        else:
+            style.theme_use('clam') # A common cross-platform theme
+    except tk.TclError:
+        print("ttk themes not available, using default.") # Fallback
+
+    app = IBondAnalyzerApp(root)
+    root.mainloop()
@@ -0,0 +1,190 @@
+"""Multi-file ingestion: bond CSVs from files, directories and globs parsed and analyzed over a process pool."""
+import concurrent.futures
+import os
+from datetime import date
+
+import numpy as np
+
+from .core import expand_csv_sources
+from .instrumentation import INSTRUMENTATION
+from .pipeline import load_portfolio
+from .portfolio import BondPortfolio
+
+
+# --- Multi-File Ingestion (one task per CSV, merged by confirmation number) ---
+def file_signature(path):
+    """(size, modification time) used to tell whether a CSV changed, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _ingest_file(path, parameters, as_of, derive_rates=False):
+    """Process pool task: parses one CSV and, with parameters, analyzes it.
+
+    Returns (path, portfolio, warnings, error); portfolio is None and error a message when the whole file is unusable.
+    """
+    try:
+        portfolio, warnings = load_portfolio(path, as_of=as_of, derive_rates=derive_rates)
+        if parameters is not None:
+            portfolio.analyze(*parameters, as_of=as_of)
+    except FileNotFoundError:
+        return path, None, [], f"Skipping file '{path}': not found."
+    except (OSError, ValueError) as e:
+        return path, None, [], f"Skipping file '{path}': {e}"
+    return path, portfolio, warnings, None
+
+
+class MultiFileAnalysis:
+    """Bond CSVs from several sources, parsed in parallel and merged into one BondPortfolio.
+
+    Each file is handled by one worker process task. refresh() only re-reads files whose size or
+    modification time changed since the previous pass, and the pool stays up between passes, so
+    repeated refreshes (watch mode) cost little when few files change.
+    """
+
+    def __init__(self, sources, workers=None, derive_rates=False):
+        self.sources = list(sources)
+        self.workers = workers or os.cpu_count() or 1
+        self.derive_rates = derive_rates # Passed to load_portfolio: rate columns may be blank
+        self.paths = [] # Expanded CSV paths of the last refresh, in merge order
+        self._files = {} # path -> (signature, portfolio or None, warnings, error)
+        self._key = None # (parameters, as_of) the stored files were read with
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def refresh(self, parameters=None, as_of=None, on_file=None, cancel_event=None):
+        """Reads new and changed files and forgets removed ones.
+
+        parameters, a (new rate, tax rate, horizon) tuple, has each worker analyze its file too; None
+        only parses. Changing parameters or as_of re-reads every file. on_file(path, portfolio, warnings)
+        is called as each file finishes. Returns {'files', 'changed', 'removed'}, or None when cancel_event
+        was set (files finished so far are kept for the next refresh).
+        """
+        as_of = as_of or date.today()
+        if (parameters, as_of) != self._key:
+            self._files = {}
+            self._key = (parameters, as_of)
+        paths = expand_csv_sources(self.sources)
+        current = set(paths)
+        removed = [path for path in self._files if path not in current]
+        for path in removed:
+            del self._files[path]
+
+        pending = {}
+        for path in paths:
+            signature = file_signature(path)
+            stored = self._files.get(path)
+            if signature is None or stored is None or stored[0] != signature:
+                pending[path] = signature
+
+        with INSTRUMENTATION.timer('ingest'):
+            for path, portfolio, warnings, error in self._run(pending, parameters, as_of, cancel_event):
+                self._files[path] = (pending[path], portfolio, warnings, error)
+                if on_file is not None:
+                    on_file(path, portfolio, warnings)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        self.paths = paths
+        return {'files': len(paths), 'changed': sorted(pending), 'removed': sorted(removed)}
+
+    def _run(self, pending, parameters, as_of, cancel_event):
+        """Yields _ingest_file results for the pending paths, in the pool when there is more than one."""
+        if self.workers == 1 or len(pending) <= 1:
+            for path in pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield _ingest_file(path, parameters, as_of, self.derive_rates)
+            return
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        futures = [self._executor.submit(_ingest_file, path, parameters, as_of, self.derive_rates) for path in pending]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def merge(self):
+        """Merges the files of the last refresh into one BondPortfolio keyed by confirmation number.
+
+        Files are taken in path order. A confirmation number already seen in an earlier file is
+        reported and replaced by the later row, which keeps the earlier position (the rule
+        BondPortfolio.deduplicated applies within a file). Returns (portfolio, warnings, stats) where
+        portfolio.source_files/source_index name each row's file and stats counts 'files',
+        'skipped_files' and 'duplicates'.
+        """
+        warnings = []
+        source_files = []
+        parts = []
+        for path in self.paths:
+            _, portfolio, file_warnings, error = self._files[path]
+            if error is not None:
+                warnings.append(error)
+                continue
+            warnings.extend(f"{path}: {warning}" for warning in file_warnings)
+            source_files.append(path)
+            parts.append(portfolio)
+
+        merged = BondPortfolio.concatenate(parts)
+        source_index = np.repeat(np.arange(len(parts), dtype=np.int32), [len(part) for part in parts])
+        sources = source_index.tolist()
+        csv_lines = merged.csv_line.tolist()
+        slots = {} # Confirmation -> position in keep
+        keep = []
+        for row, confirmation in enumerate(merged.confirmations):
+            slot = slots.get(confirmation)
+            if slot is None:
+                slots[confirmation] = len(keep)
+                keep.append(row)
+                continue
+            earlier = keep[slot]
+            warnings.append(
+                f"Duplicate confirmation {confirmation}: '{source_files[sources[row]]}' line {csv_lines[row]} "
+                f"replaces '{source_files[sources[earlier]]}' line {csv_lines[earlier]}."
+            )
+            keep[slot] = row
+        if len(keep) < len(merged):
+            merged.source_files, merged.source_index = source_files, source_index
+            portfolio = merged.take(keep, with_metrics=True)
+        else:
+            portfolio = merged
+            portfolio.source_index = source_index
+        portfolio.source_files = source_files
+        stats = {
+            'files': len(source_files),
+            'skipped_files': len(self.paths) - len(source_files),
+            'duplicates': len(merged) - len(keep),
+        }
+        return portfolio, warnings, stats
+
+
+def load_multi_file_portfolio(sources, parameters=None, workers=None, as_of=None, derive_rates=False):
+    """One MultiFileAnalysis pass over sources. Returns merge()'s (portfolio, warnings, stats).
+
+    Raises ValueError when the sources name no CSV files at all.
+    """
+    with MultiFileAnalysis(sources, workers=workers, derive_rates=derive_rates) as analysis:
+        analysis.refresh(parameters, as_of=as_of)
+        if not analysis.paths:
+            raise ValueError(f"No CSV files found in {', '.join(sources)}.")
+        portfolio, warnings, stats = analysis.merge()
+    if parameters is not None and portfolio.metrics is None: # Every file was skipped
+        portfolio.analyze(*parameters, as_of=as_of)
+    return portfolio, warnings, stats
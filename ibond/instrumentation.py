@@ -0,0 +1,129 @@
+"""Optional run instrumentation: counters, stage timers and error categories, exportable as JSON or Prometheus text."""
+import contextlib
+import json
+import time
+
+
+# --- Instrumentation (optional counters, stage timers and error categories) ---
+METRICS_PREFIX = 'ibond' # Prometheus metric name prefix
+
+
+class _StageTimer:
+    """Context manager adding its elapsed time to one Instrumentation timer."""
+
+    def __init__(self, instrumentation, name):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._instrumentation.add_time(self._name, time.perf_counter() - self._started)
+        return False
+
+
+class Instrumentation:
+    """Counters, cumulative stage timers and per-category error counts for one run.
+
+    Disabled by default: timer() then returns a shared no-op context and hot loops check
+    self.enabled once per call, so the cost is a few attribute lookups per stage. Timers may
+    nest (e.g. break_even is part of compute).
+    """
+
+    _NULL_TIMER = contextlib.nullcontext()
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        """Clears every counter, timer and error count."""
+        self.counters = {}
+        self.timers = {} # name -> [seconds, calls]
+        self.errors = {}
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_error(self, category, amount=1):
+        if self.enabled:
+            self.errors[category] = self.errors.get(category, 0) + amount
+
+    def add_time(self, name, seconds, calls=1):
+        timer = self.timers.setdefault(name, [0.0, 0])
+        timer[0] += seconds
+        timer[1] += calls
+
+    def timer(self, name):
+        """Context manager timing a stage (a no-op when disabled)."""
+        return _StageTimer(self, name) if self.enabled else self._NULL_TIMER
+
+    def timed_iter(self, iterable, name):
+        """Wraps an iterator, adding the time spent producing each item to the named timer."""
+        iterator = iter(iterable)
+        perf_counter = time.perf_counter
+        seconds = 0.0
+        calls = 0
+        try:
+            while True:
+                started = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += perf_counter() - started
+                calls += 1
+                yield item
+        finally:
+            self.add_time(name, seconds, calls)
+
+    def as_dict(self):
+        """JSON-serializable snapshot of everything collected."""
+        return {
+            'counters': dict(self.counters),
+            'timers': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.timers.items()},
+            'errors': dict(self.errors),
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2, sort_keys=True)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRICS_PREFIX}_stage_seconds_total Cumulative seconds spent in each stage.",
+            f"# TYPE {METRICS_PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [f'{METRICS_PREFIX}_stage_seconds_total{{stage="{name}"}} {seconds!r}'
+                  for name, (seconds, _) in sorted(self.timers.items())]
+        lines += [
+            f"# HELP {METRICS_PREFIX}_stage_calls_total Times each stage ran.",
+            f"# TYPE {METRICS_PREFIX}_stage_calls_total counter",
+        ]
+        lines += [f'{METRICS_PREFIX}_stage_calls_total{{stage="{name}"}} {calls}'
+                  for name, (_, calls) in sorted(self.timers.items())]
+        lines += [
+            f"# HELP {METRICS_PREFIX}_events_total Counted events.",
+            f"# TYPE {METRICS_PREFIX}_events_total counter",
+        ]
+        lines += [f'{METRICS_PREFIX}_events_total{{event="{name}"}} {value}' for name, value in sorted(self.counters.items())]
+        lines += [
+            f"# HELP {METRICS_PREFIX}_errors_total Skipped rows and unanalyzable bonds by category.",
+            f"# TYPE {METRICS_PREFIX}_errors_total counter",
+        ]
+        lines += [f'{METRICS_PREFIX}_errors_total{{category="{name}"}} {value}' for name, value in sorted(self.errors.items())]
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """One-line timing and error breakdown for the GUI status area."""
+        timings = ", ".join(f"{name} {seconds:.2f}s" for name, (seconds, _) in
+                            sorted(self.timers.items(), key=lambda item: -item[1][0]))
+        errors = ", ".join(f"{name} {value:,}" for name, value in sorted(self.errors.items()))
+        return f"Timings: {timings or 'none'}" + (f" | Errors: {errors}" if errors else "")
+
+
+INSTRUMENTATION = Instrumentation() # Shared by every stage; enable it to collect
@@ -0,0 +1,210 @@
+"""Monte Carlo simulation of rotation outcomes over inflation paths (monthly accrual, semiannual resets)."""
+import csv
+from datetime import date
+
+import numpy as np
+
+from .batch import BATCH_ERROR_MESSAGES, BATCH_OK, calculate_rotation_metrics_batch, months_held_batch
+from .defaults import MC_INFLATION_MEAN_PCT, MC_INFLATION_VOLATILITY_PCT
+from .rates import I_BOND_MATURITY_MONTHS
+
+
+# --- Monte Carlo Inflation Simulation (monthly accrual, semiannual resets, bonds x paths) ---
+MC_DEFAULT_PATHS = 2000
+MC_INFLATION_PERSISTENCE = 0.7 # AR(1) coefficient from one announcement to the next
+MC_PERCENTILES = (5, 25, 50, 75, 95)
+MC_MAX_CELLS = 4000000 # Bonds x paths net gains held per chunk (bounds memory)
+MC_EARLY_REDEMPTION_MONTHS = 60 # Redeeming before 5 years forfeits the last 3 months of interest
+MC_PENALTY_MONTHS = 3
+SIMULATION_CSV_COLUMNS = ['Confirmation', 'CSV Line', 'Total Months Held', 'Mean Net Gain', 'Std Net Gain'] + [
+    f"P{percentile} Net Gain" for percentile in MC_PERCENTILES
+] + ['Probability of Gain', 'Error']
+
+
+def _announcement_month(month):
+    """Month index (months since 1970-01) of the latest May or November rate announcement at or before month."""
+    return month - (month - 4) % 6
+
+
+def simulate_inflation_paths(paths, announcements, current_inflation_pct, mean_pct=MC_INFLATION_MEAN_PCT,
+                             persistence=MC_INFLATION_PERSISTENCE, volatility_pct=MC_INFLATION_VOLATILITY_PCT, seed=0):
+    """Semiannual inflation rates (%) for future rate announcements. Returns a paths x announcements array.
+
+    Column 0 is the announcement already in effect (current_inflation_pct, the same on every path);
+    later announcements follow a mean-reverting AR(1) process around mean_pct.
+    """
+    rng = np.random.default_rng(seed)
+    inflation = np.empty((paths, announcements), dtype=np.float64)
+    inflation[:, 0] = current_inflation_pct
+    shocks = rng.standard_normal((paths, announcements - 1)) * volatility_pct
+    for k in range(1, announcements):
+        inflation[:, k] = mean_pct + persistence * (inflation[:, k - 1] - mean_pct) + shocks[:, k - 1]
+    return inflation
+
+
+def implied_current_inflation_pct(issue_dates, fixed_rate_pct, composite_rate_pct, as_of=None):
+    """Estimates the semiannual inflation rate in effect from bonds whose rate reset since the last announcement.
+
+    composite = fixed + 2 x inflation + fixed x inflation, so each such bond implies one inflation rate;
+    the median is returned, or MC_INFLATION_MEAN_PCT when no bond has reset since the announcement.
+    """
+    issue_dates = np.asarray(issue_dates, dtype='datetime64[D]')
+    today = as_of or date.today()
+    valid = ~np.isnat(issue_dates)
+    months_held = months_held_batch(issue_dates[valid], today)
+    issue_months = issue_dates[valid].astype('datetime64[M]').astype(np.int64)
+    reset_months = issue_months + months_held - months_held % 6
+    announced = _announcement_month((today.year - 1970) * 12 + today.month - 1)
+    recent = (months_held >= 0) & (reset_months >= announced)
+    fixed = np.asarray(fixed_rate_pct, dtype=np.float64)[valid][recent]
+    composite = np.asarray(composite_rate_pct, dtype=np.float64)[valid][recent]
+    implied = (composite - fixed) / (2.0 + fixed / 100.0)
+    implied = implied[composite > 0] # A floored 0% composite does not reveal the inflation rate
+    return float(np.median(implied)) if implied.size else MC_INFLATION_MEAN_PCT
+
+
+def _accrual_counts(months_held, issue_months, end_months, horizon_months, announced, columns):
+    """Months each bond accrues at each rate over its first end_months simulated months (none past maturity).
+
+    Column 0 counts months still in the bond's current rate period (its own composite rate applies);
+    column 1 + k counts months in periods that reset on announcement k.
+    """
+    month = np.arange(horizon_months)
+    age = months_held[:, None] + month
+    period_start = age - age % 6
+    column = 1 + (issue_months[:, None] + period_start - announced) // 6
+    column[period_start <= months_held[:, None]] = 0
+    accruing = (month < end_months[:, None]) & (age < I_BOND_MATURITY_MONTHS) # Matured bonds stop earning
+    flat = (np.arange(months_held.shape[0])[:, None] * columns + column)[accruing]
+    return np.bincount(flat, minlength=months_held.shape[0] * columns).reshape(-1, columns).astype(np.float64)
+
+
+def _monthly_log_growth(fixed_rate_pct, inflation_pct):
+    """log of one month's accrual at the composite rate (floored at 0%, compounded semiannually)."""
+    composite = np.maximum(fixed_rate_pct + 2.0 * inflation_pct + fixed_rate_pct * inflation_pct / 100.0, 0.0)
+    return np.log1p(composite / 200.0) / 6.0
+
+
+def simulate_rotation_batch(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    paths=MC_DEFAULT_PATHS,
+    current_inflation_pct=None,
+    inflation_mean_pct=MC_INFLATION_MEAN_PCT,
+    inflation_persistence=MC_INFLATION_PERSISTENCE,
+    inflation_volatility_pct=MC_INFLATION_VOLATILITY_PCT,
+    percentiles=MC_PERCENTILES,
+    seed=0,
+    max_cells=MC_MAX_CELLS,
+    as_of=None
+):
+    """Distribution of the after-tax net gain of rotating each bond over simulated inflation paths.
+
+    Both the kept bond (until its 30-year maturity) and the replacement (bought with the net proceeds,
+    issued this month) accrue monthly at their composite rate, which resets every 6 months from each bond's issue month to the
+    latest May/November announcement. All bonds share the same inflation paths. At the horizon both
+    are redeemed: a bond younger than 5 years forfeits its last 3 months of interest, and the interest
+    is taxed (the old bond's immediately on rotation, per calculate_rotation_metrics_batch).
+    Net gain = after-tax value when rotating - after-tax value when keeping.
+
+    Returns a dictionary of per-bond arrays: mean, std, percentiles (bonds x len(percentiles)),
+    probability_of_gain, total_months_held and error_code (BATCH_* codes; statistics are NaN on
+    error rows), plus the inflation_paths used.
+    """
+    batch = calculate_rotation_metrics_batch(
+        old_bond_principal, old_bond_issue_date, old_bond_fixed_rate_pct, old_bond_current_value,
+        old_bond_composite_rate_pct, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+        include_break_even=False, as_of=as_of
+    )
+    today = as_of or date.today()
+    count = batch['error_code'].shape[0]
+    issue_dates = np.asarray(old_bond_issue_date, dtype='datetime64[D]')
+    fixed_rate_pct = np.asarray(old_bond_fixed_rate_pct, dtype=np.float64)
+    composite_rate_pct = np.asarray(old_bond_composite_rate_pct, dtype=np.float64)
+    principal = np.asarray(old_bond_principal, dtype=np.float64)
+    current_value = np.asarray(old_bond_current_value, dtype=np.float64)
+    tax_rate = federal_tax_rate_pct / 100.0
+
+    results = {
+        'mean': np.full(count, np.nan),
+        'std': np.full(count, np.nan),
+        'percentiles': np.full((count, len(percentiles)), np.nan),
+        'probability_of_gain': np.full(count, np.nan),
+        'total_months_held': batch['total_months_held'],
+        'error_code': batch['error_code'],
+        'inflation_paths': None,
+    }
+    active = np.flatnonzero(batch['error_code'] == BATCH_OK)
+    if not active.size:
+        return results
+
+    horizon_months = investment_horizon_years * 12
+    today_month = (today.year - 1970) * 12 + today.month - 1
+    announced = _announcement_month(today_month)
+    columns = 2 + (today_month - announced + horizon_months - 1) // 6 # Current period + every announcement reached
+    if current_inflation_pct is None:
+        current_inflation_pct = implied_current_inflation_pct(issue_dates, fixed_rate_pct, composite_rate_pct, today)
+    inflation = simulate_inflation_paths(
+        paths, columns - 1, current_inflation_pct, inflation_mean_pct, inflation_persistence, inflation_volatility_pct, seed
+    )
+    results['inflation_paths'] = inflation
+
+    # --- Replacement bond: the same accrual for every bond, so one growth value per path ---
+    new_end = horizon_months - MC_PENALTY_MONTHS if horizon_months < MC_EARLY_REDEMPTION_MONTHS else horizon_months
+    new_counts = _accrual_counts(np.zeros(1, dtype=np.int64), np.array([today_month]), np.array([new_end]),
+                                 horizon_months, announced, columns)[0]
+    new_counts[1] += new_counts[0] # Its first period already uses the current announcement
+    new_growth = np.exp(_monthly_log_growth(new_bond_fixed_rate_pct, inflation) @ new_counts[1:])
+
+    # --- Kept bonds: per-rate log growth tables (one per distinct fixed rate), chunked to max_cells ---
+    unique_fixed, fixed_index = np.unique(fixed_rate_pct[active], return_inverse=True)
+    rate_tables = _monthly_log_growth(unique_fixed[:, None, None], inflation[None, :, :]) # rates x paths x periods
+    chunk = max(1, max_cells // paths)
+    for start in range(0, active.size, chunk):
+        rows = active[start:start + chunk]
+        months_held = batch['total_months_held'][rows]
+        early = months_held + horizon_months < MC_EARLY_REDEMPTION_MONTHS
+        end_months = np.where(early, horizon_months - MC_PENALTY_MONTHS, horizon_months)
+        counts = _accrual_counts(months_held, issue_dates[rows].astype('datetime64[M]').astype(np.int64),
+                                 end_months, horizon_months, announced, columns)
+        log_growth = np.empty((rows.size, paths), dtype=np.float64)
+        chunk_rates = fixed_index[start:start + chunk]
+        for rate in np.unique(chunk_rates):
+            same_rate = np.flatnonzero(chunk_rates == rate)
+            log_growth[same_rate] = counts[same_rate, 1:] @ rate_tables[rate].T
+        log_growth += (counts[:, 0] * np.log1p(np.maximum(composite_rate_pct[rows], 0.0) / 200.0) / 6.0)[:, None]
+
+        keep_value = current_value[rows][:, None] * np.exp(log_growth)
+        keep_after_tax = keep_value - tax_rate * np.maximum(keep_value - principal[rows][:, None], 0.0)
+        proceeds = batch['net_proceeds'][rows][:, None]
+        rotate_value = proceeds * new_growth[None, :]
+        rotate_after_tax = rotate_value - tax_rate * np.maximum(rotate_value - proceeds, 0.0)
+        net_gain = rotate_after_tax - keep_after_tax
+
+        results['mean'][rows] = net_gain.mean(axis=1)
+        results['std'][rows] = net_gain.std(axis=1)
+        results['percentiles'][rows] = np.percentile(net_gain, percentiles, axis=1).T
+        results['probability_of_gain'][rows] = (net_gain > 0).mean(axis=1)
+    return results
+
+
+def write_simulation_results(portfolio, simulation, output_file):
+    """Writes one SIMULATION_CSV_COLUMNS row per bond. Returns (likely_gain_count, total_mean_net_gain)."""
+    writer = csv.writer(output_file)
+    writer.writerow(SIMULATION_CSV_COLUMNS)
+    columns = [simulation[key].tolist() for key in ('total_months_held', 'mean', 'std')]
+    percentiles = simulation['percentiles'].tolist()
+    probability = simulation['probability_of_gain'].tolist()
+    error_codes = simulation['error_code'].tolist()
+    csv_lines = portfolio.csv_line.tolist()
+    for i, confirmation in enumerate(portfolio.confirmations):
+        writer.writerow([confirmation, csv_lines[i]] + [column[i] for column in columns] + percentiles[i] +
+                        [probability[i], BATCH_ERROR_MESSAGES[error_codes[i]] or ''])
+    likely = (simulation['error_code'] == BATCH_OK) & (simulation['probability_of_gain'] > 0.5)
+    return int(likely.sum()), float(simulation['mean'][likely].sum())
@@ -0,0 +1,218 @@
+"""Year-by-year rotation planning under the annual I bond purchase limit (one 0/1 knapsack per calendar year)."""
+import csv
+from datetime import date
+
+import numpy as np
+
+from .batch import BATCH_OK, calculate_rotation_metrics_batch, summarize_batch
+from .defaults import OPTIMIZER_DEFAULT_YEARS, OPTIMIZER_METHODS, PURCHASE_LIMIT_PER_SSN
+
+
+# --- Year-by-Year Plan (which bonds to rotate in which year under per-SSN caps; greedy across years) ---
+PURCHASE_UNIT = 25.0 # Reinvested amounts are rounded up to this many dollars for the knapsack
+OPTIMIZER_DP_MAX_CELLS = 50000000 # Candidates x capacity units above which 'auto' falls back to greedy
+PLAN_CSV_COLUMNS = ['Confirmation', 'CSV Line', 'Rotation Year', 'Reinvest Amount', 'Net Gain or Loss']
+
+
+def _knapsack_dp(weights, values, capacity):
+    """Exact 0/1 knapsack by dynamic programming over capacity units. Returns (chosen mask, best value).
+
+    Each item is one vectorized pass over the capacity axis, so the cost is O(items x capacity)
+    array work plus items x capacity bits for the backtrack. Only the capacity // weight most
+    valuable items of each weight can be part of a solution, so the others are dropped first.
+    """
+    chosen = np.zeros(weights.shape[0], dtype=bool)
+    order = np.lexsort((-values, weights)) # By weight, most valuable first
+    sorted_weights = weights[order]
+    rank = np.arange(order.size) - np.searchsorted(sorted_weights, sorted_weights, side='left')
+    items = np.sort(order[rank < capacity // np.maximum(sorted_weights, 1)])
+    weights, values = weights[items], values[items]
+
+    best = np.zeros(capacity + 1, dtype=np.float64)
+    taken = np.zeros((weights.shape[0], capacity + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights.tolist(), values.tolist())):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        better = candidate > best[weight:]
+        taken[i, weight:] = better
+        best[weight:] = np.where(better, candidate, best[weight:])
+
+    remaining = capacity
+    for i in range(weights.shape[0] - 1, -1, -1):
+        if taken[i, remaining]:
+            chosen[items[i]] = True
+            remaining -= weights[i]
+    return chosen, float(best[capacity])
+
+
+def _knapsack_greedy(weights, values, capacity):
+    """Greedy 0/1 knapsack by gain per dollar. Returns (chosen mask, fractional upper bound).
+
+    Items are taken in ratio order while they fit (smaller items further down still fill gaps);
+    the single most valuable item is used instead when it alone beats that fill, which keeps the
+    result within half of the optimum. The LP relaxation bound shows how far from optimal it can be.
+    """
+    order = np.argsort(-values / weights, kind='stable')
+    chosen = np.zeros(weights.shape[0], dtype=bool)
+    remaining = capacity
+    bound = None
+    filled = 0.0
+    for i in order.tolist():
+        if weights[i] <= remaining:
+            chosen[i] = True
+            remaining -= weights[i]
+            filled += values[i]
+        elif bound is None:
+            bound = filled + values[i] * remaining / weights[i]
+    fits = weights <= capacity
+    if fits.any():
+        single = np.flatnonzero(fits)[np.argmax(values[fits])]
+        if values[single] > values[chosen].sum():
+            chosen[:] = False
+            chosen[single] = True
+    return chosen, filled if bound is None else bound
+
+
+def optimize_rotation_plan(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    ssn_count=1,
+    annual_limit=PURCHASE_LIMIT_PER_SSN,
+    plan_years=OPTIMIZER_DEFAULT_YEARS,
+    purchased_this_year=0.0,
+    method='auto',
+    as_of=None,
+    current_batch=None,
+    year_batch=None
+):
+    """Year-by-year heuristic: which bonds to redeem, and in which calendar year to reinvest, under the purchase limit.
+
+    Each year's capacity is ssn_count x annual_limit (less purchased_this_year for the current year),
+    pooled across the household's SSNs. A bond rotated in a later year is evaluated as of January 1
+    of that year over the remaining horizon (its current value is not projected forward), which lets
+    the plan wait out the early redemption penalty. Years are filled in order, each as a 0/1 knapsack
+    over reinvested amounts in PURCHASE_UNIT steps: exact DP ('dp'), gain-per-dollar greedy
+    ('greedy'), or 'auto' (DP unless candidates x capacity exceeds OPTIMIZER_DP_MAX_CELLS). Filling
+    year by year is greedy across years, not a global optimum: a bond taken this year may have
+    gained more in a later year, where it would have left room for others now. A bond whose net
+    proceeds exceed a year's whole capacity cannot be reinvested within it and is not split across
+    years; such bonds are counted per year ('oversized') rather than planned.
+
+    current_batch, a calculate_rotation_metrics_batch result for the same bonds and parameters as of
+    as_of, is used for the first year instead of recomputing it. year_batch(year_as_of, horizon_years),
+    when given, supplies the same result (break-even not needed) for each later year, e.g. from a
+    BondPortfolio's kept stages; otherwise calculate_rotation_metrics_batch computes it.
+
+    Returns a dictionary with per-bond arrays (plan_year: calendar year or -1, reinvest_amount,
+    net_gain_or_loss of the planned year) and per-year totals in 'years', including the count and net
+    gain of candidates too large for that year's capacity ('oversized', 'oversized_net_gain').
+    """
+    if method not in OPTIMIZER_METHODS:
+        raise ValueError(f"Unknown optimizer method '{method}'; use one of {', '.join(OPTIMIZER_METHODS)}.")
+    if ssn_count <= 0 or annual_limit <= 0 or purchased_this_year < 0:
+        raise ValueError("SSN count and annual limit must be positive, and prior purchases cannot be negative.")
+    if not isinstance(investment_horizon_years, int) or investment_horizon_years <= 0:
+        raise ValueError("Horizon must be a positive integer.")
+    today = as_of or date.today()
+    count = np.asarray(old_bond_principal).shape[0]
+    plan_year = np.full(count, -1, dtype=np.int32)
+    reinvest_amount = np.zeros(count, dtype=np.float64)
+    net_gain_or_loss = np.zeros(count, dtype=np.float64)
+    unplanned = np.ones(count, dtype=bool)
+    years = []
+
+    for offset in range(min(plan_years, investment_horizon_years)):
+        year_as_of = today if offset == 0 else date(today.year + offset, 1, 1)
+        if offset == 0 and current_batch is not None:
+            batch = current_batch
+        elif offset > 0 and year_batch is not None:
+            batch = year_batch(year_as_of, investment_horizon_years - offset)
+        else:
+            batch = calculate_rotation_metrics_batch(
+                old_bond_principal, old_bond_issue_date, old_bond_fixed_rate_pct, old_bond_current_value,
+                old_bond_composite_rate_pct, new_bond_fixed_rate_pct, federal_tax_rate_pct,
+                investment_horizon_years - offset, include_break_even=False, as_of=year_as_of
+            )
+        if offset == 0:
+            unconstrained = summarize_batch(batch)
+        budget = ssn_count * annual_limit - (purchased_this_year if offset == 0 else 0.0)
+        capacity = max(0, int(budget // PURCHASE_UNIT))
+        candidates = np.flatnonzero(unplanned & (batch['error_code'] == BATCH_OK) & (batch['net_gain_or_loss'] > 0))
+        weights = np.ceil(batch['net_proceeds'][candidates] / PURCHASE_UNIT).astype(np.int64)
+        fits = weights <= capacity
+        oversized = candidates[~fits]
+        candidates, weights = candidates[fits], weights[fits]
+        values = batch['net_gain_or_loss'][candidates]
+
+        year_method = method
+        if method == 'auto':
+            year_method = 'dp' if candidates.size * (capacity + 1) <= OPTIMIZER_DP_MAX_CELLS else 'greedy'
+        if not candidates.size:
+            chosen, bound = np.zeros(0, dtype=bool), 0.0
+        elif year_method == 'dp':
+            chosen, bound = _knapsack_dp(weights, values, capacity)
+        else:
+            chosen, bound = _knapsack_greedy(weights, values, capacity)
+
+        rows = candidates[chosen]
+        plan_year[rows] = year_as_of.year
+        reinvest_amount[rows] = batch['net_proceeds'][rows]
+        net_gain_or_loss[rows] = batch['net_gain_or_loss'][rows]
+        unplanned[rows] = False
+        years.append({
+            'year': year_as_of.year,
+            'budget': budget,
+            'reinvested': float(reinvest_amount[rows].sum()),
+            'bonds': int(rows.size),
+            'candidates': int(candidates.size),
+            'oversized': int(oversized.size),
+            'oversized_net_gain': float(batch['net_gain_or_loss'][oversized].sum()),
+            'net_gain': float(net_gain_or_loss[rows].sum()),
+            'upper_bound': bound,
+            'method': year_method,
+        })
+
+    return {
+        'plan_year': plan_year,
+        'reinvest_amount': reinvest_amount,
+        'net_gain_or_loss': net_gain_or_loss,
+        'years': years,
+        'total_net_gain': float(net_gain_or_loss[plan_year >= 0].sum()),
+        'planned_count': int((plan_year >= 0).sum()),
+        'unconstrained_count': unconstrained[0],
+        'unconstrained_net_gain': unconstrained[1],
+    }
+
+
+def write_rotation_plan(portfolio, plan, output_file):
+    """Writes one PLAN_CSV_COLUMNS row per planned bond, by year and then by gain."""
+    writer = csv.writer(output_file)
+    writer.writerow(PLAN_CSV_COLUMNS)
+    planned = np.flatnonzero(plan['plan_year'] >= 0)
+    planned = planned[np.lexsort((-plan['net_gain_or_loss'][planned], plan['plan_year'][planned]))]
+    for row in planned.tolist():
+        writer.writerow([portfolio.confirmations[row], portfolio.csv_line[row].item(), plan['plan_year'][row].item(),
+                         plan['reinvest_amount'][row].item(), plan['net_gain_or_loss'][row].item()])
+
+
+def format_plan_summary(plan):
+    """Human-readable lines describing an optimize_rotation_plan result."""
+    lines = [f"Year-by-Year Plan: {plan['planned_count']} bond(s), ${plan['total_net_gain']:,.2f} total net gain "
+             f"(vs {plan['unconstrained_count']} bond(s), ${plan['unconstrained_net_gain']:,.2f} ignoring the limit)",
+             "  Each year is filled in turn from the bonds not yet planned: a greedy heuristic across years, "
+             "not a joint optimum."]
+    for year in plan['years']:
+        lines.append(f"  {year['year']}: rotate {year['bonds']} bond(s), reinvest ${year['reinvested']:,.2f} "
+                     f"of ${year['budget']:,.2f}, net gain ${year['net_gain']:,.2f} "
+                     f"({year['method']}, bound ${year['upper_bound']:,.2f})")
+        if year['oversized']:
+            lines.append(f"    {year['oversized']} bond(s) with ${year['oversized_net_gain']:,.2f} net gain skipped: "
+                         f"proceeds exceed the ${year['budget']:,.2f} limit")
+    return lines
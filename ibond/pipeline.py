@@ -0,0 +1,156 @@
+"""Headless pipeline: read rows -> parse/validate -> compute metrics in chunks -> write results."""
+import csv
+from datetime import date
+
+import numpy as np
+
+from .batch import BATCH_ERROR_MESSAGES, recommended_net_gains
+from .core import RESULT_CSV_COLUMNS, RotationSummary, parse_bond_rows, read_csv_rows
+from .defaults import DEFAULT_PIPELINE_CHUNK_SIZE
+from .instrumentation import INSTRUMENTATION
+from .portfolio import BondPortfolioBuilder
+from .snapshot import open_portfolio_snapshot, write_portfolio_snapshot
+
+
+def load_portfolio(csv_filename, snapshot_path=None, deduplicate=True, as_of=None, derive_rates=False):
+    """Parses a whole bond CSV into a BondPortfolio. Returns (portfolio, warnings).
+
+    With snapshot_path, a current snapshot of the CSV is opened instead of parsing, and a missing
+    or stale one is rewritten after parsing. With deduplicate=False every valid row is kept. With
+    derive_rates, the rate columns may be blank (see parse_bond_rows); snapshots are not used then.
+    """
+    as_of = as_of or date.today()
+    portfolio = None
+    if derive_rates:
+        snapshot_path = None # Snapshots hold the plain parse only
+    if snapshot_path is not None:
+        with INSTRUMENTATION.timer('snapshot_open'):
+            portfolio, warnings = open_portfolio_snapshot(snapshot_path, csv_filename, as_of)
+    if portfolio is None:
+        builder = BondPortfolioBuilder(deduplicate=False)
+        warnings = []
+        with INSTRUMENTATION.timer('parse'):
+            for bond_input, warning in parse_bond_rows(read_csv_rows(csv_filename, derive_rates), as_of, derive_rates):
+                if warning is not None:
+                    warnings.append(warning)
+                else:
+                    builder.add(bond_input)
+            portfolio = builder.build()
+        if snapshot_path is not None:
+            with INSTRUMENTATION.timer('snapshot_write'):
+                write_portfolio_snapshot(portfolio, warnings, snapshot_path, csv_filename, as_of)
+    return (portfolio.deduplicated() if deduplicate else portfolio), warnings
+
+
+def _analyze_chunk(portfolio, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, cache, rate_check, as_of):
+    """Yields the rate check's warnings for one chunk, then ('results', chunk) once it is analyzed."""
+    if rate_check is not None:
+        portfolio, rate_warnings = rate_check.apply(portfolio, as_of)
+        for warning in rate_warnings:
+            yield 'warning', warning
+    portfolio.analyze(new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, cache=cache, as_of=as_of)
+    yield 'results', portfolio
+
+
+def compute_rotation_chunks(
+    parsed_rows,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    chunk_size=DEFAULT_PIPELINE_CHUNK_SIZE,
+    cache=None,
+    as_of=None,
+    rate_check=None
+):
+    """Pipeline stage: groups parsed bonds into BondPortfolio chunks and analyzes each.
+
+    Yields ('warning', message) as soon as a row is rejected and ('results', portfolio) per analyzed
+    chunk, so at most one chunk of bonds is held in memory. An optional RotationResultCache is consulted
+    per chunk, and an optional RateTableCheck runs on each chunk before it is analyzed.
+    """
+    builder = BondPortfolioBuilder(deduplicate=False)
+    for bond_input, warning in parsed_rows:
+        if warning is not None:
+            yield 'warning', warning
+            continue
+        builder.add(bond_input)
+        if len(builder) >= chunk_size:
+            yield from _analyze_chunk(builder.build(), new_bond_fixed_rate_pct, federal_tax_rate_pct,
+                                      investment_horizon_years, cache, rate_check, as_of)
+            builder = BondPortfolioBuilder(deduplicate=False)
+    if len(builder):
+        yield from _analyze_chunk(builder.build(), new_bond_fixed_rate_pct, federal_tax_rate_pct,
+                                  investment_horizon_years, cache, rate_check, as_of)
+
+
+def portfolio_rotation_chunks(
+    portfolio,
+    warnings,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    chunk_size=DEFAULT_PIPELINE_CHUNK_SIZE,
+    cache=None,
+    as_of=None,
+    rate_check=None
+):
+    """compute_rotation_chunks for an already parsed portfolio (e.g. an opened snapshot): same events, same chunking."""
+    for warning in warnings:
+        yield 'warning', warning
+    for start in range(0, len(portfolio), chunk_size):
+        chunk = portfolio.take(np.arange(start, min(start + chunk_size, len(portfolio))))
+        yield from _analyze_chunk(chunk, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                                  cache, rate_check, as_of)
+
+
+def write_rotation_results(events, output_file, warnings_file, include_source=False):
+    """Pipeline sink: streams result rows and warnings as they arrive. Returns a summary dictionary.
+
+    A confirmation number repeated across rows or chunks is counted once in the summary (the last row;
+    see RotationSummary), with a warning; every row is still written.
+
+    With include_source, a 'Source File' column is added from each portfolio's source_files (multi-file runs).
+    """
+    writer = csv.writer(output_file)
+    writer.writerow(RESULT_CSV_COLUMNS + ['Source File'] if include_source else RESULT_CSV_COLUMNS)
+    summary = RotationSummary()
+    for event in events:
+        if event[0] == 'warning':
+            warnings_file.write(event[1] + "\n")
+            summary.warnings += 1
+            continue
+
+        portfolio = event[1]
+        with INSTRUMENTATION.timer('write_results'):
+            batch = portfolio.metrics
+            new_bond_fixed_rate_pct = portfolio.params['new_bond_fixed_rate_pct']
+            columns = [batch[key].tolist() for key in (
+                'total_months_held', 'penalty_applies', 'penalty', 'accrued_interest', 'taxes_owed',
+                'immediate_cost', 'net_proceeds', 'compounded_fixed_rate_benefit', 'net_gain_or_loss',
+                'break_even_years'
+            )]
+            csv_lines = portfolio.csv_line.tolist()
+            fixed_rates = portfolio.fixed_rate_pct.tolist()
+            error_codes = batch['error_code'].tolist()
+            warning_codes = batch['warning_code'].tolist()
+            note_codes = batch['note_code'].tolist()
+            if include_source:
+                source_files = portfolio.source_files
+                sources = [source_files[index] for index in portfolio.source_index.tolist()]
+            for i, confirmation in enumerate(portfolio.confirmations):
+                note = ''
+                if note_codes[i]:
+                    note = f"New fixed rate ({new_bond_fixed_rate_pct}%) is not higher than this bond's rate ({fixed_rates[i]}%)."
+                row = (
+                    [confirmation, csv_lines[i]] + [column[i] for column in columns] +
+                    [BATCH_ERROR_MESSAGES[error_codes[i]] or '',
+                     "Current value is less than principal. Check inputs." if warning_codes[i] else '',
+                     note]
+                )
+                if include_source:
+                    row.append(sources[i])
+                writer.writerow(row)
+
+        for duplicate in summary.add_rows(portfolio.confirmations, csv_lines, recommended_net_gains(batch).tolist()):
+            warnings_file.write(duplicate + "\n")
+    return summary.as_dict()
@@ -0,0 +1,398 @@
+"""BondPortfolio: bond inputs and batch results as parallel typed arrays, and its builder."""
+import array
+import functools
+import sys
+from datetime import date
+
+import numpy as np
+
+from .batch import (
+    BATCH_ERR_UNDER_12_MONTHS, BATCH_ERROR_CATEGORIES, BATCH_ERROR_MESSAGES, BATCH_OK, EPOCH_ORDINAL,
+    batch_row_to_metrics, holding_stage_batch, horizon_curve_batch, proceeds_stage_batch, rotation_stage_batch,
+    summarize_batch
+)
+from .backtest import backtest_rotation_batch
+from .instrumentation import INSTRUMENTATION
+from .montecarlo import simulate_rotation_batch
+from .optimizer import optimize_rotation_plan
+from .timing import redemption_timing_batch
+
+
+# --- Bond Portfolio Store (parallel typed arrays instead of a dict per bond) ---
+TABLE_STATUS_LABELS = ["CONSIDER ROTATING", "NEUTRAL", "DO NOT ROTATE", "Cannot redeem yet", "Error"]
+
+
+class BondPortfolio:
+    """Bond inputs and analysis results held as parallel typed NumPy arrays.
+
+    Confirmation numbers map to row indices through self.index. Rotation parameters are stored
+    once per run in self.params, and self.metrics holds the batch engine's result columns. The
+    analysis stages that do not depend on the new bond (age, penalty, taxes, net proceeds) are kept
+    between analyze() calls, so re-analyzing with another new rate or horizon only reruns the last one;
+    the net gain versus horizon curve is kept per new rate, so a new horizon is a lookup.
+    """
+
+    def __init__(self, confirmations, issue_date, fixed_rate_pct, composite_rate_pct, principal, current_value, csv_line):
+        self.confirmations = confirmations
+        self.index = {confirmation: i for i, confirmation in enumerate(confirmations)}
+        self.issue_date = np.asarray(issue_date, dtype='datetime64[D]')
+        self.fixed_rate_pct = np.asarray(fixed_rate_pct, dtype=np.float64)
+        self.composite_rate_pct = np.asarray(composite_rate_pct, dtype=np.float64)
+        self.principal = np.asarray(principal, dtype=np.float64)
+        self.current_value = np.asarray(current_value, dtype=np.float64)
+        self.csv_line = np.asarray(csv_line, dtype=np.int32)
+        self.params = None # Rotation parameters of the last analyze() call
+        self.metrics = None # Column arrays from calculate_rotation_metrics_batch
+        self.source_files = None # CSV paths of a portfolio merged from several files (see ibond.ingest)
+        self.source_index = None # Per-row index into source_files
+        self.stages_reused = [] # Names of the stages the last analyze() did not recompute
+        self._stages = {} # Stage name -> (input columns, parameters, result)
+
+    def __len__(self):
+        return len(self.confirmations)
+
+    def batch_columns(self):
+        """The bond columns in the keyword form calculate_rotation_metrics_batch takes."""
+        return {
+            'old_bond_principal': self.principal,
+            'old_bond_issue_date': self.issue_date,
+            'old_bond_fixed_rate_pct': self.fixed_rate_pct,
+            'old_bond_current_value': self.current_value,
+            'old_bond_composite_rate_pct': self.composite_rate_pct,
+        }
+
+    def analyze(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, cache=None, **batch_options):
+        """Runs the batch engine over every bond and keeps the results and parameters on the portfolio.
+
+        With a RotationResultCache, only bonds missing from the cache are computed.
+        """
+        if cache is None:
+            calculate = self._staged_metrics
+        else:
+            calculate = functools.partial(cache.calculate, self.batch_columns())
+        self.stages_reused = []
+        with INSTRUMENTATION.timer('compute'):
+            self.metrics = calculate(
+                new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                **batch_options
+            )
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count('bonds_analyzed', len(self))
+            error_counts = np.bincount(self.metrics['error_code'], minlength=len(BATCH_ERROR_MESSAGES))
+            for code, category in BATCH_ERROR_CATEGORIES.items():
+                if error_counts[code]:
+                    INSTRUMENTATION.count_error(category, int(error_counts[code]))
+        self.params = {
+            'new_bond_fixed_rate_pct': new_bond_fixed_rate_pct,
+            'federal_tax_rate_pct': federal_tax_rate_pct,
+            'investment_horizon_years': investment_horizon_years,
+            'break_even_max_years': batch_options.get('break_even_max_years', 100),
+            'as_of': batch_options.get('as_of') or date.today(),
+        }
+        return self.metrics
+
+    def _stage(self, name, parameters, compute):
+        """The named stage's result, recomputed only when the input columns or the parameters it depends on changed."""
+        inputs = (self.issue_date, self.fixed_rate_pct, self.composite_rate_pct, self.principal, self.current_value)
+        stored = self._stages.get(name)
+        if stored is not None and stored[1] == parameters and all(old is new for old, new in zip(stored[0], inputs)):
+            self.stages_reused.append(name)
+            return stored[2]
+        result = compute()
+        self._stages[name] = (inputs, parameters, result)
+        return result
+
+    def _redemption_stages(self, federal_tax_rate_pct, as_of, prefix=''):
+        """The (holding, proceeds) stages for a tax rate and as-of date, kept under prefix + their names."""
+        holding = self._stage(prefix + 'holding', (as_of,), lambda: holding_stage_batch(
+            self.principal, self.issue_date, self.current_value, self.composite_rate_pct, as_of=as_of
+        ))
+        proceeds = self._stage(prefix + 'proceeds', (as_of, federal_tax_rate_pct),
+                               lambda: proceeds_stage_batch(holding, federal_tax_rate_pct))
+        return holding, proceeds
+
+    def _curve_stage(self, proceeds, new_bond_fixed_rate_pct, federal_tax_rate_pct, as_of, max_years, periods_per_year):
+        """The horizon curve stage for a new rate (the horizon itself is not part of its key)."""
+        return self._stage('curve', (as_of, federal_tax_rate_pct, new_bond_fixed_rate_pct, max_years, periods_per_year),
+                           lambda: horizon_curve_batch(proceeds, self.fixed_rate_pct, new_bond_fixed_rate_pct,
+                                                       max_years=max_years, periods_per_year=periods_per_year))
+
+    def _staged_metrics(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years,
+                        break_even_max_years=100, break_even_periods_per_year=1, include_break_even=True, as_of=None):
+        """calculate_rotation_metrics_batch over the portfolio, reusing the stages that still apply.
+
+        With break-even, the horizon curve over the break-even range is built (or reused) and both the
+        chosen horizon and the break-even search read from it.
+        """
+        as_of = as_of or date.today()
+        holding, proceeds = self._redemption_stages(federal_tax_rate_pct, as_of)
+        curve = None
+        if include_break_even:
+            curve = self._curve_stage(proceeds, new_bond_fixed_rate_pct, federal_tax_rate_pct, as_of,
+                                      break_even_max_years, break_even_periods_per_year)
+        return rotation_stage_batch(
+            holding, proceeds, self.fixed_rate_pct, new_bond_fixed_rate_pct, investment_horizon_years,
+            break_even_max_years=break_even_max_years, break_even_periods_per_year=break_even_periods_per_year,
+            include_break_even=include_break_even, curve=curve
+        )
+
+    def _plan_year_metrics(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, year_as_of, investment_horizon_years):
+        """Metrics without break-even for a later optimizer plan year, from stages kept per plan year."""
+        prefix = f'plan {year_as_of.year} '
+        holding, proceeds = self._redemption_stages(federal_tax_rate_pct, year_as_of, prefix)
+        return self._stage(prefix + 'rotation', (year_as_of, federal_tax_rate_pct, new_bond_fixed_rate_pct,
+                                                 investment_horizon_years),
+                           lambda: rotation_stage_batch(holding, proceeds, self.fixed_rate_pct, new_bond_fixed_rate_pct,
+                                                        investment_horizon_years, include_break_even=False))
+
+    def horizon_curve(self, max_years=None, periods_per_year=1):
+        """The net gain versus horizon curve (see horizon_curve_batch) for the parameters of the last analyze().
+
+        By default it spans the break-even range, which analyze() has usually built already; other
+        ranges (e.g. periods_per_year=12 for monthly steps) are computed once and kept until the next one.
+        """
+        params = self.params
+        if max_years is None:
+            max_years = params['break_even_max_years']
+        reused = self.stages_reused
+        self.stages_reused = [] # Report only what the last analyze() reused
+        holding, proceeds = self._redemption_stages(params['federal_tax_rate_pct'], params['as_of'])
+        curve = self._curve_stage(proceeds, params['new_bond_fixed_rate_pct'], params['federal_tax_rate_pct'],
+                                  params['as_of'], max_years, periods_per_year)
+        self.stages_reused = reused
+        return curve
+
+    def simulate(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, **simulation_options):
+        """Runs simulate_rotation_batch over every bond. Returns its dictionary of per-bond distributions."""
+        with INSTRUMENTATION.timer('simulate'):
+            return simulate_rotation_batch(
+                **self.batch_columns(),
+                new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                **simulation_options
+            )
+
+    def backtest(self, dates, federal_tax_rate_pct, investment_horizon_years, **backtest_options):
+        """Runs backtest_rotation_batch over every bond at each of dates. Returns its dictionary of per-date totals."""
+        with INSTRUMENTATION.timer('backtest'):
+            return backtest_rotation_batch(
+                **self.batch_columns(),
+                dates=dates,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                **backtest_options
+            )
+
+    def redemption_timing(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, **timing_options):
+        """Runs redemption_timing_batch over every bond. Returns its dictionary of per-bond best months."""
+        with INSTRUMENTATION.timer('timing'):
+            return redemption_timing_batch(
+                **self.batch_columns(),
+                new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                **timing_options
+            )
+
+    def optimize(self, new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, **plan_options):
+        """Runs optimize_rotation_plan over every bond. Returns the plan dictionary.
+
+        When the portfolio was last analyzed with the same parameters and as-of date, those results
+        serve as the plan's first year. Later years come from stages kept per plan year, so a what-if
+        run recomputes only the stages its parameter change affects.
+        """
+        params = self.params
+        if params is not None and (
+            (params['new_bond_fixed_rate_pct'], params['federal_tax_rate_pct'], params['investment_horizon_years'],
+             params['as_of']) ==
+            (new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, plan_options.get('as_of') or date.today())
+        ):
+            plan_options.setdefault('current_batch', self.metrics)
+        plan_options.setdefault('year_batch', functools.partial(self._plan_year_metrics, new_bond_fixed_rate_pct,
+                                                                federal_tax_rate_pct))
+        reused = self.stages_reused
+        self.stages_reused = []
+        with INSTRUMENTATION.timer('optimize'):
+            plan = optimize_rotation_plan(
+                **self.batch_columns(),
+                new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+                federal_tax_rate_pct=federal_tax_rate_pct,
+                investment_horizon_years=investment_horizon_years,
+                **plan_options
+            )
+        self.stages_reused = reused # Report only what the last analyze() reused
+        planned_years = {str(year['year']) for year in plan['years']}
+        for name in [name for name in self._stages if name.startswith('plan ') and name.split()[1] not in planned_years]:
+            del self._stages[name] # Stages of years no longer in the plan
+        return plan
+
+    @classmethod
+    def concatenate(cls, portfolios):
+        """One BondPortfolio holding the rows of every portfolio in order.
+
+        Analysis results are kept when every part was analyzed with the same parameters.
+        """
+        if not portfolios:
+            return BondPortfolioBuilder().build()
+        combined = cls(
+            confirmations=[confirmation for portfolio in portfolios for confirmation in portfolio.confirmations],
+            issue_date=np.concatenate([portfolio.issue_date for portfolio in portfolios]),
+            fixed_rate_pct=np.concatenate([portfolio.fixed_rate_pct for portfolio in portfolios]),
+            composite_rate_pct=np.concatenate([portfolio.composite_rate_pct for portfolio in portfolios]),
+            principal=np.concatenate([portfolio.principal for portfolio in portfolios]),
+            current_value=np.concatenate([portfolio.current_value for portfolio in portfolios]),
+            csv_line=np.concatenate([portfolio.csv_line for portfolio in portfolios]),
+        )
+        params = portfolios[0].params
+        if params is not None and all(portfolio.params == params for portfolio in portfolios):
+            combined.metrics = {key: np.concatenate([portfolio.metrics[key] for portfolio in portfolios])
+                                for key in portfolios[0].metrics}
+            combined.params = dict(params)
+        return combined
+
+    def take(self, rows, with_metrics=False):
+        """A new BondPortfolio holding only the given rows (inputs only unless with_metrics is set)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        confirmations = self.confirmations
+        taken = BondPortfolio(
+            confirmations=[confirmations[row] for row in rows.tolist()],
+            issue_date=self.issue_date[rows],
+            fixed_rate_pct=self.fixed_rate_pct[rows],
+            composite_rate_pct=self.composite_rate_pct[rows],
+            principal=self.principal[rows],
+            current_value=self.current_value[rows],
+            csv_line=self.csv_line[rows],
+        )
+        if self.source_index is not None:
+            taken.source_files = self.source_files
+            taken.source_index = self.source_index[rows]
+        if with_metrics and self.metrics is not None:
+            taken.metrics = {key: column[rows] for key, column in self.metrics.items()}
+            taken.params = dict(self.params)
+        return taken
+
+    def deduplicated(self):
+        """Collapses repeated confirmation numbers the way BondPortfolioBuilder(deduplicate=True) does.
+
+        The last row wins and keeps the first row's position. Returns self when there are no repeats.
+        """
+        if len(self.index) == len(self.confirmations):
+            return self
+        first_rows = {}
+        for row, confirmation in enumerate(self.confirmations):
+            first_rows.setdefault(confirmation, row)
+        return self.take([self.index[self.confirmations[row]] for row in sorted(first_rows.values())])
+
+    def bond_input(self, index):
+        """The bond_input dictionary (as produced by parse_bond_rows) for one row."""
+        return {
+            "confirmation": self.confirmations[index],
+            "issue_date": self.issue_date[index].item(),
+            "fixed_rate_pct": self.fixed_rate_pct[index].item(),
+            "composite_rate_pct": self.composite_rate_pct[index].item(),
+            "principal": self.principal[index].item(),
+            "current_value": self.current_value[index].item(),
+            "csv_line": self.csv_line[index].item(),
+        }
+
+    def row_metrics(self, index):
+        """The calculate_rotation_metrics dictionary for one analyzed row."""
+        new_rate = self.params['new_bond_fixed_rate_pct']
+        metrics = batch_row_to_metrics(self.metrics, index, self.fixed_rate_pct[index].item(), new_rate,
+                                       max_years_to_check=self.params['break_even_max_years'])
+        metrics['new_rate_used'] = new_rate
+        return metrics
+
+    def summary(self):
+        """(recommended_count, total_net_gain) for the last analysis."""
+        return summarize_batch(self.metrics)
+
+    def results_table(self):
+        """Parallel column arrays for the GUI results table."""
+        metrics = self.metrics
+        has_error = metrics['error_code'] != BATCH_OK
+        net_gain = np.where(has_error, np.nan, metrics['net_gain_or_loss'])
+        status = np.where(net_gain > 0, 0, np.where(net_gain < 0, 2, 1)).astype(np.int8)
+        status[has_error] = 4
+        status[metrics['error_code'] == BATCH_ERR_UNDER_12_MONTHS] = 3
+        return {
+            'confirmation': np.array(self.confirmations, dtype=object),
+            'issue_date': self.issue_date,
+            'months_held': metrics['total_months_held'],
+            'net_gain': net_gain,
+            'break_even': metrics['break_even_years'],
+            'status': status,
+            'recommended': ~has_error & (net_gain > 0),
+            'has_error': has_error,
+        }
+
+    def memory_footprint(self):
+        """Approximate bytes used, per component and in total."""
+        footprint = {
+            'confirmations': sys.getsizeof(self.confirmations) + sum(sys.getsizeof(c) for c in self.confirmations),
+            'index': sys.getsizeof(self.index),
+            'inputs': sum(column.nbytes for column in (
+                self.issue_date, self.fixed_rate_pct, self.composite_rate_pct,
+                self.principal, self.current_value, self.csv_line
+            )),
+            'metrics': sum(column.nbytes for column in self.metrics.values()) if self.metrics else 0,
+            'stages': sum(column.nbytes for _, _, result in self._stages.values() for column in result.values()),
+        }
+        footprint['total'] = sum(footprint.values())
+        return footprint
+
+
+class BondPortfolioBuilder:
+    """Accumulates parsed bond_input dicts into compact typed buffers, then builds a BondPortfolio.
+
+    With deduplicate=True a repeated confirmation number overwrites the earlier row in place
+    (the last row wins, keeping the first row's position).
+    """
+
+    def __init__(self, deduplicate=True):
+        self.deduplicate = deduplicate
+        self._confirmations = []
+        self._index = {}
+        self._issue_day = array.array('q')
+        self._fixed_rate_pct = array.array('d')
+        self._composite_rate_pct = array.array('d')
+        self._principal = array.array('d')
+        self._current_value = array.array('d')
+        self._csv_line = array.array('i')
+
+    def __len__(self):
+        return len(self._confirmations)
+
+    def add(self, bond_input):
+        """Appends one parsed bond (or replaces the row with the same confirmation)."""
+        values = (
+            bond_input['issue_date'].toordinal() - EPOCH_ORDINAL, bond_input['fixed_rate_pct'],
+            bond_input['composite_rate_pct'], bond_input['principal'], bond_input['current_value'],
+            bond_input['csv_line']
+        )
+        buffers = (self._issue_day, self._fixed_rate_pct, self._composite_rate_pct,
+                   self._principal, self._current_value, self._csv_line)
+        existing = self._index.get(bond_input['confirmation']) if self.deduplicate else None
+        if existing is None:
+            self._index[bond_input['confirmation']] = len(self._confirmations)
+            self._confirmations.append(bond_input['confirmation'])
+            for buffer, value in zip(buffers, values):
+                buffer.append(value)
+        else:
+            for buffer, value in zip(buffers, values):
+                buffer[existing] = value
+
+    def build(self):
+        """Returns the BondPortfolio holding every bond added so far."""
+        return BondPortfolio(
+            confirmations=self._confirmations,
+            issue_date=np.frombuffer(self._issue_day, dtype=np.int64).astype('datetime64[D]'),
+            fixed_rate_pct=np.frombuffer(self._fixed_rate_pct, dtype=np.float64).copy(),
+            composite_rate_pct=np.frombuffer(self._composite_rate_pct, dtype=np.float64).copy(),
+            principal=np.frombuffer(self._principal, dtype=np.float64).copy(),
+            current_value=np.frombuffer(self._current_value, dtype=np.float64).copy(),
+            csv_line=np.frombuffer(self._csv_line, dtype=np.int32).copy(),
+        )
@@ -0,0 +1,229 @@
+"""Treasury I bond rate table: fixed and semiannual inflation rates by month, and the values they imply.
+
+The bundled table (treasury_rates.csv next to this module) lists every May/November announcement.
+It is expanded to one entry per month, so a bond's fixed rate, or the inflation rate in effect when
+one of its six-month rate periods starts, is an array index away. Add a row to the CSV (or pass
+another table) after each announcement.
+"""
+import csv
+import functools
+import os
+from datetime import date
+
+import numpy as np
+
+from .batch import months_held_batch
+
+
+# --- Treasury Rate Table ---
+DEFAULT_RATE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'treasury_rates.csv')
+RATE_TABLE_COLUMNS = ('Effective Month', 'Fixed Rate', 'Semiannual Inflation Rate')
+I_BOND_MATURITY_MONTHS = 360 # Interest stops after 30 years
+I_BOND_VALUE_BASE = 25.0 # Treasury computes values per $25 and scales them
+PENALTY_MONTHS = 3 # Interest forfeited when redeeming before five years
+RATE_CHECK_TOLERANCE_PCT = 0.005 # Supplied rates further than this from the table's are flagged
+VALUE_CHECK_TOLERANCE = 0.005 # Relative difference in current value that is flagged...
+VALUE_CHECK_MIN_DOLLARS = 0.50 # ...when it is also more than this many dollars
+
+
+def composite_rate_pct(fixed_rate_pct, inflation_rate_pct):
+    """Treasury's composite rate: fixed + 2 x semiannual inflation + fixed x inflation, rounded to 0.01 and floored at 0."""
+    composite = fixed_rate_pct + 2.0 * inflation_rate_pct + fixed_rate_pct * inflation_rate_pct / 100.0
+    return np.maximum(np.round(composite, 2), 0.0)
+
+
+def _month_index(text):
+    """'YYYY-MM' -> months since 1970-01 (the datetime64[M] count)."""
+    year, month = (int(part) for part in text.strip().split('-'))
+    if not 1 <= month <= 12:
+        raise ValueError(f"month {month} is out of range")
+    return (year - 1970) * 12 + month - 1
+
+
+class TreasuryRateTable:
+    """Fixed and semiannual inflation rates expanded to one entry per month.
+
+    fixed_rate_pct[i] is the fixed rate of bonds issued in month first_month + i; inflation_rate_pct[i]
+    is the latest inflation rate announced by that month. Issue months after the last announcement's
+    six-month window are not covered; rate periods starting after it reuse the last inflation rate.
+    """
+
+    def __init__(self, announcements):
+        announcements = sorted(announcements)
+        if not announcements:
+            raise ValueError("The rate table has no announcements.")
+        self.first_month = announcements[0][0]
+        self.last_announcement = announcements[-1][0]
+        months = np.arange(self.first_month, self.last_announcement + 6, dtype=np.int64)
+        starts = np.array([month for month, _, _ in announcements], dtype=np.int64)
+        latest = np.searchsorted(starts, months, side='right') - 1
+        self.fixed_rate_pct = np.array([fixed for _, fixed, _ in announcements], dtype=np.float64)[latest]
+        self.inflation_rate_pct = np.array([inflation for _, _, inflation in announcements], dtype=np.float64)[latest]
+
+    @classmethod
+    def from_csv(cls, path):
+        """Reads a table with RATE_TABLE_COLUMNS ('YYYY-MM', percent, percent). Raises ValueError for bad rows."""
+        announcements = []
+        with open(path, newline='', encoding='utf-8-sig') as table_file:
+            reader = csv.DictReader(table_file)
+            missing = set(RATE_TABLE_COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"Rate table '{os.path.basename(path)}' is missing columns: {', '.join(sorted(missing))}")
+            for line_num, row in enumerate(reader, start=2):
+                try:
+                    announcements.append((
+                        _month_index(row['Effective Month']), float(row['Fixed Rate']),
+                        float(row['Semiannual Inflation Rate'])
+                    ))
+                except (ValueError, AttributeError) as e:
+                    raise ValueError(f"Rate table '{os.path.basename(path)}' line {line_num}: {e}") from None
+        return cls(announcements)
+
+    @property
+    def last_covered_month(self):
+        """Last issue month with a known fixed rate, as 'YYYY-MM'."""
+        return str(np.datetime64(self.first_month + len(self.fixed_rate_pct) - 1, 'M'))
+
+    def bond_values(self, issue_date, principal, as_of=None):
+        """Fixed rate, current composite rate and current value of every bond as of a date (default today).
+
+        Values accrue monthly and compound every six months on a $25 base, rounded to the cent like
+        Treasury's tables, then scale to the principal. Returns a dictionary of columns: 'covered' (the
+        issue month is in the table; other rows are NaN), 'fixed_rate_pct', 'composite_rate_pct',
+        'current_value', and 'penalty_value' (the value three months earlier for bonds under five years,
+        which TreasuryDirect shows net of the penalty).
+        """
+        as_of = as_of or date.today()
+        issue_date = np.asarray(issue_date, dtype='datetime64[D]')
+        principal = np.asarray(principal, dtype=np.float64)
+        offsets = issue_date.astype('datetime64[M]').astype(np.int64) - self.first_month
+        covered = (offsets >= 0) & (offsets < len(self.fixed_rate_pct))
+        fixed = np.where(covered, self.fixed_rate_pct[np.clip(offsets, 0, len(self.fixed_rate_pct) - 1)], np.nan)
+        months_held = np.clip(months_held_batch(issue_date, as_of), 0, I_BOND_MATURITY_MONTHS)
+
+        value, composite = self.value_per_base(offsets, months_held)
+        penalty_months = np.where(months_held < 60, np.maximum(months_held - PENALTY_MONTHS, 0), months_held)
+        penalty_value, _ = self.value_per_base(offsets, penalty_months)
+        units = principal / I_BOND_VALUE_BASE
+        return {
+            'covered': covered,
+            'fixed_rate_pct': fixed,
+            'composite_rate_pct': np.where(covered, composite, np.nan),
+            'current_value': np.where(covered, np.round(value * units, 2), np.nan),
+            'penalty_value': np.where(covered, np.round(penalty_value * units, 2), np.nan),
+        }
+
+    def value_per_base(self, offsets, months_held):
+        """Value of $25 after months_held months, and the composite rate of the period those months end in.
+
+        Both depend only on (issue month, months held), so they are computed once per distinct pair.
+        """
+        keys, inverse = np.unique(offsets * (I_BOND_MATURITY_MONTHS + 1) + months_held, return_inverse=True)
+        offsets, months_held = np.divmod(keys, I_BOND_MATURITY_MONTHS + 1)
+        fixed = self.fixed_rate_pct[np.clip(offsets, 0, len(self.fixed_rate_pct) - 1)]
+        value = np.full(len(keys), I_BOND_VALUE_BASE)
+        composite = np.full(len(keys), np.nan)
+        periods = months_held // 6
+        partial_months = months_held % 6
+        last_inflation = len(self.inflation_rate_pct) - 1
+        for period in range(int(periods.max(initial=-1)) + 1):
+            rate = composite_rate_pct(fixed, self.inflation_rate_pct[np.clip(offsets + 6 * period, 0, last_inflation)])
+            growth = 1.0 + rate / 200.0
+            current = periods == period
+            composite[current] = rate[current]
+            value = np.where(periods > period, np.round(value * growth, 2), value)
+            value = np.where(current & (partial_months > 0), np.round(value * growth ** (partial_months / 6.0), 2), value)
+        return value[inverse], composite[inverse]
+
+
+@functools.lru_cache(maxsize=8)
+def load_rate_table(path=None):
+    """The TreasuryRateTable read from path (default: the bundled table). Tables are read once per path."""
+    return TreasuryRateTable.from_csv(path or DEFAULT_RATE_TABLE_PATH)
+
+
+class RateTableCheck:
+    """Checks each bond's supplied fixed rate, composite rate and current value against a rate table.
+
+    With derive=True the table's values replace the supplied ones (which may then be blank), and rows
+    the table cannot cover are dropped unless the CSV supplied all three. Disagreements are counted over
+    every apply() call; report() summarizes them.
+    """
+
+    def __init__(self, table, derive=False):
+        self.table = table
+        self.derive = derive
+        self.as_of = None
+        self.counts = {'checked': 0, 'fixed_rate': 0, 'composite_rate': 0, 'current_value': 0, 'not_covered': 0}
+
+    def apply(self, portfolio, as_of=None):
+        """Checks (and with derive, fills in) a BondPortfolio's rate columns. Returns (portfolio, warnings).
+
+        With derive the returned portfolio is a new one; the given portfolio keeps its supplied columns.
+        """
+        self.as_of = as_of or date.today()
+        derived = self.table.bond_values(portfolio.issue_date, portfolio.principal, self.as_of)
+        covered = derived['covered']
+        supplied_fixed, supplied_composite, supplied_value = (
+            portfolio.fixed_rate_pct, portfolio.composite_rate_pct, portfolio.current_value
+        )
+        value_tolerance = np.maximum(VALUE_CHECK_TOLERANCE * derived['current_value'], VALUE_CHECK_MIN_DOLLARS)
+        fixed_off = covered & (np.abs(supplied_fixed - derived['fixed_rate_pct']) > RATE_CHECK_TOLERANCE_PCT)
+        composite_off = covered & (np.abs(supplied_composite - derived['composite_rate_pct']) > RATE_CHECK_TOLERANCE_PCT)
+        value_off = (covered & (np.abs(supplied_value - derived['current_value']) > value_tolerance)
+                     & (np.abs(supplied_value - derived['penalty_value']) > value_tolerance))
+        self.counts['checked'] += int(np.count_nonzero(covered))
+        self.counts['fixed_rate'] += int(np.count_nonzero(fixed_off))
+        self.counts['composite_rate'] += int(np.count_nonzero(composite_off))
+        self.counts['current_value'] += int(np.count_nonzero(value_off))
+        self.counts['not_covered'] += int(np.count_nonzero(~covered))
+
+        warnings = []
+        labels = self._row_labels(portfolio)
+        for row in np.flatnonzero(fixed_off | composite_off | value_off).tolist():
+            differences = []
+            if fixed_off[row]:
+                differences.append(f"Fixed Rate {supplied_fixed[row]}% vs {derived['fixed_rate_pct'][row]}% in the rate table")
+            if composite_off[row]:
+                differences.append(f"Composite Interest rate {supplied_composite[row]}% vs {derived['composite_rate_pct'][row]}% computed")
+            if value_off[row]:
+                differences.append(f"Current Value ${supplied_value[row]:,.2f} vs ${derived['current_value'][row]:,.2f} computed")
+            warnings.append(f"Rate check, {labels(row)}: {'; '.join(differences)}.")
+        if not self.derive:
+            return portfolio, warnings
+
+        fixed_rate_pct = np.where(covered, derived['fixed_rate_pct'], supplied_fixed)
+        composite_rate_pct = np.where(covered, derived['composite_rate_pct'], supplied_composite)
+        current_value = np.where(covered, derived['current_value'], supplied_value)
+        unknown = np.isnan(fixed_rate_pct) | np.isnan(composite_rate_pct) | np.isnan(current_value)
+        for row in np.flatnonzero(unknown).tolist():
+            warnings.append(f"Skipping {labels(row)}: No rates for issue month {str(portfolio.issue_date[row])[:7]} in the "
+                            f"rate table; fill in Fixed Rate, Composite Interest rate and Current Value.")
+        rows = np.flatnonzero(~unknown)
+        filled = portfolio.take(rows)
+        filled.fixed_rate_pct, filled.composite_rate_pct, filled.current_value = (
+            fixed_rate_pct[rows], composite_rate_pct[rows], current_value[rows]
+        )
+        return filled, warnings
+
+    @staticmethod
+    def _row_labels(portfolio):
+        """Row -> 'CSV line N (Conf: X)' text, prefixed with the source file for merged portfolios."""
+        csv_lines = portfolio.csv_line
+        if portfolio.source_files is None:
+            return lambda row: f"CSV line {csv_lines[row]} (Conf: {portfolio.confirmations[row]})"
+        return lambda row: (f"{portfolio.source_files[portfolio.source_index[row]]} line {csv_lines[row]} "
+                            f"(Conf: {portfolio.confirmations[row]})")
+
+    def report(self):
+        """One-line summary of the checks so far."""
+        counts = self.counts
+        disagreements = f"fixed rate {counts['fixed_rate']}, composite rate {counts['composite_rate']}, current value {counts['current_value']}"
+        action = "Rates derived from the rate table" if self.derive else "Rate table check"
+        line = f"{action}: {counts['checked']} bond(s) covered ({disagreements} disagree with the CSV)"
+        if counts['not_covered']:
+            line += f", {counts['not_covered']} issued outside the table"
+        last_month = self.table.last_covered_month
+        if self.as_of is not None and str(np.datetime64(self.as_of, 'M')) > last_month:
+            line += f"; the table ends {last_month}, later periods assume its last inflation rate"
+        return line + "."
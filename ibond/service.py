@@ -0,0 +1,417 @@
+"""Local HTTP/JSON analysis service over a warm process pool, and a small client for it."""
+import collections
+import concurrent.futures
+import csv
+import functools
+import http.server
+import io
+import json
+import math
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+import numpy as np
+
+from .batch import calculate_rotation_metrics_batch
+from .core import missing_csv_columns, parse_bond_rows, parse_issue_date
+from .defaults import (
+    DEFAULT_FEDERAL_TAX_RATE_PCT, DEFAULT_INVESTMENT_HORIZON_YEARS, DEFAULT_NEW_BOND_FIXED_RATE_PCT,
+    SERVICE_BATCH_WINDOW_MS, SERVICE_DEFAULT_HOST, SERVICE_DEFAULT_PORT, SERVICE_MAX_PENDING_BONDS
+)
+from .portfolio import BondPortfolioBuilder
+
+
+# --- Local Analysis Service (HTTP/JSON on localhost over a warm process pool) ---
+SERVICE_MAX_BATCH_BONDS = 50000 # Bonds per pooled computation
+SERVICE_MAX_BODY_BYTES = 64 * 1024 * 1024
+SERVICE_REQUEST_TIMEOUT_S = 120.0
+SERVICE_LATENCY_WINDOW = 1000 # Recent requests kept for latency percentiles
+
+
+class ServiceRequestError(Exception):
+    """A request the service rejects; carries the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _service_task(columns, parameters):
+    """Pool task: runs the batch engine over the concatenated columns of one request batch."""
+    new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, as_of = parameters
+    return calculate_rotation_metrics_batch(
+        **columns,
+        new_bond_fixed_rate_pct=new_bond_fixed_rate_pct,
+        federal_tax_rate_pct=federal_tax_rate_pct,
+        investment_horizon_years=investment_horizon_years,
+        as_of=as_of
+    )
+
+
+def _finite_or_none(value):
+    """JSON has no NaN or Infinity: non-finite numbers are sent as null."""
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def _service_warm_up(_):
+    """Pool task used to start every worker process before the first request."""
+    return os.getpid()
+
+
+def parse_service_request(payload):
+    """Validates an /analyze JSON payload. Returns (portfolio, warnings, parameters).
+
+    The portfolio is given either as 'csv' (CSV text with the required header) or as 'bonds'
+    (a list of objects keyed by the CSV column names); both go through parse_bond_rows.
+    """
+    if not isinstance(payload, dict):
+        raise ServiceRequestError(400, "Request body must be a JSON object.")
+    try:
+        new_bond_fixed_rate_pct = float(payload.get('new_rate', DEFAULT_NEW_BOND_FIXED_RATE_PCT))
+        federal_tax_rate_pct = float(payload.get('tax_rate', DEFAULT_FEDERAL_TAX_RATE_PCT))
+        investment_horizon_years = payload.get('horizon', DEFAULT_INVESTMENT_HORIZON_YEARS)
+        as_of = parse_issue_date(payload['as_of']) if payload.get('as_of') else date.today()
+    except (TypeError, ValueError) as e:
+        raise ServiceRequestError(400, f"Invalid parameter: {e}")
+    if new_bond_fixed_rate_pct < 0 or federal_tax_rate_pct < 0:
+        raise ServiceRequestError(400, "Rates cannot be negative.")
+    if not isinstance(investment_horizon_years, int) or isinstance(investment_horizon_years, bool) or investment_horizon_years <= 0:
+        raise ServiceRequestError(400, "Horizon must be a positive integer.")
+
+    if 'csv' in payload:
+        if not isinstance(payload['csv'], str):
+            raise ServiceRequestError(400, "'csv' must be a string.")
+        reader = csv.DictReader(io.StringIO(payload['csv'].lstrip('﻿')))
+        if not reader.fieldnames:
+            raise ServiceRequestError(400, "CSV appears to be empty or has no header.")
+        missing = missing_csv_columns(reader.fieldnames)
+        if missing:
+            raise ServiceRequestError(400, f"CSV is missing required columns: {', '.join(sorted(missing))}")
+        rows = reader
+    elif 'bonds' in payload:
+        if not isinstance(payload['bonds'], list) or not all(isinstance(bond, dict) for bond in payload['bonds']):
+            raise ServiceRequestError(400, "'bonds' must be a list of objects.")
+        rows = ({key: '' if value is None else str(value) for key, value in bond.items()} for bond in payload['bonds'])
+    else:
+        raise ServiceRequestError(400, "Provide the portfolio as 'csv' or 'bonds'.")
+
+    builder = BondPortfolioBuilder()
+    warnings = []
+    for bond_input, warning in parse_bond_rows(rows, as_of):
+        if warning is not None:
+            warnings.append(warning)
+        else:
+            builder.add(bond_input)
+    parameters = (new_bond_fixed_rate_pct, federal_tax_rate_pct, investment_horizon_years, as_of)
+    return builder.build(), warnings, parameters
+
+
+class _ServiceHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for bursts of concurrent clients."""
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _ServiceJob:
+    """One parsed request waiting for (or holding) its results."""
+
+    def __init__(self, portfolio, warnings, parameters):
+        self.portfolio = portfolio
+        self.warnings = warnings
+        self.parameters = parameters
+        self.done = threading.Event()
+        self.error = None
+
+
+class RotationService:
+    """Long-running localhost analysis service.
+
+    Handler threads parse requests into BondPortfolios and queue them. A dispatcher thread
+    groups queued requests with identical parameters (waiting up to batch_window_ms), runs each
+    group as one batch computation on a warm process pool and hands every request its slice of
+    the results. When more than max_pending_bonds are queued or running, new requests are
+    refused with 503 and a Retry-After header.
+
+    Endpoints: POST /analyze, GET /stats, GET /health.
+    """
+
+    def __init__(self, host=SERVICE_DEFAULT_HOST, port=SERVICE_DEFAULT_PORT, workers=None,
+                 batch_window_ms=SERVICE_BATCH_WINDOW_MS, max_batch_bonds=SERVICE_MAX_BATCH_BONDS,
+                 max_pending_bonds=SERVICE_MAX_PENDING_BONDS):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window_s = batch_window_ms / 1000.0
+        self.max_batch_bonds = max_batch_bonds
+        self.max_pending_bonds = max_pending_bonds
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_bonds = 0
+        self._started = time.monotonic()
+        self._latencies = collections.deque(maxlen=SERVICE_LATENCY_WINDOW)
+        self._stats = {'requests': 0, 'bonds': 0, 'rejected': 0, 'failed': 0, 'batches': 0, 'batched_requests': 0}
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        list(self._pool.map(_service_warm_up, range(self.workers))) # Start the workers now, not on the first request
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+        self.server = _ServiceHTTPServer((host, port), self._handler_class())
+
+    @property
+    def address(self):
+        """(host, port) the service listens on (port 0 picks a free port)."""
+        return self.server.server_address[:2]
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        """Serves on a background thread; returns immediately."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        """Stops accepting requests, then stops the dispatcher and the worker pool."""
+        self.server.shutdown()
+        self.server.server_close()
+        self._jobs.put(None)
+        self._dispatcher.join()
+        self._pool.shutdown()
+
+    def analyze(self, payload, timeout=SERVICE_REQUEST_TIMEOUT_S):
+        """Runs one /analyze request. Returns the response dictionary or raises ServiceRequestError."""
+        started = time.monotonic()
+        portfolio, warnings, parameters = parse_service_request(payload)
+        job = _ServiceJob(portfolio, warnings, parameters)
+        if len(portfolio):
+            with self._lock:
+                if self._pending_bonds and self._pending_bonds + len(portfolio) > self.max_pending_bonds:
+                    self._stats['rejected'] += 1
+                    raise ServiceRequestError(503, "Service is busy; retry shortly.")
+                self._pending_bonds += len(portfolio)
+            self._jobs.put(job)
+            if not job.done.wait(timeout):
+                raise ServiceRequestError(504, "Analysis timed out.")
+            if job.error is not None:
+                with self._lock:
+                    self._stats['failed'] += 1
+                raise ServiceRequestError(500, f"Analysis failed: {job.error}")
+        else:
+            portfolio.analyze(*parameters[:3], as_of=parameters[3])
+
+        response = self._build_response(job)
+        latency = time.monotonic() - started
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['bonds'] += len(portfolio)
+            self._latencies.append(latency)
+        response['latency_ms'] = latency * 1000.0
+        return response
+
+    @staticmethod
+    def _build_response(job):
+        portfolio = job.portfolio
+        bonds = []
+        for i, confirmation in enumerate(portfolio.confirmations):
+            bond = {'confirmation': confirmation, 'csv_line': portfolio.csv_line[i].item()}
+            bond.update((key, _finite_or_none(value)) for key, value in portfolio.row_metrics(i).items())
+            bonds.append(bond)
+        recommended_count, total_net_gain = portfolio.summary()
+        return {
+            'bonds': bonds,
+            'warnings': job.warnings,
+            'summary': {
+                'bonds_analyzed': len(portfolio),
+                'recommended_count': recommended_count,
+                'total_net_gain': _finite_or_none(total_net_gain),
+            },
+        }
+
+    def _dispatch_loop(self):
+        """Dispatcher thread: collects a batch window of jobs and submits one pool task per parameter set."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            batch = [job]
+            batch_bonds = len(job.portfolio)
+            deadline = time.monotonic() + self.batch_window_s
+            while batch_bonds < self.max_batch_bonds:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._jobs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._jobs.put(None) # Finish this batch, then stop
+                    break
+                batch.append(job)
+                batch_bonds += len(job.portfolio)
+
+            groups = {}
+            for job in batch:
+                groups.setdefault(job.parameters, []).append(job)
+            for parameters, jobs in groups.items():
+                columns = {
+                    name: np.concatenate([job.portfolio.batch_columns()[name] for job in jobs])
+                    for name in jobs[0].portfolio.batch_columns()
+                }
+                future = self._pool.submit(_service_task, columns, parameters)
+                future.add_done_callback(functools.partial(self._complete_batch, jobs, parameters))
+                with self._lock:
+                    self._stats['batches'] += 1
+                    self._stats['batched_requests'] += len(jobs)
+
+    def _complete_batch(self, jobs, parameters, future):
+        """Pool callback: splits a batch result back into its requests."""
+        error = future.exception()
+        start = 0
+        for job in jobs:
+            count = len(job.portfolio)
+            if error is None:
+                metrics = {name: column[start:start + count] for name, column in future.result().items()}
+                job.portfolio.metrics = metrics
+                job.portfolio.params = {
+                    'new_bond_fixed_rate_pct': parameters[0],
+                    'federal_tax_rate_pct': parameters[1],
+                    'investment_horizon_years': parameters[2],
+                    'break_even_max_years': 100,
+                    'as_of': parameters[3],
+                }
+            else:
+                job.error = error
+            start += count
+            with self._lock:
+                self._pending_bonds -= count
+            job.done.set()
+
+    def stats(self):
+        """Throughput, latency percentiles and load counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = np.array(self._latencies, dtype=np.float64)
+            stats['pending_bonds'] = self._pending_bonds
+        uptime = time.monotonic() - self._started
+        stats['uptime_s'] = uptime
+        stats['workers'] = self.workers
+        stats['queued_requests'] = self._jobs.qsize()
+        stats['requests_per_s'] = stats['requests'] / uptime if uptime > 0 else 0.0
+        stats['bonds_per_s'] = stats['bonds'] / uptime if uptime > 0 else 0.0
+        stats['mean_batch_requests'] = stats['batched_requests'] / stats['batches'] if stats['batches'] else 0.0
+        if latencies.size:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000.0
+            stats['latency_ms'] = {'p50': p50, 'p90': p90, 'p99': p99, 'max': latencies.max() * 1000.0,
+                                   'window': int(latencies.size)}
+        else:
+            stats['latency_ms'] = None
+        return stats
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send_json(self, status, body, headers=()):
+                data = json.dumps(body, allow_nan=False).encode('utf-8') # Strict JSON: see _finite_or_none
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    self._send_json(200, service.stats())
+                elif self.path == '/health':
+                    self._send_json(200, {'status': 'ok'})
+                else:
+                    self._send_json(404, {'error': f"Unknown path '{self.path}'."})
+
+            def do_POST(self):
+                if self.path != '/analyze':
+                    self._send_json(404, {'error': f"Unknown path '{self.path}'."})
+                    return
+                try:
+                    try:
+                        payload = json.loads(self._read_body() or b'null')
+                    except ValueError as e:
+                        raise ServiceRequestError(400, f"Invalid JSON: {e}")
+                    self._send_json(200, service.analyze(payload))
+                except ServiceRequestError as e:
+                    headers = [('Retry-After', '1')] if e.status == 503 else []
+                    self._send_json(e.status, {'error': str(e)}, headers)
+                except Exception as e: # Answer rather than drop the connection on a handler bug
+                    with service._lock:
+                        service._stats['failed'] += 1
+                    self.close_connection = True
+                    self._send_json(500, {'error': f"Internal error: {e}"})
+
+            def _read_body(self):
+                """The request body, once Content-Length is checked (411 when missing, 400 or 413 when unusable)."""
+                header = self.headers.get('Content-Length')
+                if header is None:
+                    self.close_connection = True
+                    raise ServiceRequestError(411, "Content-Length is required.")
+                try:
+                    length = int(header)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self.close_connection = True # The body length is unknown, so the connection cannot be reused
+                    raise ServiceRequestError(400, f"Invalid Content-Length '{header}'.")
+                if length > SERVICE_MAX_BODY_BYTES:
+                    self.close_connection = True
+                    raise ServiceRequestError(413, "Request body is too large.")
+                return self.rfile.read(length)
+
+            def log_message(self, format, *args):
+                pass # Keep the console quiet; use /stats for monitoring
+
+        return Handler
+
+
+class RotationServiceClient:
+    """Minimal urllib client for a RotationService on this machine."""
+
+    def __init__(self, base_url=f"http://{SERVICE_DEFAULT_HOST}:{SERVICE_DEFAULT_PORT}", timeout=SERVICE_REQUEST_TIMEOUT_S):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(self.base_url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceRequestError(e.code, message)
+
+    def analyze(self, csv_text=None, bonds=None, new_rate=DEFAULT_NEW_BOND_FIXED_RATE_PCT,
+                tax_rate=DEFAULT_FEDERAL_TAX_RATE_PCT, horizon=DEFAULT_INVESTMENT_HORIZON_YEARS, as_of=None):
+        """Analyzes a portfolio given as CSV text or a list of bond objects. Returns the response dictionary."""
+        payload = {'new_rate': new_rate, 'tax_rate': tax_rate, 'horizon': horizon}
+        if csv_text is not None:
+            payload['csv'] = csv_text
+        else:
+            payload['bonds'] = bonds
+        if as_of is not None:
+            payload['as_of'] = as_of.isoformat() if isinstance(as_of, date) else as_of
+        return self._request('/analyze', payload)
+
+    def stats(self):
+        return self._request('/stats')
+
+    def health(self):
+        return self._request('/health')
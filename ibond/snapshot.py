@@ -0,0 +1,140 @@
+"""Portfolio snapshots: parsed CSV columns in one memory-mappable file, reused while the CSV is unchanged."""
+import hashlib
+import json
+import mmap
+import os
+from datetime import date
+
+import numpy as np
+
+from .defaults import SNAPSHOT_SUFFIX
+from .portfolio import BondPortfolio
+
+
+# --- Portfolio Snapshots (parsed CSV columns in one memory-mappable file) ---
+SNAPSHOT_MAGIC = b'IBONDSNP'
+SNAPSHOT_VERSION = 2 # 2: latest_issue_date in the header
+SNAPSHOT_ALIGNMENT = 64 # Byte alignment of each column in the file
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'i_bond_analysis', 'snapshots')
+SNAPSHOT_COLUMNS = ('issue_date', 'fixed_rate_pct', 'composite_rate_pct', 'principal', 'current_value', 'csv_line')
+FUTURE_DATE_WARNING = "Future issue date."
+
+
+def default_snapshot_path(csv_filename):
+    """Snapshot location under DEFAULT_SNAPSHOT_DIR for a CSV file, keyed by its absolute path."""
+    name = hashlib.sha1(os.path.abspath(csv_filename).encode()).hexdigest()[:16]
+    return os.path.join(DEFAULT_SNAPSHOT_DIR, os.path.basename(csv_filename) + '.' + name + SNAPSHOT_SUFFIX)
+
+
+def _file_sha256(filename):
+    """SHA-256 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_portfolio_snapshot(portfolio, warnings, snapshot_path, csv_filename, as_of=None):
+    """Writes the parsed portfolio columns and CSV warnings to a snapshot tied to the source CSV.
+
+    as_of is the date future issue dates were checked against when parsing (default today). The
+    latest issue date is recorded too, so an earlier as_of that would reject some rows rebuilds it.
+
+    Layout: magic, little-endian header length, JSON header, then each column at an aligned offset.
+    Confirmations are stored as one UTF-8 blob plus int64 end offsets. The file is written atomically.
+    """
+    source_stat = os.stat(csv_filename)
+    encoded = [confirmation.encode('utf-8') for confirmation in portfolio.confirmations]
+    columns = {name: np.ascontiguousarray(getattr(portfolio, name)) for name in SNAPSHOT_COLUMNS}
+    columns['confirmation_ends'] = np.cumsum([len(raw) for raw in encoded], dtype=np.int64)
+    columns['confirmation_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    issue_dates = portfolio.issue_date[~np.isnat(portfolio.issue_date)]
+    latest_issue_date = str(issue_dates.max()) if issue_dates.size else None
+
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        layout[name] = {'dtype': column.dtype.str, 'count': len(column), 'offset': offset}
+        offset += -(-column.nbytes // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'source': {
+            'path': os.path.abspath(csv_filename), 'size': source_stat.st_size,
+            'mtime_ns': source_stat.st_mtime_ns, 'sha256': _file_sha256(csv_filename),
+        },
+        'parsed_as_of': (as_of or date.today()).isoformat(),
+        'future_dated_rows': sum(warning.endswith(FUTURE_DATE_WARNING) for warning in warnings),
+        'latest_issue_date': latest_issue_date,
+        'rows': len(portfolio),
+        'warnings': warnings,
+        'columns': layout,
+    }).encode('utf-8')
+    data_start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+    temp_path = snapshot_path + '.tmp'
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') + header)
+        for name, column in columns.items():
+            snapshot_file.seek(data_start + layout[name]['offset'])
+            snapshot_file.write(column.tobytes())
+        snapshot_file.truncate(data_start + offset)
+    os.replace(temp_path, snapshot_path)
+
+
+def _snapshot_is_current(source, csv_filename, header, as_of):
+    """True when the CSV still matches the snapshot (same size and mtime, or same content hash) and as_of
+    filters the same rows as the parse did: no stored row is future-dated as of it, and no row rejected
+    as future-dated may have become valid.
+    """
+    try:
+        source_stat = os.stat(csv_filename)
+    except OSError:
+        return False
+    if source_stat.st_size != source['size']:
+        return False
+    if header['future_dated_rows'] and header['parsed_as_of'] != as_of.isoformat():
+        return False # Rows rejected as future-dated may be valid as of this date
+    if header['latest_issue_date'] is not None and as_of.isoformat() < header['latest_issue_date']:
+        return False # Some stored rows are future-dated as of this date
+    if source_stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    return _file_sha256(csv_filename) == source['sha256'] # Touched but possibly unchanged
+
+
+def open_portfolio_snapshot(snapshot_path, csv_filename=None, as_of=None):
+    """Opens a snapshot zero-copy through mmap. Returns (portfolio, warnings), or (None, None) when the
+    snapshot is missing, unreadable or out of date with csv_filename (parsed as of as_of, default today).
+
+    The numeric columns are read-only views of the mapped file; only confirmation strings are decoded.
+    """
+    try:
+        with open(snapshot_path, 'rb') as snapshot_file:
+            mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None, None
+    try:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None, None
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_length = int.from_bytes(mapped[len(SNAPSHOT_MAGIC):header_start], 'little')
+        header = json.loads(mapped[header_start:header_start + header_length].decode('utf-8'))
+        if header['version'] != SNAPSHOT_VERSION:
+            return None, None
+        if csv_filename is not None and not _snapshot_is_current(header['source'], csv_filename, header, as_of or date.today()):
+            return None, None
+
+        data_start = -(-(header_start + header_length) // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+        columns = {
+            name: np.frombuffer(mapped, dtype=np.dtype(spec['dtype']), count=spec['count'], offset=data_start + spec['offset'])
+            for name, spec in header['columns'].items()
+        }
+    except (ValueError, KeyError, UnicodeDecodeError):
+        return None, None
+
+    blob = columns.pop('confirmation_blob').tobytes()
+    ends = columns.pop('confirmation_ends').tolist()
+    starts = [0] + ends[:-1]
+    confirmations = [blob[start:end].decode('utf-8') for start, end in zip(starts, ends)]
+    return BondPortfolio(confirmations=confirmations, **columns), header['warnings']
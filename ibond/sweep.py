@@ -0,0 +1,100 @@
+"""Parameter sweep: new rate x tax rate x horizon grids evaluated over a process pool."""
+import concurrent.futures
+import csv
+import itertools
+import math
+import os
+from datetime import date
+
+import numpy as np
+
+from .batch import holding_stage_batch, proceeds_stage_batch, rotation_stage_batch, summarize_batch
+
+
+# --- Parameter Sweep (new rate x tax rate x horizon grid over a process pool) ---
+_SWEEP_COLUMNS = None # Portfolio columns, set once per worker process by _init_sweep_worker
+_SWEEP_STAGES = {} # (stage, as_of[, tax rate]) -> holding/proceeds stage result, shared by the worker's tasks
+
+
+def _init_sweep_worker(columns):
+    """Process pool initializer: receives the parsed portfolio once per worker."""
+    global _SWEEP_COLUMNS
+    _SWEEP_COLUMNS = columns
+    _SWEEP_STAGES.clear()
+
+
+def _sweep_stages(tax_rate, as_of):
+    """The holding and proceeds stages for one tax rate: computed once per worker, not once per grid point."""
+    holding = _SWEEP_STAGES.get(('holding', as_of))
+    if holding is None:
+        holding = _SWEEP_STAGES[('holding', as_of)] = holding_stage_batch(
+            _SWEEP_COLUMNS['old_bond_principal'], _SWEEP_COLUMNS['old_bond_issue_date'],
+            _SWEEP_COLUMNS['old_bond_current_value'], _SWEEP_COLUMNS['old_bond_composite_rate_pct'], as_of=as_of
+        )
+    proceeds = _SWEEP_STAGES.get(('proceeds', as_of, tax_rate))
+    if proceeds is None:
+        proceeds = _SWEEP_STAGES[('proceeds', as_of, tax_rate)] = proceeds_stage_batch(holding, tax_rate)
+    return holding, proceeds
+
+
+def _sweep_task(points, include_bond_gains, as_of):
+    """Evaluates a block of (new_rate, tax_rate, horizon) points against the worker's portfolio."""
+    portfolio_gain = np.empty(len(points), dtype=np.float64)
+    recommended = np.empty(len(points), dtype=np.int64)
+    bond_gains = None
+    if include_bond_gains:
+        bond_gains = np.empty((len(points), len(_SWEEP_COLUMNS['old_bond_principal'])), dtype=np.float32)
+    for i, (new_rate, tax_rate, horizon) in enumerate(points):
+        holding, proceeds = _sweep_stages(tax_rate, as_of)
+        batch = rotation_stage_batch(holding, proceeds, _SWEEP_COLUMNS['old_bond_fixed_rate_pct'], new_rate, horizon,
+                                     include_break_even=False)
+        recommended[i], portfolio_gain[i] = summarize_batch(batch)
+        if include_bond_gains:
+            bond_gains[i] = batch['net_gain_or_loss']
+    return portfolio_gain, recommended, bond_gains
+
+
+def run_parameter_sweep(portfolio, new_rates, tax_rates, horizons, workers=None, include_bond_gains=False, as_of=None):
+    """Evaluates the full new rate x tax rate x horizon grid against one BondPortfolio.
+
+    The portfolio's input columns are shipped to each worker once through the pool initializer;
+    tasks only carry parameter points. Returns a dictionary of arrays with one entry per grid point (and a
+    points x bonds float32 'bond_net_gain' grid when include_bond_gains is set).
+    """
+    points = list(itertools.product(new_rates, tax_rates, horizons))
+    as_of = as_of or date.today() # One as-of date for every worker
+    columns = portfolio.batch_columns()
+    workers = workers or os.cpu_count() or 1
+    block_size = max(1, math.ceil(len(points) / (workers * 4)))
+    blocks = [points[i:i + block_size] for i in range(0, len(points), block_size)]
+
+    if workers == 1:
+        _init_sweep_worker(columns)
+        block_results = [_sweep_task(block, include_bond_gains, as_of) for block in blocks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_sweep_worker, initargs=(columns,)
+        ) as executor:
+            block_results = list(executor.map(_sweep_task, blocks, itertools.repeat(include_bond_gains), itertools.repeat(as_of)))
+
+    grid = {
+        'new_rate': np.array([point[0] for point in points], dtype=np.float64),
+        'tax_rate': np.array([point[1] for point in points], dtype=np.float64),
+        'horizon': np.array([point[2] for point in points], dtype=np.int64),
+        'portfolio_net_gain': np.concatenate([result[0] for result in block_results]) if points else np.empty(0),
+        'recommended_count': np.concatenate([result[1] for result in block_results]) if points else np.empty(0, dtype=np.int64),
+    }
+    if include_bond_gains:
+        grid['bond_net_gain'] = np.concatenate([result[2] for result in block_results]) if points else np.empty((0, 0), dtype=np.float32)
+    return grid
+
+
+def write_sweep_grid(grid, output_file):
+    """Writes one CSV row per sweep grid point."""
+    writer = csv.writer(output_file)
+    writer.writerow(['New Bond Fixed Rate', 'Federal Tax Rate', 'Investment Horizon', 'Recommended Count', 'Portfolio Net Gain'])
+    writer.writerows(zip(
+        grid['new_rate'].tolist(), grid['tax_rate'].tolist(), grid['horizon'].tolist(),
+        grid['recommended_count'].tolist(), grid['portfolio_net_gain'].tolist()
+    ))
+
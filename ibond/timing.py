@@ -0,0 +1,165 @@
+"""Redemption timing: the best of the next N months to redeem each bond, searched over bonds x months."""
+import csv
+from datetime import date
+
+import numpy as np
+
+from .batch import (
+    BATCH_ERR_INVALID_DATE, BATCH_ERR_NONPOSITIVE_PROCEEDS, BATCH_ERR_UNDER_12_MONTHS, BATCH_ERROR_MESSAGES, BATCH_OK,
+    holding_stage_batch, pow_table
+)
+from .defaults import TIMING_DEFAULT_MONTHS
+from .rates import I_BOND_MATURITY_MONTHS
+
+
+# --- Redemption Timing Search (bonds x candidate months, chunked to max_cells) ---
+TIMING_MAX_CELLS = 1000000 # Bonds x candidate months evaluated per chunk (bounds memory)
+TIMING_LOCKOUT_MONTHS = 12 # Bonds cannot be redeemed before 12 months
+TIMING_PENALTY_MONTHS = 60 # Redeeming before 5 years costs three months of interest
+TIMING_CSV_COLUMNS = [
+    'Confirmation', 'CSV Line', 'Total Months Held', 'Net Gain Now', 'Best Month', 'Best Redemption Date',
+    'Months Held Then', 'Penalty Then', 'Best Net Gain', 'Gain From Waiting', 'Error',
+]
+
+
+def _months_after(as_of, months):
+    """as_of moved forward by each of months, the day clipped to the month's length (datetime64[D])."""
+    target = np.datetime64(as_of, 'M') + months
+    month_days = ((target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')).astype(np.int64)
+    return target.astype('datetime64[D]') + np.minimum(as_of.day, month_days) - 1
+
+
+def redemption_timing_batch(
+    old_bond_principal,
+    old_bond_issue_date,
+    old_bond_fixed_rate_pct,
+    old_bond_current_value,
+    old_bond_composite_rate_pct,
+    new_bond_fixed_rate_pct,
+    federal_tax_rate_pct,
+    investment_horizon_years,
+    months_ahead=TIMING_DEFAULT_MONTHS,
+    max_cells=TIMING_MAX_CELLS,
+    as_of=None
+):
+    """Net gain of redeeming each bond in each of the next months_ahead months, and the best month.
+
+    Month k projects the bond k months ahead: its value accrues monthly at today's composite rate
+    (compounded semiannually, as simulate_rotation_batch accrues, and stopping at 30 years), it
+    cannot be redeemed while under 12 months old, and it pays the three-month penalty while under
+    5 years, so months past the 60-month cliff often win. The proceeds go into the new bond until
+    the same end date as redeeming now (investment_horizon_years - k/12 years), and the net gain is
+    calculate_rotation_metrics_batch's; month 0 reproduces it exactly.
+
+    Returns a dictionary of per-bond arrays: 'best_month' (-1 when no month allows a rotation),
+    'best_date', 'best_net_gain', 'months_held_at_best', 'penalty_at_best', 'net_gain_now' (month 0;
+    NaN when a rotation is not possible now), 'total_months_held' (now) and 'error_code' (OK when a
+    month was found; otherwise why none was: invalid date, still under 12 months at the last month,
+    or net proceeds never positive).
+    """
+    if not isinstance(investment_horizon_years, int) or investment_horizon_years <= 0:
+        raise ValueError("Investment horizon must be a positive integer.")
+    if not isinstance(months_ahead, int) or not 0 <= months_ahead < investment_horizon_years * 12:
+        raise ValueError("Months ahead must be a whole number of months shorter than the investment horizon.")
+    as_of = as_of or date.today()
+    holding = holding_stage_batch(old_bond_principal, old_bond_issue_date, old_bond_current_value,
+                                  old_bond_composite_rate_pct, as_of=as_of)
+    principal = np.asarray(old_bond_principal, dtype=np.float64)
+    current_value = np.asarray(old_bond_current_value, dtype=np.float64)
+    composite_rate = np.asarray(old_bond_composite_rate_pct, dtype=np.float64) / 100.0
+    old_fixed_rate = np.asarray(old_bond_fixed_rate_pct, dtype=np.float64) / 100.0
+    months_held = holding['total_months_held']
+    count = principal.shape[0]
+    tax_fraction = federal_tax_rate_pct / 100.0
+
+    # --- Compounding to the common end date, once per distinct fixed rate and candidate month ---
+    months = np.arange(months_ahead + 1)
+    exponents = investment_horizon_years - months / 12.0
+    exponents[0] = investment_horizon_years # Exactly the single-horizon path's exponent
+    valid = np.flatnonzero(holding['valid_date'])
+    unique_old_rates, rate_index = np.unique(old_fixed_rate[valid], return_inverse=True)
+    powers = pow_table(np.concatenate(([1 + new_bond_fixed_rate_pct / 100.0], 1 + unique_old_rates)), exponents)
+    pow_new = powers[0]
+    pow_old = powers[1:]
+
+    best_month = np.full(count, -1, dtype=np.int64)
+    best_net_gain = np.full(count, np.nan)
+    penalty_at_best = np.zeros(count, dtype=bool)
+    net_gain_now = np.full(count, np.nan)
+    ever_redeemable = np.zeros(count, dtype=bool)
+
+    chunk = max(1, max_cells // months.size)
+    for start in range(0, valid.size, chunk):
+        rows = valid[start:start + chunk]
+        held = months_held[rows, None] + months[None, :]
+        redeemable = held >= TIMING_LOCKOUT_MONTHS
+        in_penalty = redeemable & (held < TIMING_PENALTY_MONTHS)
+        accruing = np.minimum(months[None, :], np.maximum(I_BOND_MATURITY_MONTHS - months_held[rows, None], 0))
+        growth = (1.0 + composite_rate[rows, None] / 2.0) ** (accruing / 6.0)
+        value = current_value[rows, None] * growth
+
+        # Same operations, in the same order, as the holding, proceeds and rotation stages
+        penalty = np.where(in_penalty, value * (composite_rate[rows, None] / 4.0), 0.0)
+        immediate_cost = penalty + np.maximum(0.0, value - principal[rows, None]) * tax_fraction
+        net_proceeds = value - immediate_cost
+        chunk_pow_old = pow_old[rate_index[start:start + chunk]]
+        with np.errstate(invalid='ignore', over='ignore'):
+            benefit = net_proceeds * pow_new[None, :] - net_proceeds * chunk_pow_old
+        net_gain = benefit - immediate_cost
+        active = redeemable & (net_proceeds > 0) & np.isfinite(pow_new[None, :]) & np.isfinite(chunk_pow_old)
+
+        candidate = np.where(active, net_gain, -np.inf)
+        best = np.argmax(candidate, axis=1)
+        found = active[np.arange(rows.size), best]
+        best_rows = rows[found]
+        best_month[best_rows] = best[found]
+        best_net_gain[best_rows] = net_gain[found, best[found]]
+        penalty_at_best[best_rows] = in_penalty[found, best[found]]
+        net_gain_now[rows[active[:, 0]]] = net_gain[active[:, 0], 0]
+        ever_redeemable[rows] = redeemable[:, -1]
+
+    error_code = np.full(count, BATCH_OK, dtype=np.int8)
+    error_code[best_month < 0] = BATCH_ERR_NONPOSITIVE_PROCEEDS
+    error_code[~ever_redeemable] = BATCH_ERR_UNDER_12_MONTHS
+    error_code[~holding['valid_date']] = BATCH_ERR_INVALID_DATE
+    found = best_month >= 0
+    best_date = np.full(count, np.datetime64('NaT'), dtype='datetime64[D]')
+    best_date[found] = _months_after(as_of, best_month[found])
+    months_held_at_best = np.where(found, months_held + best_month, -1)
+    return {
+        'best_month': best_month,
+        'best_date': best_date,
+        'best_net_gain': best_net_gain,
+        'months_held_at_best': months_held_at_best,
+        'penalty_at_best': penalty_at_best,
+        'net_gain_now': net_gain_now,
+        'total_months_held': months_held,
+        'error_code': error_code,
+    }
+
+
+def write_redemption_timing(portfolio, timing, output_file):
+    """Writes one TIMING_CSV_COLUMNS row per bond.
+
+    Returns (best_now_count, wait_count, total_best_net_gain, total_gain_from_waiting) over bonds whose
+    best month has a positive net gain; waiting bonds are those whose best month is later than now.
+    """
+    writer = csv.writer(output_file)
+    writer.writerow(TIMING_CSV_COLUMNS)
+    gain_now = np.where(np.isnan(timing['net_gain_now']), 0.0, timing['net_gain_now'])
+    recommended = (timing['error_code'] == BATCH_OK) & (timing['best_net_gain'] > 0)
+    waiting = recommended & (timing['best_month'] > 0)
+    from_waiting = np.where(waiting, timing['best_net_gain'] - np.maximum(gain_now, 0.0), 0.0)
+    columns = [
+        portfolio.csv_line.tolist(), timing['total_months_held'].tolist(),
+        timing['net_gain_now'].tolist(),
+        timing['best_month'].tolist(),
+        ['' if text == 'NaT' else text for text in np.datetime_as_string(timing['best_date'], unit='D').tolist()],
+        timing['months_held_at_best'].tolist(), timing['penalty_at_best'].tolist(),
+        timing['best_net_gain'].tolist(),
+        from_waiting.tolist(),
+        [BATCH_ERROR_MESSAGES[code] or '' for code in timing['error_code'].tolist()],
+    ]
+    writer.writerows(zip(portfolio.confirmations, *columns))
+    return (int((recommended & ~waiting).sum()), int(waiting.sum()), float(timing['best_net_gain'][recommended].sum()),
+            float(from_waiting[waiting].sum()))
@@ -0,0 +1,59 @@
+"""Shared fixtures for the ibond test suite: the repo on sys.path and small bond CSVs written on demand."""
+import csv
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from ibond.defaults import (  # noqa: E402 (needs REPO_ROOT on sys.path)
+    CSV_COL_COMPOSITE_RATE, CSV_COL_CONFIRMATION, CSV_COL_CURRENT_VALUE, CSV_COL_FIXED_RATE, CSV_COL_ISSUE_DATE,
+    CSV_COL_PRINCIPAL
+)
+
+AS_OF = date(2026, 10, 17) # Fixed analysis date, so results do not drift with the calendar
+CSV_HEADER = [CSV_COL_CONFIRMATION, CSV_COL_ISSUE_DATE, CSV_COL_FIXED_RATE, CSV_COL_COMPOSITE_RATE,
+              CSV_COL_PRINCIPAL, CSV_COL_CURRENT_VALUE]
+SAMPLE_BONDS = [ # (confirmation, issue date, fixed %, composite %, principal, current value)
+    ('OLD0', '2001-05-01', 3.0, 6.12, 1000.0, 4450.0),
+    ('ZERO', '2015-02-01', 0.0, 3.11, 500.0, 640.0),
+    ('PEN1', '2023-03-15', 0.4, 3.51, 1000.0, 1110.0),
+    ('PEN2', '2024-11-30', 1.2, 4.31, 250.0, 262.0),
+    ('NEW1', '2026-01-20', 1.3, 4.03, 25.0, 25.50),
+    ('HIGH', '2023-11-01', 1.3, 4.28, 10000.0, 11050.0),
+    ('LATE', '2025-12-31', 1.2, 4.03, 100.0, 104.0),
+]
+
+
+def write_bond_csv(path, bonds):
+    """Writes bonds (SAMPLE_BONDS-style tuples) to path as an analyzer CSV."""
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(bonds)
+    return str(path)
+
+
+def random_bond_columns(count, seed=0, as_of=AS_OF):
+    """batch_columns()-style inputs for count random bonds: every age from new to 30+ years, rates from 0%
+    to the 3.6% highs, and some current values below principal."""
+    rng = np.random.default_rng(seed)
+    principal = rng.choice([25.0, 100.0, 1000.0, 5000.0, 10000.0], count)
+    return {
+        'old_bond_principal': principal,
+        'old_bond_issue_date': np.datetime64(as_of, 'D') - rng.integers(0, 11500, count),
+        'old_bond_fixed_rate_pct': rng.choice([0.0, 0.1, 0.4, 0.9, 1.2, 1.3, 3.0, 3.6], count),
+        'old_bond_current_value': np.round(principal * rng.uniform(0.95, 3.5, count), 2),
+        'old_bond_composite_rate_pct': np.round(rng.uniform(-0.5, 9.62, count), 2),
+    }
+
+
+@pytest.fixture
+def bond_csv(tmp_path):
+    """A CSV of SAMPLE_BONDS."""
+    return write_bond_csv(tmp_path / 'bonds.csv', SAMPLE_BONDS)
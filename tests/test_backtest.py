@@ -0,0 +1,49 @@
+"""Backtesting: every as-of date matches a single analysis run as of that date."""
+import numpy as np
+import pytest
+
+from conftest import random_bond_columns
+from ibond.backtest import backtest_dates
+from ibond.portfolio import BondPortfolio
+
+
+def _portfolio(columns):
+    count = len(columns['old_bond_principal'])
+    return BondPortfolio([f'C{i}' for i in range(count)], columns['old_bond_issue_date'],
+                         columns['old_bond_fixed_rate_pct'], columns['old_bond_composite_rate_pct'],
+                         columns['old_bond_principal'], columns['old_bond_current_value'], np.arange(count) + 2)
+
+
+def test_each_date_matches_analyze_as_of_that_date():
+    portfolio = _portfolio(random_bond_columns(400, seed=50))
+    dates = backtest_dates('2024-01-01', '2026-10-17', 'month-end')
+    backtest = portfolio.backtest(dates, 22.0, 10, new_bond_fixed_rate_pct=1.3, use_csv_values=True)
+    first = {}
+    for index, as_of in enumerate(dates.tolist()):
+        portfolio.analyze(1.3, 22.0, 10, as_of=as_of)
+        count, net_gain = portfolio.summary()
+        assert backtest['recommended_count'][index] == count, as_of
+        assert backtest['portfolio_net_gain'][index] == pytest.approx(net_gain, rel=1e-9), as_of
+        for row in np.flatnonzero(portfolio.results_table()['recommended']):
+            first.setdefault(row, as_of)
+    assert backtest['recommended_dates'].sum() == backtest['recommended_count'].sum()
+    expected_first = np.full(len(portfolio.confirmations), np.datetime64('NaT'), dtype='datetime64[D]')
+    expected_first[list(first)] = list(first.values())
+    np.testing.assert_array_equal(backtest['first_recommended'], expected_first)
+
+
+@pytest.mark.parametrize('end, frequency, expected', [
+    ('2024-03-02', 'day', ['2024-02-27', '2024-02-28', '2024-02-29', '2024-03-01', '2024-03-02']),
+    ('2024-03-05', 'week', ['2024-02-27', '2024-03-05']),
+    ('2024-04-10', 'month-start', ['2024-03-01', '2024-04-01']),
+    ('2024-04-10', 'month-end', ['2024-02-29', '2024-03-31']),
+])
+def test_backtest_dates(end, frequency, expected):
+    assert backtest_dates('2024-02-27', end, frequency).astype(str).tolist() == expected
+
+
+def test_backtest_dates_rejects_unknown_or_empty():
+    with pytest.raises(ValueError):
+        backtest_dates('2024-01-01', '2024-12-31', 'quarter')
+    with pytest.raises(ValueError):
+        backtest_dates('2024-03-02', '2024-03-30', 'month-end')
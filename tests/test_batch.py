@@ -0,0 +1,109 @@
+"""The NumPy engine must reproduce the scalar calculate_rotation_metrics row for row."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, random_bond_columns
+from ibond.batch import (
+    BATCH_ERR_INVALID_DATE, BATCH_ERR_NONPOSITIVE_PROCEEDS, BATCH_OK, batch_row_to_metrics,
+    calculate_rotation_metrics_batch, holding_stage_batch, horizon_curve_batch, horizon_curve_rows, proceeds_stage_batch,
+    solve_break_even_batch, summarize_batch
+)
+from ibond.core import calculate_rotation_metrics, solve_break_even
+
+
+def _scalar_rows(columns, new_rate, tax_rate, horizon, as_of, **options):
+    return [
+        calculate_rotation_metrics(
+            columns['old_bond_principal'][i].item(), columns['old_bond_issue_date'][i].item(),
+            columns['old_bond_fixed_rate_pct'][i].item(), columns['old_bond_current_value'][i].item(),
+            columns['old_bond_composite_rate_pct'][i].item(), new_rate, tax_rate, horizon, as_of=as_of, **options
+        )
+        for i in range(len(columns['old_bond_principal']))
+    ]
+
+
+@pytest.mark.parametrize('horizon', [1, 2, 5, 10, 30])
+@pytest.mark.parametrize('new_rate', [0.0, 1.3, 3.6])
+def test_batch_matches_scalar(horizon, new_rate):
+    columns = random_bond_columns(400, seed=horizon)
+    batch = calculate_rotation_metrics_batch(**columns, new_bond_fixed_rate_pct=new_rate, federal_tax_rate_pct=24.0,
+                                             investment_horizon_years=horizon, as_of=AS_OF)
+    for i, expected in enumerate(_scalar_rows(columns, new_rate, 24.0, horizon, AS_OF)):
+        actual = batch_row_to_metrics(batch, i, columns['old_bond_fixed_rate_pct'][i].item(), new_rate)
+        assert actual == expected, i
+
+
+def test_batch_matches_scalar_with_monthly_break_even():
+    columns = random_bond_columns(300, seed=7)
+    options = {'break_even_max_years': 40, 'break_even_periods_per_year': 12}
+    batch = calculate_rotation_metrics_batch(**columns, new_bond_fixed_rate_pct=1.9, federal_tax_rate_pct=32.0,
+                                             investment_horizon_years=7, as_of=AS_OF, **options)
+    for i, expected in enumerate(_scalar_rows(columns, 1.9, 32.0, 7, AS_OF, **options)):
+        actual = batch_row_to_metrics(batch, i, columns['old_bond_fixed_rate_pct'][i].item(), 1.9, max_years_to_check=40)
+        assert actual == expected, i
+
+
+def test_horizon_curve_matches_each_horizon():
+    columns = random_bond_columns(500, seed=3)
+    holding = holding_stage_batch(columns['old_bond_principal'], columns['old_bond_issue_date'],
+                                  columns['old_bond_current_value'], columns['old_bond_composite_rate_pct'], as_of=AS_OF)
+    curve = horizon_curve_batch(proceeds_stage_batch(holding, 22.0), columns['old_bond_fixed_rate_pct'], 1.3, max_years=30)
+    gains = horizon_curve_rows(curve, np.arange(500))
+    for horizon in (1, 10, 30):
+        batch = calculate_rotation_metrics_batch(**columns, new_bond_fixed_rate_pct=1.3, federal_tax_rate_pct=22.0,
+                                                 investment_horizon_years=horizon, include_break_even=False, as_of=AS_OF)
+        computed = np.isin(batch['error_code'], (BATCH_OK, BATCH_ERR_NONPOSITIVE_PROCEEDS))
+        np.testing.assert_array_equal(gains[computed, horizon - 1], batch['net_gain_or_loss'][computed])
+        assert np.isnan(gains[~computed, horizon - 1]).all()
+
+
+def test_invalid_dates_are_flagged_not_computed():
+    columns = random_bond_columns(5, seed=1)
+    columns['old_bond_issue_date'][2] = np.datetime64('NaT')
+    batch = calculate_rotation_metrics_batch(**columns, new_bond_fixed_rate_pct=1.3, federal_tax_rate_pct=22.0,
+                                             investment_horizon_years=10, as_of=AS_OF)
+    assert batch['error_code'][2] == BATCH_ERR_INVALID_DATE
+    assert summarize_batch(batch) == summarize_batch({name: np.delete(values, 2) for name, values in batch.items()})
+
+
+@pytest.mark.parametrize('periods_per_year', [1, 4, 12])
+def test_break_even_batch_matches_scalar(periods_per_year):
+    rng = np.random.default_rng(periods_per_year)
+    count = 2000
+    net_proceeds = rng.uniform(1.0, 20000.0, count)
+    immediate_cost = rng.uniform(0.0, 3000.0, count)
+    old_rates = rng.choice([-1.5, -0.2, 0.0, 0.001, 0.004, 0.012, 0.03, 0.036, 0.5], count)
+    for new_rate in (-0.01, 0.0, 0.013, 0.036, 0.9):
+        batch = solve_break_even_batch(net_proceeds, immediate_cost, old_rates, new_rate, max_years=60,
+                                       periods_per_year=periods_per_year)
+        scalar = [solve_break_even(p, c, o, new_rate, max_years=60, periods_per_year=periods_per_year)
+                  for p, c, o in zip(net_proceeds.tolist(), immediate_cost.tolist(), old_rates.tolist())]
+        assert batch.tolist() == scalar
+
+
+def test_break_even_edge_cases_match_scalar():
+    # Never reached within max_years (-1), and compounding overflows before it is reached (-2)
+    cases = [
+        (1000.0, 500.0, 0.012, 0.013, 10, -1),
+        (1e-10, 1e300, 0.0, 1.0, 2000, -2),
+        (1000.0, 0.0, 0.0, 0.013, 10, 1),
+        (1000.0, 1e9, 0.0, 0.0, 100, -1),
+    ]
+    for net_proceeds, cost, old_rate, new_rate, max_years, expected in cases:
+        assert solve_break_even(net_proceeds, cost, old_rate, new_rate, max_years=max_years) == expected
+        batch = solve_break_even_batch(np.array([net_proceeds]), np.array([cost]), np.array([old_rate]), new_rate,
+                                       max_years=max_years)
+        assert batch.tolist() == [expected]
+
+
+def test_break_even_in_metrics():
+    # Rate not higher: never breaks even; no immediate cost: breaks even at once
+    for new_rate, current_value, expected in ((0.4, 1500.0, -1), (1.3, 1000.0, 0), (1.3, 1500.0, 9)):
+        metrics = calculate_rotation_metrics(1000.0, date(2010, 1, 1), 0.4, current_value, 3.0, new_rate, 22.0, 10,
+                                             as_of=AS_OF)
+        assert metrics['break_even_years'] == expected
+        batch = calculate_rotation_metrics_batch([1000.0], np.array(['2010-01-01'], dtype='datetime64[D]'), [0.4],
+                                                 [current_value], [3.0], new_rate, 22.0, 10, as_of=AS_OF)
+        assert batch_row_to_metrics(batch, 0, 0.4, new_rate) == metrics
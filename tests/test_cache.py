@@ -0,0 +1,133 @@
+"""The persistent result cache and the in-memory analysis stages: reuse only while the inputs still apply."""
+from datetime import date
+
+import numpy as np
+
+from conftest import AS_OF, random_bond_columns
+from ibond.batch import calculate_rotation_metrics_batch
+from ibond.cache import RESULT_CACHE_COLUMNS, RotationResultCache
+from ibond.portfolio import BondPortfolio
+
+PARAMETERS = {'new_bond_fixed_rate_pct': 1.3, 'federal_tax_rate_pct': 22.0, 'investment_horizon_years': 10}
+
+
+def _assert_same_metrics(actual, expected):
+    for column in RESULT_CACHE_COLUMNS:
+        np.testing.assert_array_equal(actual[column], expected[column], err_msg=column)
+
+
+def _portfolio(columns):
+    count = len(columns['old_bond_principal'])
+    return BondPortfolio([f'C{i}' for i in range(count)], columns['old_bond_issue_date'],
+                         columns['old_bond_fixed_rate_pct'], columns['old_bond_composite_rate_pct'],
+                         columns['old_bond_principal'], columns['old_bond_current_value'], np.arange(count) + 2)
+
+
+def test_cache_hits_only_unchanged_rows(tmp_path):
+    path = str(tmp_path / 'results.npz')
+    columns = random_bond_columns(1000, seed=20)
+    cache = RotationResultCache(path)
+    _assert_same_metrics(cache.calculate(columns, **PARAMETERS, as_of=AS_OF),
+                         calculate_rotation_metrics_batch(**columns, **PARAMETERS, as_of=AS_OF))
+    assert (cache.hits, cache.misses) == (0, 1000)
+    cache.save()
+
+    changed = {name: column.copy() for name, column in columns.items()}
+    changed['old_bond_current_value'][:10] += 1.0
+    changed['old_bond_fixed_rate_pct'][10:15] = 1.0
+    cache = RotationResultCache(path)
+    _assert_same_metrics(cache.calculate(changed, **PARAMETERS, as_of=AS_OF),
+                         calculate_rotation_metrics_batch(**changed, **PARAMETERS, as_of=AS_OF))
+    assert (cache.hits, cache.misses) == (985, 15)
+
+
+def test_cache_keys_on_parameters_and_months_held(tmp_path):
+    path = str(tmp_path / 'results.npz')
+    columns = random_bond_columns(500, seed=21)
+    cache = RotationResultCache(path)
+    cache.calculate(columns, **PARAMETERS, as_of=AS_OF)
+    cache.save()
+
+    for parameters in ({**PARAMETERS, 'new_bond_fixed_rate_pct': 1.2}, {**PARAMETERS, 'federal_tax_rate_pct': 24.0},
+                       {**PARAMETERS, 'investment_horizon_years': 9}):
+        cache = RotationResultCache(path)
+        cache.calculate(columns, **parameters, as_of=AS_OF)
+        assert cache.hits == 0, parameters
+
+    # A later as-of date hits exactly the bonds that have not crossed a month boundary since
+    later = date(2026, 10, 30)
+    months_now = calculate_rotation_metrics_batch(**columns, **PARAMETERS, as_of=AS_OF)['total_months_held']
+    expected = calculate_rotation_metrics_batch(**columns, **PARAMETERS, as_of=later)
+    cache = RotationResultCache(path)
+    _assert_same_metrics(cache.calculate(columns, **PARAMETERS, as_of=later), expected)
+    assert cache.hits == int((expected['total_months_held'] == months_now).sum())
+    assert 0 < cache.hits < 500
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / 'results.npz')
+    old, new = random_bond_columns(300, seed=22), random_bond_columns(300, seed=23)
+    cache = RotationResultCache(path, max_entries=400)
+    cache.calculate(old, **PARAMETERS, as_of=AS_OF)
+    cache.save()
+    cache = RotationResultCache(path, max_entries=400)
+    cache.calculate(new, **PARAMETERS, as_of=AS_OF)
+    cache.save()
+    assert len(cache) == 400 and cache.evicted == 200
+
+    cache = RotationResultCache(path, max_entries=400)
+    cache.calculate(new, **PARAMETERS, as_of=AS_OF)
+    assert cache.hits == 300
+
+
+def test_unreadable_cache_starts_over(tmp_path):
+    path = tmp_path / 'results.npz'
+    path.write_bytes(b'not a cache')
+    cache = RotationResultCache(str(path))
+    assert len(cache) == 0
+    cache.calculate(random_bond_columns(10), **PARAMETERS, as_of=AS_OF)
+    assert cache.misses == 10
+
+
+def test_stages_rerun_only_for_changed_parameters():
+    columns = random_bond_columns(800, seed=24)
+    portfolio = _portfolio(columns)
+    runs = [
+        ((1.3, 22.0, 10), AS_OF, []),
+        ((1.3, 22.0, 10), AS_OF, ['holding', 'proceeds', 'curve']),
+        ((1.3, 22.0, 7), AS_OF, ['holding', 'proceeds', 'curve']), # Horizon: rotation stage only
+        ((1.5, 22.0, 7), AS_OF, ['holding', 'proceeds']), # New rate: curve and rotation
+        ((1.5, 24.0, 7), AS_OF, ['holding']), # Tax rate: everything after the holding stage
+        ((1.5, 24.0, 7), date(2027, 3, 1), []), # As-of date: everything
+    ]
+    for parameters, as_of, reused in runs:
+        metrics = portfolio.analyze(*parameters, as_of=as_of)
+        assert portfolio.stages_reused == reused, (parameters, as_of)
+        _assert_same_metrics(metrics, calculate_rotation_metrics_batch(**columns, **dict(zip(PARAMETERS, parameters)),
+                                                                       as_of=as_of))
+
+
+def test_stages_rerun_when_bond_columns_are_replaced():
+    columns = random_bond_columns(200, seed=25)
+    portfolio = _portfolio(columns)
+    portfolio.analyze(1.3, 22.0, 10, as_of=AS_OF)
+    portfolio.current_value = portfolio.current_value * 1.01
+    metrics = portfolio.analyze(1.3, 22.0, 10, as_of=AS_OF)
+    assert portfolio.stages_reused == []
+    _assert_same_metrics(metrics, calculate_rotation_metrics_batch(
+        **{**columns, 'old_bond_current_value': portfolio.current_value}, **PARAMETERS, as_of=AS_OF))
+
+
+def test_optimizer_plan_years_reuse_stages():
+    portfolio = _portfolio(random_bond_columns(600, seed=26))
+    first = portfolio.optimize(1.3, 22.0, 10, as_of=AS_OF)
+    stages = {name: stored[2] for name, stored in portfolio._stages.items()}
+    assert sorted(stages) == sorted(f'plan {year} {stage}' for year in range(2027, 2031)
+                                    for stage in ('holding', 'proceeds', 'rotation'))
+    again = portfolio.optimize(1.3, 22.0, 10, as_of=AS_OF)
+    assert all(portfolio._stages[name][2] is result for name, result in stages.items())
+    np.testing.assert_array_equal(first['plan_year'], again['plan_year'])
+
+    portfolio.optimize(1.5, 22.0, 10, as_of=AS_OF) # New rate: holding and proceeds still apply
+    for name, result in stages.items():
+        assert (portfolio._stages[name][2] is result) == (not name.endswith('rotation')), name
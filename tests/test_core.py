@@ -0,0 +1,132 @@
+"""Date math, the break-even solver and the as-of handling of the per-bond core."""
+import math
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, SAMPLE_BONDS
+from ibond.batch import months_held_batch
+from ibond.core import (
+    calculate_rotation_metrics, days_in_month, parse_bond_rows, parse_issue_date, solve_break_even,
+    whole_months_between
+)
+
+
+def _relativedelta_months(start, end):
+    """Whole months by python-dateutil, the reference the integer month math replaced (test skipped without it)."""
+    delta = pytest.importorskip('dateutil.relativedelta').relativedelta(end, start)
+    return delta.years * 12 + delta.months
+
+
+def _random_dates(rng, count):
+    first = date(1998, 1, 1).toordinal()
+    last = date(2060, 12, 31).toordinal()
+    return [date.fromordinal(rng.randint(first, last)) for _ in range(count)]
+
+
+def test_whole_months_between_matches_relativedelta():
+    rng = random.Random(10)
+    starts, ends = _random_dates(rng, 20000), _random_dates(rng, 20000)
+    for start, end in zip(starts, ends):
+        assert whole_months_between(start, end) == _relativedelta_months(start, end), (start, end)
+
+
+MONTH_END_CASES = [
+    (date(2024, 1, 31), date(2024, 2, 29)), (date(2023, 1, 31), date(2023, 2, 28)), (date(2024, 2, 29), date(2025, 2, 28)),
+    (date(2024, 2, 29), date(2028, 2, 29)), (date(2024, 3, 31), date(2024, 4, 30)), (date(2024, 3, 30), date(2024, 4, 30)),
+    (date(2024, 5, 31), date(2024, 4, 30)), (date(2024, 3, 31), date(2024, 2, 29)), (date(2025, 10, 17), date(2026, 10, 16)),
+    (date(2025, 10, 17), date(2026, 10, 17)), (date(2026, 10, 17), date(2026, 10, 17)), (date(2021, 10, 18), date(2026, 10, 17)),
+    (date(2021, 10, 17), date(2026, 10, 17)), (date(2026, 10, 18), date(2026, 10, 17)), (date(2027, 1, 31), date(2026, 12, 31)),
+]
+
+
+@pytest.mark.parametrize('start, end', MONTH_END_CASES)
+def test_month_ends_and_anniversaries(start, end):
+    expected = _relativedelta_months(start, end)
+    assert whole_months_between(start, end) == expected
+    assert months_held_batch(np.array([start], dtype='datetime64[D]'), end).tolist() == [expected]
+
+
+def test_months_held_batch_matches_scalar():
+    rng = random.Random(11)
+    issue_dates = _random_dates(rng, 5000)
+    column = np.array(issue_dates, dtype='datetime64[D]')
+    for as_of in _random_dates(rng, 40) + [date(2024, 2, 29), date(2026, 2, 28), date(2026, 12, 31)]:
+        expected = [whole_months_between(issue_date, as_of) for issue_date in issue_dates]
+        assert months_held_batch(column, as_of).tolist() == expected
+
+
+def test_days_in_month_handles_leap_years():
+    assert [days_in_month(year, 2) for year in (1900, 2000, 2023, 2024)] == [28, 29, 28, 29]
+    assert [days_in_month(2026, month) for month in (1, 4, 12)] == [31, 30, 31]
+
+
+def test_parse_issue_date():
+    assert parse_issue_date('2024-02-29') == date(2024, 2, 29)
+    for text in ('2023-02-29', '2024-13-01', '02/29/2024', ''):
+        with pytest.raises(ValueError):
+            parse_issue_date(text)
+
+
+@pytest.mark.parametrize('issue_date, months, error', [
+    (date(2025, 10, 18), 11, "Cannot be redeemed (held less than 12 months)."), # One day short of 12 months
+    (date(2025, 10, 17), 12, None),
+    (date(2021, 10, 18), 59, None), # Penalty still applies
+    (date(2021, 10, 17), 60, None),
+])
+def test_lockout_and_penalty_boundaries(issue_date, months, error):
+    metrics = calculate_rotation_metrics(1000.0, issue_date, 0.0, 1100.0, 4.0, 1.3, 22.0, 10, as_of=AS_OF)
+    assert metrics['total_months_held'] == months
+    assert metrics['error'] == error
+    assert metrics['penalty_applies'] == (12 <= months < 60)
+
+
+def test_as_of_changes_age_not_inputs():
+    bond = (1000.0, date(2020, 1, 15), 0.0, 1300.0, 3.1, 1.3, 22.0, 10)
+    assert calculate_rotation_metrics(*bond, as_of=date(2021, 1, 14))['total_months_held'] == 11
+    assert calculate_rotation_metrics(*bond, as_of=date(2021, 1, 15))['total_months_held'] == 12
+    assert calculate_rotation_metrics(*bond, as_of=date(2020, 1, 14))['total_months_held'] == 0 # Truncates toward zero
+    assert calculate_rotation_metrics(*bond, as_of=date(2019, 12, 14))['total_months_held'] == -1
+
+
+def test_parse_rejects_future_issue_dates_as_of():
+    rows = [{'Confirmation': c, 'Issue Date': d, 'Fixed Rate': str(f), 'Composite Interest rate': str(r),
+             'Original amount': str(p), 'Current Value': str(v)} for c, d, f, r, p, v in SAMPLE_BONDS]
+    for as_of, valid in ((AS_OF, 7), (date(2026, 1, 20), 7), (date(2026, 1, 19), 6), (date(2022, 1, 1), 2)):
+        parsed = list(parse_bond_rows(iter(rows), as_of))
+        assert sum(warning is None for _, warning in parsed) == valid
+        assert all(warning.endswith("Future issue date.") for _, warning in parsed if warning is not None)
+
+
+def _break_even_by_scan(net_proceeds, immediate_cost, old_fixed_rate, new_fixed_rate, max_years, periods_per_year):
+    """The original year-by-year search the bisection replaced."""
+    for step in range(1, int(max_years * periods_per_year) + 1):
+        exponent = step if periods_per_year == 1 else step / periods_per_year
+        try:
+            fv_new = net_proceeds * math.pow(1 + new_fixed_rate, exponent)
+            fv_old = net_proceeds * math.pow(1 + old_fixed_rate, exponent)
+        except (OverflowError, ValueError):
+            return -2
+        if fv_new - fv_old >= immediate_cost:
+            return exponent
+    return -1
+
+
+@pytest.mark.parametrize('periods_per_year', [1, 12])
+def test_break_even_bisection_matches_linear_scan(periods_per_year):
+    rng = random.Random(periods_per_year)
+    for _ in range(5000):
+        old_rate = rng.choice([0.0, 0.001, 0.004, 0.012, 0.03, -0.5, -1.0, -2.0])
+        new_rate = rng.choice([0.0, 0.005, 0.013, 0.036, 0.2, -0.01, 2.0])
+        args = (rng.uniform(0.01, 50000.0), rng.uniform(0.0, 5000.0), old_rate, new_rate, rng.choice([1, 10, 100, 400]))
+        assert solve_break_even(*args, periods_per_year=periods_per_year) == _break_even_by_scan(*args, periods_per_year), args
+
+
+def test_break_even_limits():
+    assert solve_break_even(1000.0, 500.0, 0.012, 0.013, max_years=10) == -1 # Not reached in time
+    assert solve_break_even(1e-10, 1e300, 0.0, 1.0, max_years=2000) == -2 # Compounding overflows first
+    assert solve_break_even(1000.0, 10.0, 0.0, 0.013, max_years=0) == -1 # Nothing to search
+    assert solve_break_even(1000.0, 12.0, 0.0, 0.013, max_years=10) == 1 # Reached exactly at the first step
+    assert solve_break_even(1000.0, 12.0, 0.0, 0.013, max_years=10, periods_per_year=12) == 1.0
@@ -0,0 +1,51 @@
+"""Bulk export: one record per bond in every format, with non-finite numbers written as missing values."""
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, SAMPLE_BONDS
+from ibond.export import EXPORT_FIELDS, check_export_format, export_portfolio
+from ibond.pipeline import load_portfolio
+
+
+@pytest.fixture
+def analyzed(bond_csv):
+    portfolio, _ = load_portfolio(bond_csv, as_of=AS_OF)
+    portfolio.analyze(1.3, 22.0, 10, as_of=AS_OF)
+    portfolio.metrics['net_gain_or_loss'][0] = np.nan
+    portfolio.metrics['compounded_fixed_rate_benefit'][1] = np.inf
+    portfolio.metrics['penalty'][2] = -np.inf
+    return portfolio
+
+
+def test_jsonl_writes_non_finite_numbers_as_null(analyzed, tmp_path):
+    path = tmp_path / 'results.jsonl'
+    summary = export_portfolio(analyzed, str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert summary['processed'] == len(records) == len(SAMPLE_BONDS)
+    assert list(records[0]) == EXPORT_FIELDS
+    assert records[0]['net_gain_or_loss'] is None
+    assert records[1]['compounded_fixed_rate_benefit'] is None
+    assert records[2]['penalty'] is None
+    assert records[3]['net_gain_or_loss'] == analyzed.metrics['net_gain_or_loss'][3]
+    assert [record['confirmation'] for record in records] == [bond[0] for bond in SAMPLE_BONDS]
+    assert records[0]['as_of'] == AS_OF.isoformat()
+
+
+def test_csv_writes_non_finite_numbers_as_blank(analyzed, tmp_path):
+    path = tmp_path / 'results.csv'
+    export_portfolio(analyzed, str(path))
+    with open(path, newline='') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [rows[0]['net_gain_or_loss'], rows[1]['compounded_fixed_rate_benefit'], rows[2]['penalty']] == [''] * 3
+    assert float(rows[3]['net_gain_or_loss']) == analyzed.metrics['net_gain_or_loss'][3]
+
+
+def test_export_format_from_suffix():
+    assert [check_export_format(path) for path in ('a.CSV', 'b.jsonl', 'c.ndjson')] == ['csv', 'jsonl', 'jsonl']
+    assert check_export_format('-', 'jsonl') == 'jsonl'
+    for path, export_format in (('results.txt', None), ('results.csv', 'xml'), ('-', 'parquet')):
+        with pytest.raises(ValueError):
+            check_export_format(path, export_format)
@@ -0,0 +1,50 @@
+"""Multi-file ingestion: files merged in path order, repeated confirmations resolved the way one file resolves them."""
+import os
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, SAMPLE_BONDS, write_bond_csv
+from ibond.ingest import load_multi_file_portfolio
+from ibond.pipeline import load_portfolio
+
+OLD0, ZERO, PEN1, PEN2, NEW1, HIGH, LATE = SAMPLE_BONDS
+ZERO_LATER = ('ZERO', '2015-02-01', 0.0, 3.11, 500.0, 655.0) # The same bond on a later statement
+PEN1_LATER = ('PEN1', '2023-03-15', 0.4, 3.51, 1000.0, 1125.0)
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    write_bond_csv(tmp_path / 'a.csv', [OLD0, ZERO, PEN1, PEN1_LATER]) # PEN1 twice within a file
+    write_bond_csv(tmp_path / 'b.csv', [ZERO_LATER, HIGH])
+    (tmp_path / 'c.csv').write_text("Not,A,Bond,Header\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_later_files_replace_repeated_confirmations(csv_dir, workers):
+    portfolio, warnings, stats = load_multi_file_portfolio([str(csv_dir)], workers=workers, as_of=AS_OF)
+    a, b = (os.path.normpath(str(csv_dir / name)) for name in ('a.csv', 'b.csv'))
+    assert portfolio.confirmations == ['OLD0', 'ZERO', 'PEN1', 'HIGH'] # The replacing row keeps the first position
+    assert portfolio.current_value.tolist() == [OLD0[5], ZERO_LATER[5], PEN1_LATER[5], HIGH[5]]
+    assert [portfolio.source_files[index] for index in portfolio.source_index] == [a, b, a, b]
+    assert portfolio.csv_line.tolist() == [2, 2, 5, 3]
+    assert stats == {'files': 2, 'skipped_files': 1, 'duplicates': 1}
+    assert f"Duplicate confirmation ZERO: '{b}' line 2 replaces '{a}' line 3." in warnings
+    assert any(warning.startswith("Skipping file") and 'c.csv' in warning for warning in warnings)
+
+
+def test_merged_analysis_matches_one_file(csv_dir, tmp_path):
+    merged, _, _ = load_multi_file_portfolio([str(csv_dir / 'a.csv'), str(csv_dir / 'b.csv')], (1.3, 22.0, 10),
+                                             workers=1, as_of=AS_OF)
+    single, _ = load_portfolio(write_bond_csv(tmp_path / 'single.csv', [OLD0, ZERO_LATER, PEN1_LATER, HIGH]),
+                               as_of=AS_OF)
+    single.analyze(1.3, 22.0, 10, as_of=AS_OF)
+    for name in ('net_gain_or_loss', 'net_proceeds', 'error_code'):
+        np.testing.assert_array_equal(merged.metrics[name], single.metrics[name], err_msg=name)
+    assert merged.summary() == single.summary()
+
+
+def test_no_csv_files_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        load_multi_file_portfolio([str(tmp_path / '*.csv')], workers=1, as_of=AS_OF)
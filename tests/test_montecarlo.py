@@ -0,0 +1,38 @@
+"""Monte Carlo rotation outcomes: with inflation held constant every path matches a hand calculation."""
+import numpy as np
+import pytest
+
+from conftest import AS_OF
+from ibond.batch import calculate_rotation_metrics_batch
+from ibond.montecarlo import simulate_rotation_batch
+
+
+def _simulate(issue_date, value, principal=1000.0, horizon=10):
+    # No volatility and the mean at the current rate: inflation stays at 1.5% on every path
+    return simulate_rotation_batch([principal], np.array([issue_date], dtype='datetime64[D]'), [0.0], [value], [3.0],
+                                   1.3, 22.0, horizon, paths=8, current_inflation_pct=1.5, inflation_mean_pct=1.5,
+                                   inflation_volatility_pct=0.0, as_of=AS_OF)
+
+
+def _hand_net_gain(issue_date, value, principal, keep_months, horizon=10):
+    proceeds = calculate_rotation_metrics_batch([principal], np.array([issue_date], dtype='datetime64[D]'), [0.0],
+                                                [value], [3.0], 1.3, 22.0, horizon, as_of=AS_OF)['net_proceeds'][0]
+    new_composite = (1.3 + 2 * 1.5 + 1.3 * 1.5 / 100) / 100
+    rotate_value = proceeds * (1 + new_composite / 2) ** (horizon * 12 / 6)
+    keep_value = value * (1 + 0.03 / 2) ** (keep_months / 6)
+    return (rotate_value - 0.22 * (rotate_value - proceeds)) - (keep_value - 0.22 * (keep_value - principal))
+
+
+def test_constant_inflation_matches_hand_calculation():
+    simulation = _simulate('2015-03-01', 1500.0)
+    assert simulation['total_months_held'].tolist() == [139]
+    assert simulation['mean'][0] == pytest.approx(_hand_net_gain('2015-03-01', 1500.0, 1000.0, 120), rel=1e-12)
+    assert simulation['std'][0] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_kept_bond_stops_accruing_at_maturity():
+    # 358 months held: the kept bond earns two more months over the 10-year horizon, not 120
+    simulation = _simulate('1996-12-01', 5000.0)
+    assert simulation['total_months_held'].tolist() == [358]
+    assert simulation['mean'][0] == pytest.approx(_hand_net_gain('1996-12-01', 5000.0, 1000.0, 2), rel=1e-12)
+    assert simulation['probability_of_gain'][0] == 1.0
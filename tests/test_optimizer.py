@@ -0,0 +1,112 @@
+"""The purchase-limit optimizer: exact and greedy knapsacks, and the year-by-year plan built from them."""
+import itertools
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, random_bond_columns
+from ibond.optimizer import (
+    PURCHASE_UNIT, _knapsack_dp, _knapsack_greedy, format_plan_summary, optimize_rotation_plan
+)
+
+
+def _brute_force(weights, values, capacity):
+    best = 0.0
+    for size in range(1, len(weights) + 1):
+        for subset in itertools.combinations(range(len(weights)), size):
+            subset = list(subset)
+            if weights[subset].sum() <= capacity:
+                best = max(best, values[subset].sum())
+    return best
+
+
+def _random_items(rng, count):
+    return rng.integers(1, 30, count), np.round(rng.uniform(0.5, 200.0, count), 2)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_dp_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    weights, values = _random_items(rng, int(rng.integers(1, 12)))
+    capacity = int(rng.integers(0, 80))
+    chosen, best = _knapsack_dp(weights, values, capacity)
+    assert weights[chosen].sum() <= capacity
+    assert values[chosen].sum() == pytest.approx(best)
+    assert best == pytest.approx(_brute_force(weights, values, capacity))
+
+
+def test_dp_pruning_keeps_the_optimum_with_many_equal_weights():
+    # 400 items of weight 4 (as $100 bonds in $25 units): at most 10 fit, only the 10 best can matter
+    rng = np.random.default_rng(1)
+    weights = np.full(400, 4)
+    values = rng.uniform(1.0, 50.0, 400)
+    chosen, best = _knapsack_dp(weights, values, 40)
+    assert chosen.sum() == 10
+    assert best == pytest.approx(np.sort(values)[-10:].sum())
+
+    weights = np.concatenate([weights, [40]])
+    values = np.concatenate([values, [best + 1.0]])
+    chosen, best_with_big = _knapsack_dp(weights, values, 40)
+    assert chosen.tolist() == [False] * 400 + [True]
+    assert best_with_big == pytest.approx(best + 1.0)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_greedy_is_feasible_within_half_and_bounded(seed):
+    rng = np.random.default_rng(100 + seed)
+    weights, values = _random_items(rng, int(rng.integers(1, 12)))
+    capacity = int(rng.integers(1, 80))
+    optimum = _brute_force(weights, values, capacity)
+    chosen, bound = _knapsack_greedy(weights, values, capacity)
+    assert weights[chosen].sum() <= capacity
+    assert values[chosen].sum() >= optimum / 2 - 1e-9
+    assert bound >= optimum - 1e-9
+
+
+def _plan(columns, **options):
+    return optimize_rotation_plan(**columns, new_bond_fixed_rate_pct=1.3, federal_tax_rate_pct=22.0,
+                                  investment_horizon_years=10, as_of=AS_OF, **options)
+
+
+def test_plan_respects_each_years_limit():
+    columns = random_bond_columns(2000, seed=30)
+    plan = _plan(columns, ssn_count=2, purchased_this_year=5000.0)
+    assert [year['year'] for year in plan['years']] == list(range(2026, 2031))
+    assert plan['years'][0]['budget'] == 15000.0
+    for year in plan['years']:
+        rows = plan['plan_year'] == year['year']
+        assert year['bonds'] == rows.sum()
+        assert np.ceil(plan['reinvest_amount'][rows] / PURCHASE_UNIT).sum() * PURCHASE_UNIT <= year['budget']
+        assert year['net_gain'] <= year['upper_bound'] + 1e-6
+    assert plan['planned_count'] == (plan['plan_year'] >= 0).sum() <= plan['unconstrained_count']
+    assert plan['total_net_gain'] <= plan['unconstrained_net_gain']
+
+
+def test_plan_methods_agree_on_small_portfolios():
+    columns = random_bond_columns(60, seed=31)
+    exact = _plan(columns, method='dp')
+    greedy = _plan(columns, method='greedy')
+    assert exact['years'][0]['net_gain'] >= greedy['years'][0]['net_gain'] - 1e-9
+    assert _plan(columns, method='auto')['years'][0]['method'] == 'dp'
+
+
+def test_plan_reports_bonds_larger_than_the_limit():
+    columns = random_bond_columns(3, seed=32)
+    columns['old_bond_principal'][:] = [10000.0, 20000.0, 1000.0]
+    columns['old_bond_current_value'][:] = [13000.0, 26000.0, 1300.0]
+    columns['old_bond_fixed_rate_pct'][:] = 0.0
+    columns['old_bond_issue_date'][:] = np.datetime64('2015-01-01')
+    plan = _plan(columns, plan_years=2)
+    for year in plan['years']:
+        assert year['oversized'] == 2 and year['oversized_net_gain'] > 0
+    assert plan['plan_year'].tolist() == [-1, -1, AS_OF.year]
+    summary = format_plan_summary(plan)
+    assert "greedy heuristic across years" in summary[1]
+    assert "2 bond(s)" in summary[3]
+
+
+def test_plan_rejects_bad_arguments():
+    columns = random_bond_columns(5)
+    for options in ({'method': 'ilp'}, {'ssn_count': 0}, {'annual_limit': -1.0}, {'purchased_this_year': -5.0}):
+        with pytest.raises(ValueError):
+            _plan(columns, **options)
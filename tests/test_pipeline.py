@@ -0,0 +1,73 @@
+"""The headless pipeline: streamed chunks, the scalar fast path and the CLI report the whole-portfolio totals."""
+import io
+
+import pytest
+
+from conftest import AS_OF, SAMPLE_BONDS, write_bond_csv
+from ibond.cli import main_cli
+from ibond.core import parse_bond_rows, read_csv_rows, write_scalar_rotation_results
+from ibond.pipeline import compute_rotation_chunks, load_portfolio, write_rotation_results
+
+# HIGH appears twice: the second row (a later statement) replaces the first, as in the GUI
+DUPLICATED_BONDS = SAMPLE_BONDS[:6] + [('HIGH', '2023-11-01', 1.3, 4.28, 10000.0, 11400.0)] + SAMPLE_BONDS[6:]
+
+
+@pytest.fixture
+def duplicated_csv(tmp_path):
+    return write_bond_csv(tmp_path / 'duplicated.csv', DUPLICATED_BONDS)
+
+
+def _portfolio_totals(csv_path):
+    portfolio, _ = load_portfolio(csv_path, as_of=AS_OF)
+    portfolio.analyze(1.3, 22.0, 10, as_of=AS_OF)
+    return len(portfolio), *portfolio.summary()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 100])
+def test_streamed_totals_count_repeated_confirmations_once(duplicated_csv, chunk_size):
+    warnings = io.StringIO()
+    summary = write_rotation_results(
+        compute_rotation_chunks(parse_bond_rows(read_csv_rows(duplicated_csv), AS_OF), 1.3, 22.0, 10,
+                                chunk_size=chunk_size, as_of=AS_OF),
+        io.StringIO(), warnings
+    )
+    processed, recommended, total = _portfolio_totals(duplicated_csv)
+    assert (summary['processed'], summary['recommended_count']) == (processed, recommended)
+    assert summary['total_net_gain'] == pytest.approx(total, rel=1e-12)
+    assert warnings.getvalue() == "Duplicate confirmation HIGH: line 8 replaces line 7 in the totals.\n"
+    assert summary['warnings'] == 1
+
+
+def test_scalar_totals_count_repeated_confirmations_once(duplicated_csv):
+    output = io.StringIO()
+    summary = write_scalar_rotation_results(parse_bond_rows(read_csv_rows(duplicated_csv), AS_OF), 1.3, 22.0, 10,
+                                            output, io.StringIO(), as_of=AS_OF)
+    processed, recommended, total = _portfolio_totals(duplicated_csv)
+    assert (summary['processed'], summary['recommended_count']) == (processed, recommended)
+    assert summary['total_net_gain'] == pytest.approx(total, rel=1e-12)
+    assert len(output.getvalue().splitlines()) == len(DUPLICATED_BONDS) + 1 # Every row is still written
+
+
+@pytest.mark.parametrize('options', [[], ['--chunk-size', '2', '--cache', 'CACHE'], ['--snapshot', 'SNAPSHOT'],
+                                     ['--export', 'EXPORT']])
+def test_cli_totals_match_the_portfolio(duplicated_csv, tmp_path, capsys, options):
+    paths = {'CACHE': tmp_path / 'cache.npz', 'SNAPSHOT': tmp_path / 'bonds.snap', 'EXPORT': tmp_path / 'out.jsonl'}
+    options = [str(paths.get(option, option)) for option in options]
+    output = [] if '--export' in options[:1] else ['-o', str(tmp_path / 'results.csv')]
+    assert main_cli([duplicated_csv, '--as-of', AS_OF.isoformat(), '-w', str(tmp_path / 'warnings.txt')]
+                    + output + options) == 0
+    processed, recommended, total = _portfolio_totals(duplicated_csv)
+    report = capsys.readouterr().out
+    assert f"Bonds Processed: {processed} " in report
+    assert f"Bonds Recommended for Rotation: {recommended} bond(s)" in report
+    assert f"Total Estimated Net Gain (Horizon): ${total:,.2f}" in report
+
+
+def test_snapshot_runs_keep_the_last_row_of_a_repeated_confirmation(duplicated_csv, tmp_path):
+    results = tmp_path / 'results.csv'
+    for _ in range(2): # Writes the snapshot, then opens it
+        assert main_cli([duplicated_csv, '--as-of', AS_OF.isoformat(), '--snapshot', str(tmp_path / 'bonds.snap'),
+                         '-o', str(results), '-w', str(tmp_path / 'warnings.txt')]) == 0
+        rows = [line.split(',')[:2] for line in results.read_text().splitlines()[1:]]
+        assert [confirmation for confirmation, _ in rows] == [bond[0] for bond in SAMPLE_BONDS]
+        assert ['HIGH', '8'] in rows # The later row, in the first row's place
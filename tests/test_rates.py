@@ -0,0 +1,73 @@
+"""The Treasury rate table: values worked out by hand, and the check that fills in or flags CSV columns."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from ibond.portfolio import BondPortfolio
+from ibond.rates import RateTableCheck, TreasuryRateTable, _month_index, load_rate_table
+
+# Two announcements: 0.0% fixed / 1.0% inflation from May 2020, 0.5% / 2.0% from November
+TABLE = TreasuryRateTable([(_month_index('2020-05'), 0.0, 1.0), (_month_index('2020-11'), 0.5, 2.0)])
+AS_OF = date(2021, 1, 15)
+
+
+def test_bond_values_match_hand_calculation():
+    values = TABLE.bond_values(np.array(['2020-05-15', '2020-12-01'], dtype='datetime64[D]'), [1000.0, 100.0], AS_OF)
+    # May bond, 8 months: a full period at 2.00%, then 2 months at 0 + 2 x 2.0 = 4.00%, per $25 rounded to the cent
+    first = round(round(25 * 1.01, 2) * 1.02 ** (2 / 6), 2)
+    # December bond, 1 month at 0.5 + 2 x 2.0 + 0.5 x 2.0 / 100 = 4.51%
+    second = round(25 * (1 + 4.51 / 200) ** (1 / 6), 2)
+    assert values['covered'].tolist() == [True, True]
+    assert values['fixed_rate_pct'].tolist() == [0.0, 0.5]
+    assert values['composite_rate_pct'].tolist() == [4.0, 4.51]
+    assert values['current_value'].tolist() == [round(first * 40, 2), round(second * 4, 2)]
+    assert values['penalty_value'][0] == round(round(25 * 1.01 ** (5 / 6), 2) * 40, 2) # Three months earlier
+    assert TABLE.last_covered_month == '2021-04'
+
+
+def _portfolio(rows):
+    confirmations, issue_dates, fixed, composite, principal, value = zip(*rows)
+    return BondPortfolio(list(confirmations), issue_dates, fixed, composite, principal, value, np.arange(len(rows)) + 2)
+
+
+def test_derive_returns_a_new_portfolio():
+    portfolio = _portfolio([
+        ('TABL', '2020-05-15', 0.3, 9.0, 1000.0, 1.0), # Covered: the table's values replace these
+        ('BLNK', '2019-01-10', np.nan, np.nan, 50.0, np.nan), # Not covered and blank: dropped
+        ('SUPP', '2019-01-10', 0.9, 3.2, 50.0, 55.0), # Not covered but supplied: kept as is
+    ])
+    columns = (portfolio.fixed_rate_pct, portfolio.composite_rate_pct, portfolio.current_value)
+    supplied = [column.copy() for column in columns]
+    derived, warnings = RateTableCheck(TABLE, derive=True).apply(portfolio, AS_OF)
+    assert derived is not portfolio
+    for name, column, before in zip(('fixed_rate_pct', 'composite_rate_pct', 'current_value'), columns, supplied):
+        assert getattr(portfolio, name) is column
+        np.testing.assert_array_equal(column, before)
+    assert len(portfolio) == 3 and derived.confirmations == ['TABL', 'SUPP']
+    expected = TABLE.bond_values(portfolio.issue_date[:1], portfolio.principal[:1], AS_OF)
+    assert derived.fixed_rate_pct.tolist() == [expected['fixed_rate_pct'][0], 0.9]
+    assert derived.composite_rate_pct.tolist() == [expected['composite_rate_pct'][0], 3.2]
+    assert derived.current_value.tolist() == [expected['current_value'][0], 55.0]
+    assert len(warnings) == 2 and warnings[1].startswith("Skipping CSV line 3 (Conf: BLNK)")
+
+
+def test_check_only_flags_disagreements():
+    values = TABLE.bond_values(np.array(['2020-05-15'], dtype='datetime64[D]'), [1000.0], AS_OF)
+    portfolio = _portfolio([
+        ('GOOD', '2020-05-15', 0.0, 4.0, 1000.0, values['current_value'][0]),
+        ('BAD', '2020-05-15', 0.0, 4.5, 1000.0, values['current_value'][0] + 10.0),
+    ])
+    check = RateTableCheck(TABLE)
+    checked, warnings = check.apply(portfolio, AS_OF)
+    assert checked is portfolio
+    value = values['current_value'][0]
+    assert warnings == [f"Rate check, CSV line 3 (Conf: BAD): Composite Interest rate 4.5% vs 4.0% computed; "
+                        f"Current Value ${value + 10.0:,.2f} vs ${value:,.2f} computed."]
+    assert check.counts == {'checked': 2, 'fixed_rate': 0, 'composite_rate': 1, 'current_value': 1, 'not_covered': 0}
+
+
+def test_bundled_table_loads():
+    table = load_rate_table()
+    assert table.first_month == _month_index('1998-09')
+    assert table.fixed_rate_pct[0] == pytest.approx(3.4)
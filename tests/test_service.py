@@ -0,0 +1,76 @@
+"""The analysis service answers every request, including malformed ones, with a JSON status."""
+import json
+import socket
+from unittest import mock
+
+import pytest
+
+from conftest import CSV_HEADER, SAMPLE_BONDS
+from ibond.service import RotationService, RotationServiceClient
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = RotationService(port=0, workers=1).start()
+    yield service
+    service.shutdown()
+
+
+def _raw_request(service, request):
+    """Sends raw HTTP bytes and returns (status line, body) once the server closes the connection."""
+    host, port = service.server.server_address[:2]
+    with socket.create_connection((host, port), timeout=10) as connection:
+        connection.sendall(request)
+        response = b''
+        while chunk := connection.recv(65536):
+            response += chunk
+    head, _, body = response.partition(b'\r\n\r\n')
+    return head.split(b'\r\n')[0].decode(), json.loads(body)
+
+
+def _post(content_length_header, body=b''):
+    return b'POST /analyze HTTP/1.1\r\nHost: test\r\nConnection: close\r\n' + content_length_header + b'\r\n' + body
+
+
+def test_analyze_round_trip(service):
+    host, port = service.server.server_address[:2]
+    bonds = [dict(zip(CSV_HEADER, bond)) for bond in SAMPLE_BONDS]
+    response = RotationServiceClient(f'http://{host}:{port}').analyze(bonds=bonds, as_of='2026-10-17')
+    assert response['summary']['bonds_analyzed'] == len(SAMPLE_BONDS)
+
+
+@pytest.mark.parametrize('header, status', [
+    (b'', '411'),
+    (b'Content-Length: abc\r\n', '400'),
+    (b'Content-Length: -1\r\n', '400'),
+    (b'Content-Length: 999999999999\r\n', '413'),
+])
+def test_bad_content_length_is_answered(service, header, status):
+    status_line, body = _raw_request(service, _post(header))
+    assert status_line.split()[1] == status
+    assert 'error' in body
+
+
+def test_handler_errors_are_answered_with_500(service):
+    body = json.dumps({'bonds': []}).encode()
+    with mock.patch.object(RotationService, 'analyze', side_effect=RuntimeError('boom')):
+        status_line, response = _raw_request(service, _post(b'Content-Length: %d\r\n' % len(body), body))
+    assert status_line.split()[1] == '500'
+    assert 'boom' in response['error']
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not JSON")
+
+
+def test_non_finite_results_are_sent_as_null(service):
+    # 'nan' and 'inf' parse as numbers, and every amount computed from them is non-finite
+    bonds = [dict(zip(CSV_HEADER, bond)) for bond in SAMPLE_BONDS[:3]]
+    bonds[1]['Current Value'], bonds[2]['Current Value'] = 'nan', 'inf'
+    body = json.dumps({'bonds': bonds, 'as_of': '2026-10-17'}).encode()
+    status_line, response = _raw_request(service, _post(b'Content-Length: %d\r\n' % len(body), body))
+    assert status_line.split()[1] == '200'
+    for bond in response['bonds'][1:]:
+        assert bond['net_proceeds'] is None and bond['net_gain_or_loss'] is None
+    assert json.loads(json.dumps(response), parse_constant=_reject_constant) == response
+    assert response['summary']['bonds_analyzed'] == 3
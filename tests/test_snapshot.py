@@ -0,0 +1,79 @@
+"""Snapshots must give the same portfolio and warnings as parsing the CSV, whatever the as-of date."""
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, SAMPLE_BONDS, write_bond_csv
+from ibond.pipeline import load_portfolio
+from ibond.snapshot import open_portfolio_snapshot, write_portfolio_snapshot
+
+
+def _assert_same_load(csv_path, snapshot_path, as_of):
+    from_snapshot, snapshot_warnings = load_portfolio(csv_path, snapshot_path, as_of=as_of)
+    from_csv, csv_warnings = load_portfolio(csv_path, as_of=as_of)
+    assert snapshot_warnings == csv_warnings
+    assert from_snapshot.confirmations == from_csv.confirmations
+    np.testing.assert_array_equal(from_snapshot.issue_date, from_csv.issue_date)
+    np.testing.assert_array_equal(from_snapshot.current_value, from_csv.current_value)
+    snapshot_metrics = from_snapshot.analyze(1.3, 22.0, 10, as_of=as_of)
+    csv_metrics = from_csv.analyze(1.3, 22.0, 10, as_of=as_of)
+    for name, column in csv_metrics.items():
+        np.testing.assert_array_equal(snapshot_metrics[name], column, err_msg=name)
+    return from_csv, csv_warnings
+
+
+@pytest.mark.parametrize('later_as_of', [date(2022, 1, 1), date(2024, 1, 1), date(2025, 12, 30)])
+def test_snapshot_built_today_matches_csv_at_earlier_as_of(bond_csv, tmp_path, later_as_of):
+    snapshot_path = str(tmp_path / 'bonds.ibsnap')
+    load_portfolio(bond_csv, snapshot_path, as_of=AS_OF)
+    portfolio, warnings = _assert_same_load(bond_csv, snapshot_path, later_as_of)
+    assert all(issue_date <= np.datetime64(later_as_of) for issue_date in portfolio.issue_date)
+    assert any(warning.endswith("Future issue date.") for warning in warnings)
+    assert not (portfolio.metrics['total_months_held'] < 0).any()
+
+
+def test_snapshot_built_early_matches_csv_at_later_as_of(bond_csv, tmp_path):
+    snapshot_path = str(tmp_path / 'bonds.ibsnap')
+    load_portfolio(bond_csv, snapshot_path, as_of=date(2022, 1, 1))
+    portfolio, warnings = _assert_same_load(bond_csv, snapshot_path, AS_OF)
+    assert len(portfolio) == len(SAMPLE_BONDS) and not warnings
+
+
+def test_snapshot_reused_when_as_of_filters_the_same_rows(bond_csv, tmp_path):
+    snapshot_path = str(tmp_path / 'bonds.ibsnap')
+    load_portfolio(bond_csv, snapshot_path, as_of=AS_OF)
+    for as_of in (AS_OF, date(2026, 1, 20), date(2030, 1, 1)): # Latest issue date is 2026-01-20
+        portfolio, _ = open_portfolio_snapshot(snapshot_path, bond_csv, as_of)
+        assert portfolio is not None, as_of
+    assert open_portfolio_snapshot(snapshot_path, bond_csv, date(2026, 1, 19)) == (None, None)
+
+
+def test_snapshot_invalidated_by_csv_changes(bond_csv, tmp_path):
+    snapshot_path = str(tmp_path / 'bonds.ibsnap')
+    load_portfolio(bond_csv, snapshot_path, as_of=AS_OF)
+
+    stat = os.stat(bond_csv)
+    os.utime(bond_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)) # Touched, same content
+    assert open_portfolio_snapshot(snapshot_path, bond_csv, AS_OF)[0] is not None
+
+    changed = [SAMPLE_BONDS[0][:5] + (4460.0,)] + SAMPLE_BONDS[1:] # Same size, different content
+    write_bond_csv(bond_csv, changed)
+    assert os.stat(bond_csv).st_size == stat.st_size
+    os.utime(bond_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert open_portfolio_snapshot(snapshot_path, bond_csv, AS_OF) == (None, None)
+    portfolio, _ = load_portfolio(bond_csv, snapshot_path, as_of=AS_OF)
+    assert portfolio.current_value[portfolio.index['OLD0']] == 4460.0
+
+
+def test_corrupt_or_foreign_snapshot_is_ignored(bond_csv, tmp_path):
+    snapshot_path = tmp_path / 'bonds.ibsnap'
+    snapshot_path.write_bytes(b'not a snapshot')
+    assert open_portfolio_snapshot(str(snapshot_path), bond_csv, AS_OF) == (None, None)
+    assert open_portfolio_snapshot(str(tmp_path / 'missing.ibsnap'), bond_csv, AS_OF) == (None, None)
+
+    portfolio, warnings = load_portfolio(bond_csv, as_of=AS_OF)
+    write_portfolio_snapshot(portfolio, warnings, str(snapshot_path), bond_csv, as_of=AS_OF)
+    reopened, reopened_warnings = open_portfolio_snapshot(str(snapshot_path), bond_csv, AS_OF)
+    assert reopened.confirmations == portfolio.confirmations and reopened_warnings == warnings
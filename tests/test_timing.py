@@ -0,0 +1,96 @@
+"""Redemption timing: each candidate month's projected value and the chosen month, checked by hand."""
+import io
+import math
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import AS_OF, random_bond_columns
+from ibond.batch import BATCH_ERR_UNDER_12_MONTHS, BATCH_OK, calculate_rotation_metrics_batch
+from ibond.portfolio import BondPortfolio
+from ibond.timing import redemption_timing_batch, write_redemption_timing
+
+
+def _timing(issue_date, value, composite_pct, months_ahead=12, principal=1000.0, fixed_pct=0.0):
+    return redemption_timing_batch([principal], np.array([issue_date], dtype='datetime64[D]'), [fixed_pct], [value],
+                                   [composite_pct], 1.3, 22.0, 10, months_ahead=months_ahead, as_of=AS_OF)
+
+
+def _hand_net_gain(value, principal, composite, months_held, month, fixed=0.0):
+    """Net gain of redeeming month months from now, worked through step by step."""
+    accruing = min(month, max(360 - months_held, 0)) # No interest past the 30-year maturity
+    value = value * (1 + composite / 2) ** (accruing / 6) # Semiannual compounding, accrued monthly
+    penalty = value * composite / 4 if months_held + month < 60 else 0.0
+    cost = penalty + max(0.0, value - principal) * 0.22
+    proceeds = value - cost
+    years = 10 - month / 12
+    return proceeds * (1.013 ** years) - proceeds * ((1 + fixed) ** years) - cost
+
+
+def test_months_ahead_match_hand_calculation():
+    # 57 months held on AS_OF: the penalty ends in month 3
+    timing = _timing('2022-01-17', 1200.0, 4.0)
+    gains = [_hand_net_gain(1200.0, 1000.0, 0.04, 57, month) for month in range(13)]
+    assert timing['best_month'].tolist() == [int(np.argmax(gains))] == [3]
+    assert timing['best_net_gain'][0] == pytest.approx(gains[3], rel=1e-12)
+    assert timing['net_gain_now'][0] == pytest.approx(gains[0], rel=1e-12)
+    assert timing['months_held_at_best'].tolist() == [60]
+    assert not timing['penalty_at_best'][0]
+    assert timing['best_date'][0] == np.datetime64('2027-01-17')
+
+    batch = calculate_rotation_metrics_batch([1000.0], np.array(['2022-01-17'], dtype='datetime64[D]'), [0.0], [1200.0],
+                                             [4.0], 1.3, 22.0, 10, as_of=AS_OF)
+    assert timing['net_gain_now'][0] == batch['net_gain_or_loss'][0] # Month 0 is the single-horizon result
+
+
+def test_growth_continues_past_the_penalty():
+    # Long out of the penalty: later months only add interest, taxed and compounded over a shorter horizon
+    timing = _timing('2015-03-01', 1500.0, 4.0, months_ahead=24)
+    gains = [_hand_net_gain(1500.0, 1000.0, 0.04, 139, month) for month in range(25)]
+    assert timing['best_month'][0] == int(np.argmax(gains))
+    assert timing['best_net_gain'][0] == pytest.approx(max(gains), rel=1e-12)
+
+
+def test_accrual_stops_at_maturity():
+    # 358 months held: two more months of interest, then the bond stops earning
+    timing = _timing('1996-12-01', 5000.0, 4.0, months_ahead=6)
+    gains = [_hand_net_gain(5000.0, 1000.0, 0.04, 358, month) for month in range(7)]
+    assert timing['best_month'][0] == int(np.argmax(gains))
+    assert timing['best_net_gain'][0] == pytest.approx(max(gains), rel=1e-12)
+
+
+def test_locked_bonds_wait_for_their_first_anniversary():
+    timing = _timing('2026-01-17', 1010.0, 4.0, months_ahead=6)
+    gains = [_hand_net_gain(1010.0, 1000.0, 0.04, 9, month) for month in range(3, 7)] # Redeemable from month 3
+    assert timing['best_month'].tolist() == [3 + int(np.argmax(gains))]
+    assert timing['best_net_gain'][0] == pytest.approx(max(gains), rel=1e-12)
+    assert _timing('2026-06-17', 1010.0, 4.0, months_ahead=3)['error_code'].tolist() == [BATCH_ERR_UNDER_12_MONTHS]
+
+
+def test_month_zero_matches_batch_engine_for_every_bond():
+    columns = random_bond_columns(500, seed=40)
+    timing = redemption_timing_batch(**columns, new_bond_fixed_rate_pct=1.3, federal_tax_rate_pct=22.0,
+                                     investment_horizon_years=10, months_ahead=6, as_of=AS_OF)
+    batch = calculate_rotation_metrics_batch(**columns, new_bond_fixed_rate_pct=1.3, federal_tax_rate_pct=22.0,
+                                             investment_horizon_years=10, as_of=AS_OF)
+    now = batch['error_code'] == BATCH_OK
+    np.testing.assert_array_equal(timing['net_gain_now'][now], batch['net_gain_or_loss'][now])
+    found = timing['best_month'] >= 0
+    assert (timing['best_net_gain'][found & now] >= timing['net_gain_now'][found & now]).all()
+
+
+def test_write_redemption_timing_totals():
+    columns = random_bond_columns(50, seed=41)
+    portfolio = BondPortfolio([f'C{i}' for i in range(50)], columns['old_bond_issue_date'],
+                              columns['old_bond_fixed_rate_pct'], columns['old_bond_composite_rate_pct'],
+                              columns['old_bond_principal'], columns['old_bond_current_value'], np.arange(50) + 2)
+    timing = portfolio.redemption_timing(1.3, 22.0, 10, months_ahead=12, as_of=AS_OF)
+    output = io.StringIO()
+    best_now, waiting, total, from_waiting = write_redemption_timing(portfolio, timing, output)
+    assert len(output.getvalue().splitlines()) == 51
+    recommended = (timing['error_code'] == BATCH_OK) & (timing['best_net_gain'] > 0)
+    assert best_now + waiting == recommended.sum()
+    assert total == pytest.approx(timing['best_net_gain'][recommended].sum())
+    assert from_waiting >= 0.0 and not math.isnan(total)
+    assert date.fromisoformat(str(timing['best_date'][recommended][0])) >= AS_OF